@@ -8,15 +8,20 @@ __version__ = "1.0.0"
 from .config import GenerationConfig
 from .pipeline import VideoPipeline
 from .generator import VideoGenerator
-from .motion import MotionEffects
+from .motion import MotionEffects, MotionSchedule
 from .visual_style import VisualStyle
-from .overlay import Overlay
+from .overlay import Overlay, OverlayVariant
+from .video_io import EncodingSettings, Rendition
 
 __all__ = [
     'GenerationConfig',
     'VideoPipeline',
     'VideoGenerator',
     'MotionEffects',
+    'MotionSchedule',
     'VisualStyle',
     'Overlay',
+    'OverlayVariant',
+    'EncodingSettings',
+    'Rendition',
 ]
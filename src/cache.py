@@ -0,0 +1,147 @@
+"""
+Persistent on-disk cache for generated base clips.
+"""
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+from typing import List, Optional, Sequence
+
+
+class BaseClipCache:
+    """Content-addressed cache of base clips stored as .npy files.
+    
+    Clips are keyed by a hash of the configuration fields that the base
+    generator actually reads, stored as a single (frames, H, W, C) array
+    and loaded back memory-mapped, so a cache hit is zero-copy. The
+    total size is bounded by a byte budget with least-recently-used
+    eviction (file mtime is refreshed on every hit).
+    """
+    
+    # Bump when the generator output changes for an unchanged config
+    FORMAT_VERSION = 1
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """Initialize base clip cache.
+        
+        Args:
+            cache_dir: Directory holding cached clips
+            max_bytes: Size budget for all cached clips
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @classmethod
+    def key_for(cls, config) -> str:
+        """Compute the cache key for a configuration.
+        
+        Only fields that affect base clip pixels are hashed; fps and
+        base_clip_duration enter through their product, base_frames.
+        
+        Args:
+            config: GenerationConfig instance
+            
+        Returns:
+            Hex digest identifying the base clip
+        """
+        fields = {
+            'version': cls.FORMAT_VERSION,
+            'output_resolution': list(config.output_resolution),
+            'base_frames': config.base_frames,
+            'seed': config.seed,
+            'fast_synthesis': config.fast_synthesis,
+        }
+        payload = json.dumps(fields, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+    
+    def path_for(self, key: str) -> str:
+        """Get the file path for a cache key."""
+        return os.path.join(self.cache_dir, f"base_clip_{key}.npy")
+    
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """Load a cached clip.
+        
+        Args:
+            key: Cache key from key_for()
+            
+        Returns:
+            Read-only memory-mapped clip array, or None on a miss
+        """
+        path = self.path_for(key)
+        try:
+            clip = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            return None
+        
+        # Mark as most recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return clip
+    
+    def store(self, key: str, frames: Sequence[np.ndarray]) -> np.ndarray:
+        """Store a clip and return it memory-mapped from disk.
+        
+        Args:
+            key: Cache key from key_for()
+            frames: Frames of the base clip
+            
+        Returns:
+            Read-only memory-mapped clip array
+        """
+        shape = (len(frames),) + frames[0].shape
+        nbytes = int(np.prod(shape))
+        if nbytes > self.max_bytes:
+            return np.stack(frames)
+        
+        self.evict(reserve=nbytes)
+        
+        # Write to a private temp file, then publish atomically
+        path = self.path_for(key)
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            clip = np.lib.format.open_memmap(tmp_path, mode='w+',
+                                             dtype=np.uint8, shape=shape)
+            for i, frame in enumerate(frames):
+                clip[i] = frame
+            clip.flush()
+            del clip
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        return np.load(path, mmap_mode='r')
+    
+    def entries(self) -> List[str]:
+        """List cached clip paths, least recently used first."""
+        paths = [os.path.join(self.cache_dir, name)
+                 for name in os.listdir(self.cache_dir)
+                 if name.startswith('base_clip_') and name.endswith('.npy')]
+        return sorted(paths, key=os.path.getmtime)
+    
+    def size_bytes(self) -> int:
+        """Get the total size of all cached clips."""
+        return sum(os.path.getsize(path) for path in self.entries())
+    
+    def evict(self, reserve: int = 0) -> None:
+        """Evict least recently used clips until the budget is met.
+        
+        Args:
+            reserve: Extra bytes to free up for an upcoming store
+        """
+        entries = self.entries()
+        total = sum(os.path.getsize(path) for path in entries)
+        
+        for path in entries:
+            if total + reserve <= self.max_bytes:
+                break
+            size = os.path.getsize(path)
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -2,7 +2,7 @@
 Configuration for video generation parameters.
 """
 from dataclasses import dataclass
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 
 @dataclass
@@ -15,18 +15,33 @@ class GenerationConfig:
     target_duration: int = 27  # seconds (middle of 24-30s range)
     base_clip_duration: int = 3  # seconds for initial generation
     
+    # Parallel execution
+    stage_threads: int = 1  # Threads for style, motion and overlay stages
+    concurrent_stages: bool = False  # Run each streaming stage on its own thread
+    stage_queue_size: int = 8  # Frames buffered between concurrent stages
+    render_processes: int = 1  # Worker processes for sharded rendering (1 = off)
+    render_chunk_size: int = 8  # Frames per chunk owned by a render process
+    
     # SDXL/AnimateDiff settings
     model_name: str = "stabilityai/stable-diffusion-xl-base-1.0"
     seed: int = 42  # Locked seed for consistency
     cfg_scale: float = 7.0  # Low CFG for creative variation
     num_inference_steps: int = 30
     
+    # Procedural base generation
+    fast_synthesis: bool = True  # Separable float32 pattern synthesis
+    base_clip_workers: int = 1  # Processes for base clip rendering (1 = serial)
+    base_clip_cache_dir: Optional[str] = None  # On-disk base clip cache (None = off)
+    base_clip_cache_max_bytes: int = 8 * 1024**3  # LRU size budget for the cache
+    
     # Motion settings
     motion_threshold_ms: int = 300  # Nothing static for >300ms
     micro_movement_amplitude: float = 2.0  # pixels
     micro_movement_frequency: float = 1.0  # Hz
     parallax_speed: float = 0.3  # pixels per frame
     
+    fused_motion: bool = False  # Compose all motion into one warp per frame
+    
     # Zoom settings
     micro_zoom_range: Tuple[float, float] = (1.0, 1.05)  # 0-5% zoom
     zoom_cycle_duration: int = 90  # frames
@@ -42,10 +57,29 @@ class GenerationConfig:
     accent_coverage: float = 0.12  # 12% of frame
     contrast_boost: float = 1.5
     saturation_boost: float = 1.4
+    color_lut_size: int = 33  # 3D LUT grid for the per-pixel color grade: 2-127 (0 = float path)
+    
+    # Encoding settings
+    export_backend: str = "opencv"  # "opencv" (mp4v) or "ffmpeg" (piped encoder)
+    video_codec: str = "libx264"  # ffmpeg encoder or alias such as "H.264"
+    encoder_preset: str = "medium"
+    crf: Optional[int] = None  # Constant quality (overrides bitrate target)
+    bitrate: Optional[str] = "8M"
+    pixel_format: str = "yuv420p"
+    writer_queue_size: int = 16  # Frames buffered ahead of the encoder thread
+    gop_size: Optional[int] = None  # Frames per GOP (None = 2 seconds)
+    encode_workers: int = 1  # Segments encoded in parallel (1 = single writer)
+    segment_gops: int = 5  # GOPs per parallel-encoded segment
+    progressive_format: Optional[str] = None  # "hls" or "fmp4": playable while rendering
+    progressive_segment_seconds: float = 2.0  # HLS segment / fMP4 fragment duration
+    clean_plate_crf: int = 12  # Quality of clean plates (pre-overlay exports) for re-renders
     
     # Overlay settings
     caption_font_size: int = 48
     caption_duration: float = 2.5  # seconds
+    caption_renderer: str = "hershey"  # "hershey" (cv2.putText) or "atlas" (glyph atlas)
+    caption_font_path: Optional[str] = None  # TrueType font for "atlas" (None = Pillow default)
+    caption_outline_width: int = 2  # Outline width in pixels for "atlas"
     
     # Progress bar settings (optimized for retention & engagement)
     progress_bar_height: int = 3  # pixels (2-3px slim design)
@@ -94,6 +128,11 @@ class GenerationConfig:
         """Calculate frames for base clip."""
         return self.base_clip_duration * self.fps
     
+    @property
+    def gop_frames(self) -> int:
+        """Calculate frames per GOP (keyframe interval)."""
+        return self.gop_size or self.fps * 2
+    
     @property
     def tiles_needed(self) -> int:
         """Calculate number of tiles needed."""
@@ -5,7 +5,181 @@ For demo: generates abstract procedural animations.
 """
 import numpy as np
 import cv2
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Support both package and standalone execution
+if __name__ == '__main__' or '.' not in __name__:
+    from cache import BaseClipCache
+    from rng import frame_rng
+else:
+    from .cache import BaseClipCache
+    from .rng import frame_rng
+
+
+class PatternSynthesizer:
+    """Fast synthesis of the procedural base patterns.
+    
+    Each wave layer has the form sin(a(x) + b(y)) + cos(c(x) - d(y)).
+    Expanding both terms with the angle-sum identities turns the layer
+    into a rank-4 outer product, so the trigonometry runs on 1-D row and
+    column vectors and the H×W combination is a single float32 matrix
+    product. The radial gradient only depends on the resolution and is
+    computed once.
+    """
+    
+    def __init__(self, width: int, height: int):
+        """Initialize synthesizer for a fixed resolution.
+        
+        Args:
+            width: Frame width in pixels
+            height: Frame height in pixels
+        """
+        self.width = width
+        self.height = height
+        self.x = np.arange(width, dtype=np.float64)
+        self.y = np.arange(height, dtype=np.float64)
+        
+        # Static radial falloff; only the pulse changes per frame
+        center_x, center_y = width // 2, height // 2
+        y, x = np.ogrid[:height, :width]
+        radius = np.sqrt((x - center_x)**2 + (y - center_y)**2)
+        max_radius = np.sqrt(center_x**2 + center_y**2)
+        self.radial = ((1 - radius / max_radius) * 255).astype(np.float32)
+    
+    def synthesize_layer(self, layer: int, phase: float) -> np.ndarray:
+        """Synthesize one wave layer.
+        
+        Args:
+            layer: Layer index (0-2)
+            phase: Animation phase in radians
+            
+        Returns:
+            Layer pattern (H, W) as uint8
+        """
+        freq = 0.01 * (layer + 1)
+        angle = phase * (layer + 1) * 0.5
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        
+        # sin(a + b) = sin(a)cos(b) + cos(a)sin(b)
+        a = freq * cos_a * self.x + phase
+        b = freq * sin_a * self.y
+        # cos(c - d) = cos(c)cos(d) + sin(c)sin(d)
+        c = freq * sin_a * self.x - phase * 0.7
+        d = freq * cos_a * self.y
+        
+        rows = np.stack([np.cos(b), np.sin(b), np.cos(d), np.sin(d)], axis=1)
+        cols = np.stack([np.sin(a), np.cos(a), np.cos(c), np.sin(c)])
+        
+        # Fold the 0-255 normalization into the column factors
+        pattern = rows.astype(np.float32) @ (cols * (255 / 4)).astype(np.float32)
+        pattern += 127.5
+        
+        return pattern.astype(np.uint8)
+    
+    def synthesize(self, frame_idx: int, total_frames: int) -> np.ndarray:
+        """Synthesize the noise-free pattern frame.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total frames in base clip
+            
+        Returns:
+            Pattern frame (H, W, C) in BGR
+        """
+        t = frame_idx / total_frames
+        phase = 2 * np.pi * t
+        
+        frame = cv2.merge([self.synthesize_layer(layer, phase)
+                           for layer in range(3)])
+        
+        # Pulsing gradient
+        pulse = 0.5 + 0.5 * np.sin(phase * 2)
+        gradient = (self.radial * np.float32(pulse)).astype(np.uint8)
+        
+        return cv2.addWeighted(frame, 0.7,
+                               cv2.cvtColor(gradient, cv2.COLOR_GRAY2BGR), 0.3, 0)
+
+
+class TiledTimeline:
+    """Lazy, index-mapped timeline of a tiled base clip.
+    
+    Behaves like a read-only list of full-duration frames. Each output
+    index resolves to a reference into the base clip, except for the
+    crossfade frames at tile boundaries, which are blended on demand.
+    Memory stays at roughly base-clip size regardless of duration.
+    Returned frames are shared and must not be modified in place.
+    """
+    
+    def __init__(self, base_frames: Sequence[np.ndarray], total_frames: int,
+                 crossfade_frames: int = 5, cache_crossfades: bool = True):
+        """Initialize tiled timeline.
+        
+        Args:
+            base_frames: Frames of the base clip
+            total_frames: Number of frames in the full timeline
+            crossfade_frames: Length of the crossfade at tile boundaries
+            cache_crossfades: Keep blended crossfade frames for reuse
+        """
+        self.base_frames = base_frames
+        self.total_frames = total_frames
+        self.crossfade_frames = crossfade_frames
+        self.cache_crossfades = cache_crossfades
+        self._crossfade_cache: Dict[int, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        return self.total_frames
+    
+    def resolve(self, idx: int) -> Tuple[int, Optional[int], float]:
+        """Map an output index to its source frames.
+        
+        Args:
+            idx: Output frame index (0 <= idx < len(self))
+            
+        Returns:
+            Tuple of (base_idx, prev_base_idx, alpha). prev_base_idx is
+            None unless the frame is a crossfade of
+            prev * (1 - alpha) + base * alpha.
+        """
+        num_base = len(self.base_frames)
+        tile_idx, i = divmod(idx, num_base)
+        
+        if tile_idx > 0 and i < self.crossfade_frames:
+            alpha = i / self.crossfade_frames
+            return i, (i - self.crossfade_frames) % num_base, alpha
+        
+        return i, None, 1.0
+    
+    def _crossfade(self, base_idx: int, prev_idx: int,
+                   alpha: float) -> np.ndarray:
+        """Blend a crossfade frame, using the cache when enabled."""
+        # The blend depends only on the position within the tile
+        frame = self._crossfade_cache.get(base_idx)
+        if frame is None:
+            frame = cv2.addWeighted(self.base_frames[prev_idx], 1 - alpha,
+                                    self.base_frames[base_idx], alpha, 0)
+            if self.cache_crossfades:
+                self._crossfade_cache[base_idx] = frame
+        return frame
+    
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("timeline index out of range")
+        
+        base_idx, prev_idx, alpha = self.resolve(idx)
+        if prev_idx is None:
+            return self.base_frames[base_idx]
+        return self._crossfade(base_idx, prev_idx, alpha)
+    
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for idx in range(len(self)):
+            yield self[idx]
 
 
 class VideoGenerator:
@@ -18,21 +192,48 @@ class VideoGenerator:
             config: GenerationConfig instance
         """
         self.config = config
-        np.random.seed(self.config.seed)
+        self._synthesizer = None
+        self._cache = None
         
-    def generate_abstract_frame(self, frame_idx: int, 
-                               total_frames: int) -> np.ndarray:
-        """Generate a single abstract frame.
+    def get_synthesizer(self) -> PatternSynthesizer:
+        """Get the fast pattern synthesizer for the current resolution.
         
-        This is a procedural generation placeholder.
-        In production, this would use SDXL + AnimateDiff.
+        Returns:
+            Cached PatternSynthesizer instance
+        """
+        w, h = self.config.output_resolution
+        if (self._synthesizer is None or 
+                (self._synthesizer.width, self._synthesizer.height) != (w, h)):
+            self._synthesizer = PatternSynthesizer(w, h)
+        return self._synthesizer
+    
+    def get_cache(self) -> Optional[BaseClipCache]:
+        """Get the on-disk base clip cache, if one is configured.
+        
+        Returns:
+            BaseClipCache instance, or None when caching is disabled
+        """
+        if not self.config.base_clip_cache_dir:
+            return None
+        if (self._cache is None or 
+                self._cache.cache_dir != self.config.base_clip_cache_dir):
+            self._cache = BaseClipCache(self.config.base_clip_cache_dir,
+                                        self.config.base_clip_cache_max_bytes)
+        self._cache.max_bytes = self.config.base_clip_cache_max_bytes
+        return self._cache
+    
+    def synthesize_reference_frame(self, frame_idx: int,
+                                   total_frames: int) -> np.ndarray:
+        """Synthesize the noise-free pattern frame with full-grid trig.
+        
+        Reference implementation of PatternSynthesizer.synthesize().
         
         Args:
             frame_idx: Current frame index
             total_frames: Total frames in base clip
             
         Returns:
-            Generated frame (H, W, C) in BGR
+            Pattern frame (H, W, C) in BGR
         """
         h, w = self.config.output_resolution[1], self.config.output_resolution[0]
         
@@ -86,73 +287,139 @@ class VideoGenerator:
         frame = cv2.addWeighted(frame, 0.7, 
                                cv2.cvtColor(gradient, cv2.COLOR_GRAY2BGR), 0.3, 0)
         
-        # Add some noise for texture
-        noise = np.random.randint(0, 30, (h, w, 3), dtype=np.uint8)
+        return frame
+    
+    def generate_abstract_frame(self, frame_idx: int, 
+                               total_frames: int) -> np.ndarray:
+        """Generate a single abstract frame.
+        
+        This is a procedural generation placeholder.
+        In production, this would use SDXL + AnimateDiff.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total frames in base clip
+            
+        Returns:
+            Generated frame (H, W, C) in BGR
+        """
+        h, w = self.config.output_resolution[1], self.config.output_resolution[0]
+        
+        if self.config.fast_synthesis:
+            frame = self.get_synthesizer().synthesize(frame_idx, total_frames)
+        else:
+            frame = self.synthesize_reference_frame(frame_idx, total_frames)
+        
+        # Add some noise for texture (keyed by frame, not draw order)
+        rng = frame_rng(self.config.seed, "noise", frame_idx)
+        noise = rng.integers(0, 30, (h, w, 3), dtype=np.uint8)
         frame = cv2.add(frame, noise)
         
         return frame
     
-    def generate_base_clip(self) -> List[np.ndarray]:
+    def generate_base_clip(self, workers: Optional[int] = None) -> List[np.ndarray]:
         """Generate base 3-second clip.
         
+        Args:
+            workers: Number of worker processes (defaults to
+                config.base_clip_workers; 1 renders serially)
+            
         Returns:
             List of frames for base clip
         """
+        cache = self.get_cache()
+        if cache is not None:
+            key = BaseClipCache.key_for(self.config)
+            clip = cache.load(key)
+            if clip is not None:
+                print(f"Loaded {self.config.base_clip_duration}s base clip from cache")
+                return list(clip)
+        
         print(f"Generating {self.config.base_clip_duration}s base clip...")
         
-        frames = []
-        total_frames = self.config.base_frames
+        if workers is None:
+            workers = self.config.base_clip_workers
         
-        for i in range(total_frames):
-            frame = self.generate_abstract_frame(i, total_frames)
-            frames.append(frame)
+        if workers > 1:
+            frames = self._generate_base_clip_parallel(workers)
+        else:
+            frames = []
+            total_frames = self.config.base_frames
             
-            if (i + 1) % 30 == 0:
-                print(f"  Generated {i + 1}/{total_frames} frames")
+            for i in range(total_frames):
+                frame = self.generate_abstract_frame(i, total_frames)
+                frames.append(frame)
+                
+                if (i + 1) % 30 == 0:
+                    print(f"  Generated {i + 1}/{total_frames} frames")
+        
+        if cache is not None:
+            # Hand back disk-backed views so the generated copies can be freed
+            frames = list(cache.store(key, frames))
         
         print(f"Base clip generation complete: {len(frames)} frames")
         return frames
     
-    def tile_clip(self, base_frames: List[np.ndarray]) -> List[np.ndarray]:
-        """Tile base clip to target duration with crossfades.
+    def _generate_base_clip_parallel(self, workers: int) -> List[np.ndarray]:
+        """Render base clip frames across a process pool.
+        
+        Workers write frames straight into one shared-memory block, so no
+        frame is pickled; frames are identical to a serial run because
+        all per-frame randomness is keyed by frame index.
         
         Args:
-            base_frames: List of frames from base clip
+            workers: Number of worker processes
             
         Returns:
-            List of frames for full duration
+            List of frames for base clip
         """
-        print(f"Tiling clip to {self.config.target_duration}s...")
-        
-        tiles_needed = self.config.tiles_needed
-        crossfade_frames = 5  # Smooth transitions
+        total_frames = self.config.base_frames
+        w, h = self.config.output_resolution
+        shape = (total_frames, h, w, 3)
         
-        result_frames = []
+        # Several small chunks per worker keep the pool balanced
+        chunk_size = max(1, total_frames // (workers * 4))
+        chunks = [range(start, min(start + chunk_size, total_frames))
+                  for start in range(0, total_frames, chunk_size)]
         
-        for tile_idx in range(tiles_needed):
-            # Stop if we have enough frames
-            if len(result_frames) >= self.config.total_frames:
-                break
-            
-            # Add frames from this tile
-            for i, frame in enumerate(base_frames):
-                if len(result_frames) >= self.config.total_frames:
-                    break
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_frames_to_shared_memory,
+                                       self.config, shm.name, shape, chunk)
+                           for chunk in chunks]
                 
-                # Apply crossfade at tile boundaries
-                if tile_idx > 0 and i < crossfade_frames:
-                    # Crossfade with previous tile
-                    alpha = i / crossfade_frames
-                    prev_frame_idx = (i - crossfade_frames) % len(base_frames)
-                    prev_frame = base_frames[prev_frame_idx]
+                done = 0
+                for future in as_completed(futures):
+                    rendered = future.result()
+                    done += rendered
                     
-                    frame = cv2.addWeighted(prev_frame, 1 - alpha, 
-                                          frame, alpha, 0)
-                
-                result_frames.append(frame.copy())
+                    if done // 30 > (done - rendered) // 30:
+                        print(f"  Generated {done}/{total_frames} frames")
+            
+            clip = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
         
-        print(f"Tiling complete: {len(result_frames)} frames")
-        return result_frames
+        return list(clip)
+    
+    def tile_clip(self, base_frames: List[np.ndarray]) -> TiledTimeline:
+        """Tile base clip to target duration with crossfades.
+        
+        Args:
+            base_frames: List of frames from base clip
+            
+        Returns:
+            Lazy TiledTimeline covering the full duration
+        """
+        print(f"Tiling clip to {self.config.target_duration}s...")
+        
+        timeline = TiledTimeline(base_frames, self.config.total_frames)
+        
+        print(f"Tiling complete: {len(timeline)} frames "
+              f"({self.config.tiles_needed} tiles of {len(base_frames)})")
+        return timeline
     
     # SDXL + AnimateDiff integration placeholder
     # In production, uncomment and implement:
@@ -191,3 +458,28 @@ class VideoGenerator:
         
         return frames
     """
+
+
+def _render_frames_to_shared_memory(config, shm_name: str, shape: Tuple[int, ...],
+                                    indices: Sequence[int]) -> int:
+    """Process-pool worker: render base frames into shared memory.
+    
+    Args:
+        config: GenerationConfig instance
+        shm_name: Name of the shared-memory block holding the clip
+        shape: Clip array shape (frames, H, W, C)
+        indices: Frame indices to render
+        
+    Returns:
+        Number of frames rendered
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        clip = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        generator = VideoGenerator(config)
+        for i in indices:
+            clip[i] = generator.generate_abstract_frame(i, shape[0])
+        del clip
+    finally:
+        shm.close()
+    return len(indices)
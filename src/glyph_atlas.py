@@ -0,0 +1,251 @@
+"""
+Glyph atlas text renderer for high-volume captions.
+"""
+import string
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+# Glyphs packed into the atlas up front; anything else is added on first use
+ATLAS_CHARSET = string.ascii_letters + string.digits + string.punctuation
+
+
+def load_font(font_path: Optional[str], size: int):
+    """Load a TrueType font, or Pillow's built-in scalable font.
+    
+    Args:
+        font_path: Path to a .ttf/.otf file (None = Pillow default font)
+        size: Font size in pixels
+    
+    Returns:
+        PIL ImageFont instance
+    """
+    if font_path:
+        return ImageFont.truetype(font_path, size)
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1: fixed-size bitmap font only
+        return ImageFont.load_default()
+
+
+@dataclass
+class Glyph:
+    """One rasterized glyph.
+    
+    Masks are views into the atlas texture (or standalone arrays for
+    glyphs added after the atlas was built).
+    """
+    
+    fill: np.ndarray  # (h, w) uint8 coverage of the glyph body
+    stroke: np.ndarray  # (h, w) uint8 coverage of body plus outline
+    left: int  # Bitmap offset from the pen position
+    top: int  # Bitmap offset from the baseline (negative = above)
+    advance: float  # Pen advance in pixels
+
+
+class GlyphAtlas:
+    """Glyphs of one (font, size, outline) rasterized once.
+    
+    Fill and outline masks of ATLAS_CHARSET are shelf-packed into a
+    single (H, W, 2) texture; other characters are rasterized on first
+    use. Text is then composed from glyph slices, so rendering cost
+    depends on text length only, never on how many distinct strings
+    a video has.
+    """
+    
+    def __init__(self, font_path: Optional[str] = None, size: int = 48,
+                 outline: int = 2, atlas_width: int = 1024):
+        """Rasterize the atlas.
+        
+        Args:
+            font_path: Path to a TrueType font (None = Pillow default font)
+            size: Font size in pixels
+            outline: Outline width in pixels (0 = no outline)
+            atlas_width: Width of the packed texture
+        """
+        self.font = load_font(font_path, size)
+        self.outline = outline
+        self.glyphs: Dict[str, Glyph] = {}
+        self._lock = threading.Lock()
+        
+        ascent, descent = self.font.getmetrics()
+        self.line_height = ascent + descent + 2 * outline
+        
+        # Shelf packing, tallest glyphs first
+        bitmaps = [(ch,) + self._rasterize(ch) for ch in ATLAS_CHARSET]
+        bitmaps.sort(key=lambda b: b[1].shape[0], reverse=True)
+        placements = []
+        x = y = shelf = 0
+        for ch, fill, stroke, left, top, advance in bitmaps:
+            h, w = fill.shape
+            if x + w > atlas_width:
+                x, y, shelf = 0, y + shelf, 0
+            placements.append((ch, x, y, h, w, left, top, advance, fill, stroke))
+            x += w
+            shelf = max(shelf, h)
+        
+        self.texture = np.zeros((y + shelf, atlas_width, 2), dtype=np.uint8)
+        for ch, x, y, h, w, left, top, advance, fill, stroke in placements:
+            self.texture[y:y + h, x:x + w, 0] = fill
+            self.texture[y:y + h, x:x + w, 1] = stroke
+            self.glyphs[ch] = Glyph(self.texture[y:y + h, x:x + w, 0],
+                                    self.texture[y:y + h, x:x + w, 1],
+                                    left, top, advance)
+    
+    def _rasterize(self, ch: str) -> Tuple[np.ndarray, np.ndarray, int, int, float]:
+        """Rasterize one character relative to its pen position on the baseline."""
+        left, top, right, bottom = self.font.getbbox(ch, anchor='ls',
+                                                     stroke_width=self.outline)
+        size = (max(right - left, 0), max(bottom - top, 0))
+        advance = float(self.font.getlength(ch))
+        if size[0] == 0 or size[1] == 0:
+            empty = np.zeros((0, 0), dtype=np.uint8)
+            return empty, empty, 0, 0, advance
+        
+        planes = []
+        for stroke_width in (0, self.outline):
+            image = Image.new('L', size, 0)
+            ImageDraw.Draw(image).text((-left, -top), ch, fill=255, font=self.font,
+                                       anchor='ls', stroke_width=stroke_width,
+                                       stroke_fill=255)
+            planes.append(np.asarray(image))
+        return planes[0], planes[1], left, top, advance
+    
+    def glyph(self, ch: str) -> Glyph:
+        """Get a glyph, rasterizing characters outside the atlas on first use.
+        
+        Args:
+            ch: Single character
+        
+        Returns:
+            Glyph instance
+        """
+        glyph = self.glyphs.get(ch)
+        if glyph is None:
+            with self._lock:
+                glyph = self.glyphs.get(ch)
+                if glyph is None:
+                    glyph = Glyph(*self._rasterize(ch))
+                    self.glyphs[ch] = glyph
+        return glyph
+    
+    def text_width(self, text: str) -> float:
+        """Width of a single line of text in pixels."""
+        return sum(self.glyph(ch).advance for ch in text)
+
+
+class AtlasTextRenderer:
+    """Lays out and composes captions from a GlyphAtlas.
+    
+    Composed captions (layout, wrapping and pixels) are kept in a small
+    LRU cache, since each caption is shown for many consecutive frames.
+    """
+    
+    def __init__(self, atlas: GlyphAtlas, cache_size: int = 256):
+        """Initialize renderer.
+        
+        Args:
+            atlas: Glyph atlas to compose from
+            cache_size: Number of composed captions to keep
+        """
+        self.atlas = atlas
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[tuple, Tuple[np.ndarray, Tuple[int, int]]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def wrap(self, text: str, max_width: int) -> List[str]:
+        """Break text into lines no wider than max_width where possible.
+        
+        Words longer than max_width get a line of their own.
+        
+        Args:
+            text: Caption text
+            max_width: Maximum line width in pixels
+        
+        Returns:
+            List of lines
+        """
+        lines = []
+        for paragraph in text.split('\n'):
+            line = ''
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if line and self.atlas.text_width(candidate) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+    
+    def _compose(self, text: str, max_width: int) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Compose outlined white text into a premultiplied BGRA sprite."""
+        atlas = self.atlas
+        
+        # Layout: lines centered on x = 0, first baseline at y = 0
+        placements = []
+        for row, line in enumerate(self.wrap(text, max_width)):
+            pen = -atlas.text_width(line) / 2
+            baseline = row * atlas.line_height
+            for ch in line:
+                glyph = atlas.glyph(ch)
+                if glyph.fill.size:
+                    placements.append((int(round(pen)) + glyph.left,
+                                       baseline + glyph.top, glyph))
+                pen += glyph.advance
+        
+        if not placements:
+            return np.zeros((0, 0, 4), dtype=np.float32), (0, 0)
+        
+        x0 = min(x for x, _, _ in placements)
+        y0 = min(y for _, y, _ in placements)
+        x1 = max(x + g.fill.shape[1] for x, _, g in placements)
+        y1 = max(y + g.fill.shape[0] for _, y, g in placements)
+        fill = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        stroke = np.zeros_like(fill)
+        
+        # Outlines and bodies are merged separately, so an outline never
+        # covers the neighbouring glyph's body
+        for x, y, glyph in placements:
+            h, w = glyph.fill.shape
+            region = (slice(y - y0, y - y0 + h), slice(x - x0, x - x0 + w))
+            np.maximum(fill[region], glyph.fill, out=fill[region])
+            np.maximum(stroke[region], glyph.stroke, out=stroke[region])
+        
+        fill_a = fill.astype(np.float32) / 255.0
+        stroke_a = stroke.astype(np.float32) / 255.0
+        bgra = np.empty(fill.shape + (4,), dtype=np.float32)
+        bgra[..., :3] = (fill_a * 255.0)[..., None]  # White body over black outline
+        bgra[..., 3] = fill_a + stroke_a * (1.0 - fill_a)
+        return bgra, (x0, y0)
+    
+    def render(self, text: str, max_width: int) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Get the composed sprite of a caption.
+        
+        Args:
+            text: Caption text
+            max_width: Maximum line width in pixels
+        
+        Returns:
+            (bgra, offset): premultiplied float32 BGRA sprite and its
+            top-left corner relative to the anchor (horizontal center of
+            the text, baseline of the first line)
+        """
+        key = (text, max_width)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+        
+        sprite = self._compose(text, max_width)
+        with self._lock:
+            self._cache[key] = sprite
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return sprite
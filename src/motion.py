@@ -1,11 +1,16 @@
 """
 Motion effects for constant movement and pattern breaks.
 """
+import json
 import numpy as np
-from typing import Tuple, List
+from typing import Dict, Tuple, List, Optional
 import cv2
 
 
+# Pattern break codes used in MotionSchedule.break_code
+BREAK_TYPES = (None, "minor", "major")
+
+
 class MotionEffects:
     """Applies constant motion and pattern break effects."""
     
@@ -18,18 +23,15 @@ class MotionEffects:
         self.config = config
         self.frame_count = 0
         
-    def apply_micro_movement(self, frame: np.ndarray, frame_idx: int) -> np.ndarray:
-        """Apply subtle micro-movements to prevent static appearance.
+    def micro_movement_offset(self, frame_idx: int) -> Tuple[float, float]:
+        """Calculate the micro-movement offset for a frame.
         
         Args:
-            frame: Input frame (H, W, C)
             frame_idx: Current frame index
             
         Returns:
-            Frame with micro-movements applied
+            Tuple of (dx, dy) in pixels
         """
-        h, w = frame.shape[:2]
-        
         # Calculate oscillating offset
         t = frame_idx / self.config.fps
         freq = self.config.micro_movement_frequency
@@ -39,6 +41,74 @@ class MotionEffects:
         dx = amp * np.sin(2 * np.pi * freq * t)
         dy = amp * np.cos(2 * np.pi * freq * t * 0.7)  # Different phase
         
+        return dx, dy
+    
+    def parallax_drift(self, frame_idx: int, width: int) -> float:
+        """Calculate the horizontal parallax drift for a frame.
+        
+        Args:
+            frame_idx: Current frame index
+            width: Frame width in pixels
+            
+        Returns:
+            Drift in pixels
+        """
+        # Slow horizontal drift
+        return (frame_idx * self.config.parallax_speed) % (width * 0.1)
+    
+    def micro_zoom_factor(self, frame_idx: int, total_frames: int) -> float:
+        """Calculate the micro-zoom factor for a frame.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            
+        Returns:
+            Zoom factor (1.0 = no zoom)
+        """
+        # Progressive zoom from 1.0 to 1.05
+        min_zoom, max_zoom = self.config.micro_zoom_range
+        progress = frame_idx / total_frames
+        zoom = min_zoom + (max_zoom - min_zoom) * progress
+        
+        # Add subtle oscillation
+        cycle_t = (frame_idx % self.config.zoom_cycle_duration) / self.config.zoom_cycle_duration
+        oscillation = 0.002 * np.sin(2 * np.pi * cycle_t)
+        
+        return zoom + oscillation
+    
+    def pattern_break_transform(self, break_type: str,
+                                break_progress: float) -> Tuple[float, float]:
+        """Calculate the rotation and scale of a pattern break.
+        
+        Args:
+            break_type: Type of break ("minor" or "major")
+            break_progress: Progress through break (0.0 to 1.0)
+            
+        Returns:
+            Tuple of (angle in degrees, scale)
+        """
+        if break_type == "minor":
+            # Small rotation twirl
+            return 45 * np.sin(break_progress * np.pi), 1.0
+        if break_type == "major":
+            # Zoom pop
+            return 0.0, 1.0 + 0.2 * np.sin(break_progress * np.pi)
+        return 0.0, 1.0
+    
+    def apply_micro_movement(self, frame: np.ndarray, frame_idx: int) -> np.ndarray:
+        """Apply subtle micro-movements to prevent static appearance.
+        
+        Args:
+            frame: Input frame (H, W, C)
+            frame_idx: Current frame index
+            
+        Returns:
+            Frame with micro-movements applied
+        """
+        h, w = frame.shape[:2]
+        dx, dy = self.micro_movement_offset(frame_idx)
+        
         # Create transformation matrix
         M = np.float32([[1, 0, dx], [0, 1, dy]])
         
@@ -59,9 +129,7 @@ class MotionEffects:
             Frame with parallax applied
         """
         h, w = frame.shape[:2]
-        
-        # Slow horizontal drift
-        drift = (frame_idx * self.config.parallax_speed) % (w * 0.1)
+        drift = self.parallax_drift(frame_idx, w)
         
         M = np.float32([[1, 0, drift], [0, 1, 0]])
         result = cv2.warpAffine(frame, M, (w, h), 
@@ -82,16 +150,7 @@ class MotionEffects:
             Frame with zoom applied
         """
         h, w = frame.shape[:2]
-        
-        # Progressive zoom from 1.0 to 1.05
-        min_zoom, max_zoom = self.config.micro_zoom_range
-        progress = frame_idx / total_frames
-        zoom = min_zoom + (max_zoom - min_zoom) * progress
-        
-        # Add subtle oscillation
-        cycle_t = (frame_idx % self.config.zoom_cycle_duration) / self.config.zoom_cycle_duration
-        oscillation = 0.002 * np.sin(2 * np.pi * cycle_t)
-        zoom += oscillation
+        zoom = self.micro_zoom_factor(frame_idx, total_frames)
         
         # Calculate zoom matrix
         center_x, center_y = w / 2, h / 2
@@ -137,17 +196,9 @@ class MotionEffects:
         h, w = frame.shape[:2]
         center_x, center_y = w / 2, h / 2
         
-        if break_type == "minor":
-            # Small rotation twirl
-            angle = 45 * np.sin(break_progress * np.pi)
-            M = cv2.getRotationMatrix2D((center_x, center_y), angle, 1.0)
-            result = cv2.warpAffine(frame, M, (w, h), 
-                                   borderMode=cv2.BORDER_REFLECT)
-            
-        elif break_type == "major":
-            # Zoom pop
-            scale = 1.0 + 0.2 * np.sin(break_progress * np.pi)
-            M = cv2.getRotationMatrix2D((center_x, center_y), 0, scale)
+        if break_type in ("minor", "major"):
+            angle, scale = self.pattern_break_transform(break_type, break_progress)
+            M = cv2.getRotationMatrix2D((center_x, center_y), angle, scale)
             result = cv2.warpAffine(frame, M, (w, h), 
                                    borderMode=cv2.BORDER_REFLECT)
         else:
@@ -155,6 +206,107 @@ class MotionEffects:
         
         return result
     
+    def compose_motion_matrix(self, frame_idx: int, total_frames: int,
+                              width: int, height: int,
+                              break_type: Optional[str] = None,
+                              break_progress: float = 0.0) -> Tuple[np.ndarray, int]:
+        """Compose all per-frame motion into a single affine transform.
+        
+        The transforms are chained in the same order as the sequential
+        effects: micro-movement, parallax drift, micro-zoom, pattern break.
+        
+        Border policy: parallax is the only wrapping transform and it is a
+        pure horizontal translation, so its whole-pixel part is split off
+        and returned as an exact circular shift of the source. Everything
+        else (micro-movement, sub-pixel drift, zoom, break rotation/scale)
+        goes into the matrix and is resampled once with BORDER_REFLECT.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            width: Frame width in pixels
+            height: Frame height in pixels
+            break_type: Active pattern break ("minor", "major" or None)
+            break_progress: Progress through break (0.0 to 1.0)
+            
+        Returns:
+            Tuple of (2x3 float64 matrix, horizontal wrap shift in pixels)
+        """
+        center = (width / 2, height / 2)
+        dx, dy = self.micro_movement_offset(frame_idx)
+        drift = self.parallax_drift(frame_idx, width)
+        wrap_shift = int(np.floor(drift))
+        zoom = self.micro_zoom_factor(frame_idx, total_frames)
+        angle, scale = self.pattern_break_transform(break_type, break_progress)
+        
+        def homogeneous(M):
+            return np.vstack([M, [0.0, 0.0, 1.0]])
+        
+        # Translations commute, so the sub-pixel drift joins micro-movement
+        translate = np.array([[1.0, 0.0, dx + drift - wrap_shift],
+                              [0.0, 1.0, dy],
+                              [0.0, 0.0, 1.0]])
+        zoom_m = homogeneous(cv2.getRotationMatrix2D(center, 0, zoom))
+        break_m = homogeneous(cv2.getRotationMatrix2D(center, angle, scale))
+        
+        M = break_m @ zoom_m @ translate
+        return M[:2], wrap_shift
+    
+    def apply_fused_motion(self, frame: np.ndarray, frame_idx: int,
+                           total_frames: int, break_type: Optional[str] = None,
+                           break_progress: float = 0.0) -> np.ndarray:
+        """Apply all motion effects with a single resampling pass.
+        
+        Args:
+            frame: Input frame (H, W, C)
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            break_type: Active pattern break ("minor", "major" or None)
+            break_progress: Progress through break (0.0 to 1.0)
+            
+        Returns:
+            Frame with all motion applied
+        """
+        h, w = frame.shape[:2]
+        M, wrap_shift = self.compose_motion_matrix(
+            frame_idx, total_frames, w, h, break_type, break_progress
+        )
+        
+        if wrap_shift:
+            frame = np.roll(frame, wrap_shift, axis=1)
+        
+        return cv2.warpAffine(frame, M, (w, h), borderMode=cv2.BORDER_REFLECT)
+    
+    def apply_motion(self, frame: np.ndarray, frame_idx: int,
+                     total_frames: int, break_type: Optional[str] = None,
+                     break_progress: float = 0.0) -> np.ndarray:
+        """Apply all motion effects for one frame.
+        
+        Uses the fused single-warp path when config.fused_motion is set,
+        otherwise chains the individual effects.
+        
+        Args:
+            frame: Input frame (H, W, C)
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            break_type: Active pattern break ("minor", "major" or None)
+            break_progress: Progress through break (0.0 to 1.0)
+            
+        Returns:
+            Frame with all motion applied
+        """
+        if self.config.fused_motion:
+            return self.apply_fused_motion(frame, frame_idx, total_frames,
+                                           break_type, break_progress)
+        
+        frame = self.apply_micro_movement(frame, frame_idx)
+        frame = self.apply_parallax(frame, frame_idx)
+        frame = self.apply_micro_zoom(frame, frame_idx, total_frames)
+        if break_type is not None:
+            frame = self.apply_pattern_break(frame, frame_idx,
+                                             break_type, break_progress)
+        return frame
+    
     def apply_speed_pulse(self, frame_rate: float, frame_idx: int) -> float:
         """Calculate speed multiplier for current frame.
         
@@ -170,3 +322,246 @@ class MotionEffects:
             return 1.4
         
         return 1.0
+    
+    def build_schedule(self, total_frames: int, width: Optional[int] = None,
+                       height: Optional[int] = None) -> 'MotionSchedule':
+        """Precompute the motion schedule for a whole timeline.
+        
+        Args:
+            total_frames: Total number of frames
+            width: Frame width (defaults to config.output_resolution)
+            height: Frame height (defaults to config.output_resolution)
+            
+        Returns:
+            MotionSchedule for frames 0..total_frames-1
+        """
+        return MotionSchedule.build(self.config, total_frames, width, height)
+    
+    def apply_scheduled(self, frame: np.ndarray, schedule: 'MotionSchedule',
+                        frame_idx: int) -> np.ndarray:
+        """Apply motion for one frame using a precomputed schedule.
+        
+        Args:
+            frame: Input frame (H, W, C)
+            schedule: MotionSchedule covering frame_idx
+            frame_idx: Current frame index
+            
+        Returns:
+            Frame with all motion applied
+        """
+        if self.config.fused_motion:
+            h, w = frame.shape[:2]
+            M, wrap_shift = schedule.matrix_at(frame_idx)
+            if wrap_shift:
+                frame = np.roll(frame, wrap_shift, axis=1)
+            return cv2.warpAffine(frame, M, (w, h), borderMode=cv2.BORDER_REFLECT)
+        
+        break_type, break_progress = schedule.break_at(frame_idx)
+        return self.apply_motion(frame, frame_idx, schedule.total_frames,
+                                 break_type, break_progress)
+
+
+class MotionSchedule:
+    """Precomputed per-frame motion for a whole timeline.
+    
+    All parameters are computed with NumPy over every frame index at
+    once, including the pattern-break state machine, so any frame's
+    motion is an O(1) lookup. Fused transform matrices follow the same
+    composition and border policy as
+    MotionEffects.compose_motion_matrix().
+    """
+    
+    ARRAY_FIELDS = ('dx', 'dy', 'drift', 'zoom', 'break_code',
+                    'break_progress', 'matrices', 'wrap_shift')
+    
+    def __init__(self, total_frames: int, width: int, height: int,
+                 arrays: Dict[str, np.ndarray]):
+        """Initialize motion schedule.
+        
+        Args:
+            total_frames: Number of frames covered
+            width: Frame width in pixels
+            height: Frame height in pixels
+            arrays: Per-frame arrays keyed by ARRAY_FIELDS
+        """
+        self.total_frames = total_frames
+        self.width = width
+        self.height = height
+        self.dx = np.asarray(arrays['dx'], dtype=np.float64)
+        self.dy = np.asarray(arrays['dy'], dtype=np.float64)
+        self.drift = np.asarray(arrays['drift'], dtype=np.float64)
+        self.zoom = np.asarray(arrays['zoom'], dtype=np.float64)
+        self.break_code = np.asarray(arrays['break_code'], dtype=np.int8)
+        self.break_progress = np.asarray(arrays['break_progress'], dtype=np.float64)
+        self.matrices = np.asarray(arrays['matrices'], dtype=np.float64).reshape(-1, 2, 3)
+        self.wrap_shift = np.asarray(arrays['wrap_shift'], dtype=np.int32)
+    
+    @classmethod
+    def build(cls, config, total_frames: int, width: Optional[int] = None,
+              height: Optional[int] = None) -> 'MotionSchedule':
+        """Build the schedule from configuration.
+        
+        Args:
+            config: GenerationConfig instance
+            total_frames: Total number of frames
+            width: Frame width (defaults to config.output_resolution)
+            height: Frame height (defaults to config.output_resolution)
+            
+        Returns:
+            MotionSchedule instance
+        """
+        if width is None or height is None:
+            width, height = config.output_resolution
+        idx = np.arange(total_frames)
+        
+        # Micro-movement
+        t = idx / config.fps
+        freq = config.micro_movement_frequency
+        amp = config.micro_movement_amplitude
+        dx = amp * np.sin(2 * np.pi * freq * t)
+        dy = amp * np.cos(2 * np.pi * freq * t * 0.7)
+        
+        # Parallax drift; whole pixels are applied as a wrap shift
+        drift = (idx * config.parallax_speed) % (width * 0.1)
+        wrap_shift = np.floor(drift).astype(np.int32)
+        
+        # Micro-zoom with oscillation
+        min_zoom, max_zoom = config.micro_zoom_range
+        cycle = config.zoom_cycle_duration
+        zoom = (min_zoom + (max_zoom - min_zoom) * (idx / total_frames) +
+                0.002 * np.sin(2 * np.pi * ((idx % cycle) / cycle)))
+        
+        # Pattern breaks: each trigger starts a break that lasts
+        # break_duration frames or until the next trigger
+        is_major = (idx % config.major_break_interval == 0) & (idx > 0)
+        is_minor = (idx % config.minor_break_interval == 0) & (idx > 0)
+        starts = np.where(is_major | is_minor, idx, -1)
+        last_start = np.maximum.accumulate(starts) if total_frames else starts
+        frames_into = idx - last_start
+        active = (last_start >= 0) & (frames_into < config.break_duration)
+        start_is_major = is_major[np.maximum(last_start, 0)]
+        break_code = np.where(active, np.where(start_is_major, 2, 1), 0).astype(np.int8)
+        break_progress = np.where(active, frames_into / config.break_duration, 0.0)
+        
+        angle = np.where(break_code == 1, 45 * np.sin(break_progress * np.pi), 0.0)
+        scale = np.where(break_code == 2, 1.0 + 0.2 * np.sin(break_progress * np.pi), 1.0)
+        
+        center_x, center_y = width / 2, height / 2
+        translate = cls._affine_stack(np.ones_like(dx), np.zeros_like(dx),
+                                      dx + drift - wrap_shift, dy)
+        zoom_m = cls._rotation_stack(center_x, center_y, np.zeros_like(zoom), zoom)
+        break_m = cls._rotation_stack(center_x, center_y, angle, scale)
+        matrices = (break_m @ zoom_m @ translate)[:, :2, :]
+        
+        return cls(total_frames, width, height, {
+            'dx': dx, 'dy': dy, 'drift': drift, 'zoom': zoom,
+            'break_code': break_code, 'break_progress': break_progress,
+            'matrices': matrices, 'wrap_shift': wrap_shift,
+        })
+    
+    @staticmethod
+    def _affine_stack(a: np.ndarray, b: np.ndarray, tx: np.ndarray,
+                      ty: np.ndarray) -> np.ndarray:
+        """Stack [[a, b, tx], [-b, a, ty], [0, 0, 1]] matrices."""
+        M = np.zeros((len(a), 3, 3))
+        M[:, 0, 0] = a
+        M[:, 0, 1] = b
+        M[:, 0, 2] = tx
+        M[:, 1, 0] = -b
+        M[:, 1, 1] = a
+        M[:, 1, 2] = ty
+        M[:, 2, 2] = 1.0
+        return M
+    
+    @classmethod
+    def _rotation_stack(cls, center_x: float, center_y: float,
+                        angle: np.ndarray, scale: np.ndarray) -> np.ndarray:
+        """Vectorized cv2.getRotationMatrix2D in homogeneous form."""
+        rad = np.deg2rad(angle)
+        a = scale * np.cos(rad)
+        b = scale * np.sin(rad)
+        return cls._affine_stack(a, b,
+                                 (1 - a) * center_x - b * center_y,
+                                 b * center_x + (1 - a) * center_y)
+    
+    def __len__(self) -> int:
+        return self.total_frames
+    
+    def break_at(self, frame_idx: int) -> Tuple[Optional[str], float]:
+        """Look up the pattern break state of a frame.
+        
+        Args:
+            frame_idx: Frame index
+            
+        Returns:
+            Tuple of (break_type or None, break_progress)
+        """
+        return (BREAK_TYPES[self.break_code[frame_idx]],
+                float(self.break_progress[frame_idx]))
+    
+    def matrix_at(self, frame_idx: int) -> Tuple[np.ndarray, int]:
+        """Look up the fused transform of a frame.
+        
+        Args:
+            frame_idx: Frame index
+            
+        Returns:
+            Tuple of (2x3 float64 matrix, horizontal wrap shift in pixels)
+        """
+        return self.matrices[frame_idx], int(self.wrap_shift[frame_idx])
+    
+    def break_starts(self) -> List[Tuple[int, str]]:
+        """List the frames where a pattern break starts.
+        
+        Returns:
+            List of (frame_idx, break_type) tuples
+        """
+        code = self.break_code
+        starts = np.flatnonzero((code > 0) & (self.break_progress == 0))
+        return [(int(i), BREAK_TYPES[code[i]]) for i in starts]
+    
+    def to_dict(self) -> Dict:
+        """Convert schedule to a JSON-serializable dictionary."""
+        data = {
+            'total_frames': self.total_frames,
+            'width': self.width,
+            'height': self.height,
+        }
+        for name in self.ARRAY_FIELDS:
+            data[name] = getattr(self, name).tolist()
+        return data
+    
+    def save(self, path: str) -> None:
+        """Save schedule as .npz (by extension) or JSON.
+        
+        Args:
+            path: Output file path
+        """
+        if path.endswith('.npz'):
+            np.savez(path, total_frames=self.total_frames, width=self.width,
+                     height=self.height,
+                     **{name: getattr(self, name) for name in self.ARRAY_FIELDS})
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f)
+    
+    @classmethod
+    def load(cls, path: str) -> 'MotionSchedule':
+        """Load a schedule saved with save().
+        
+        Args:
+            path: .npz or JSON file path
+            
+        Returns:
+            MotionSchedule instance
+        """
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in cls.ARRAY_FIELDS}
+                return cls(int(data['total_frames']), int(data['width']),
+                           int(data['height']), arrays)
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['total_frames'], data['width'], data['height'],
+                   {name: data[name] for name in cls.ARRAY_FIELDS})
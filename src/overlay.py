@@ -1,9 +1,419 @@
 """
 Overlay system for captions and progress bar.
+
+Overlays are layers in a dirty-rectangle compositor: each layer places
+premultiplied BGRA patches on the frame, and only the rectangles they
+cover are blended.
 """
+import bisect
+import dataclasses
+import os
+import threading
 import numpy as np
 import cv2
-from typing import List, Tuple
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Support both package and standalone execution
+if __name__ == '__main__' or '.' not in __name__:
+    # Running as standalone script
+    from glyph_atlas import AtlasTextRenderer, GlyphAtlas
+else:
+    # Running as part of package
+    from .glyph_atlas import AtlasTextRenderer, GlyphAtlas
+
+
+@dataclass
+class CaptionSprite:
+    """Pre-rasterized caption with premultiplied alpha.
+    
+    Compositing over a background is out = bg * (1 - alpha) + color,
+    where color is already multiplied by alpha.
+    """
+    
+    bgra: np.ndarray  # (h, w, 4) float32: premultiplied BGR, alpha in [0, 1]
+    offset: Tuple[int, int]  # Top-left corner relative to the text origin
+
+
+@dataclass
+class ProgressBarStrips:
+    """Precomputed premultiplied BGRA strips for the progress bar.
+    
+    Strips span the full frame width and rows y0..y1, which cover the
+    shadow, the track and the marker glow.
+    """
+    
+    y0: int
+    y1: int
+    static: np.ndarray  # Shadow + background track
+    filled: np.ndarray  # Static strip with the fill composited on top
+    marker: np.ndarray  # Glow + marker dot patch, centered on the marker
+    bar_x: int
+    bar_width: int
+    marker_y: int  # Marker center row, relative to y0
+
+
+def composite_over(under: np.ndarray, over: np.ndarray) -> np.ndarray:
+    """Composite two premultiplied BGRA layers (Porter-Duff over).
+    
+    Args:
+        under: Bottom layer (..., 4) float32
+        over: Top layer (..., 4) float32, same shape
+        
+    Returns:
+        Combined layer
+    """
+    keep = 1.0 - over[..., 3:]
+    return over + under * keep
+
+
+def blend_premultiplied(roi: np.ndarray, bgra: np.ndarray, opacity: float = 1.0) -> None:
+    """Blend a premultiplied BGRA layer onto a uint8 BGR region in place.
+    
+    out = bg * (1 - a * opacity) + color * opacity
+    
+    Args:
+        roi: Frame region (h, w, 3) uint8, modified in place
+        bgra: Layer (h, w, 4) float32
+        opacity: Extra opacity applied to the whole layer
+    """
+    blended = roi * (1.0 - opacity * bgra[..., 3:]) + opacity * bgra[..., :3]
+    roi[:] = np.clip(blended + 0.5, 0, 255).astype(np.uint8)
+
+
+@dataclass
+class LayerPatch:
+    """Premultiplied BGRA image placed on the frame by a layer."""
+    
+    x: int  # Left edge in frame coordinates (may lie outside the frame)
+    y: int  # Top edge in frame coordinates
+    bgra: np.ndarray  # (h, w, 4) float32, premultiplied
+    opacity: float = 1.0
+    
+    @property
+    def bbox(self) -> Tuple[int, int, int, int]:
+        """Rectangle (x0, y0, x1, y1) covered by the patch."""
+        h, w = self.bgra.shape[:2]
+        return self.x, self.y, self.x + w, self.y + h
+
+
+class OverlayLayer(ABC):
+    """Base class for compositor layers (captions, progress bar, stickers).
+    
+    Subclasses implement state() and patches(). state() is a cheap,
+    hashable summary of what the layer shows at a frame; while it stays
+    the same the compositor reuses the previous patches.
+    """
+    
+    @abstractmethod
+    def state(self, frame_idx: int, total_frames: int,
+              size: Tuple[int, int]) -> Hashable:
+        """Summarize the layer's content at a frame.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            size: Frame size as (height, width)
+            
+        Returns:
+            Hashable value that changes whenever the patches change
+        """
+    
+    @abstractmethod
+    def patches(self, frame_idx: int, total_frames: int,
+                size: Tuple[int, int]) -> List[LayerPatch]:
+        """Render the layer's patches at a frame.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            size: Frame size as (height, width)
+            
+        Returns:
+            Patches in drawing order (empty when nothing is shown)
+        """
+
+
+class CaptionLayer(OverlayLayer):
+    """Active captions with their fade and scale animation."""
+    
+    def __init__(self, overlay: 'Overlay'):
+        """Initialize caption layer.
+        
+        Args:
+            overlay: Overlay holding the captions and caption settings
+        """
+        self.overlay = overlay
+    
+    def _visible(self, frame_idx: int) -> List[Tuple[str, float, float]]:
+        """(text, alpha, scale) of every caption shown at a frame."""
+        visible = []
+        for caption in self.overlay.active_captions(frame_idx):
+            alpha, scale = self.overlay.caption_animation(caption, frame_idx)
+            if alpha > 0:
+                visible.append((caption['text'], alpha, scale))
+        return visible
+    
+    def state(self, frame_idx, total_frames, size):
+        return tuple(self._visible(frame_idx))
+    
+    def patches(self, frame_idx, total_frames, size):
+        h, w = size
+        patches = [self.overlay.caption_patch(text, alpha, scale, h, w)
+                   for text, alpha, scale in self._visible(frame_idx)]
+        return [patch for patch in patches if patch is not None]
+
+
+class ProgressBarLayer(OverlayLayer):
+    """Progress bar with its shadow, track, fill and end marker."""
+    
+    def __init__(self, overlay: 'Overlay'):
+        """Initialize progress bar layer.
+        
+        Args:
+            overlay: Overlay holding the progress bar settings
+        """
+        self.overlay = overlay
+    
+    def state(self, frame_idx, total_frames, size):
+        h, w = size
+        strips = self.overlay.get_progress_bar_strips(h, w)
+        progress = self.overlay.visual_progress(frame_idx / total_frames)
+        return id(strips), int(strips.bar_width * progress)
+    
+    def patches(self, frame_idx, total_frames, size):
+        h, w = size
+        patch = self.overlay.progress_bar_patch(frame_idx / total_frames, h, w)
+        return [patch] if patch is not None else []
+
+
+class SpriteLayer(OverlayLayer):
+    """Fixed image (watermark, sticker) shown over a range of frames."""
+    
+    def __init__(self, bgra: np.ndarray, x: int, y: int, start_frame: int = 0,
+                 end_frame: Optional[int] = None, opacity: float = 1.0):
+        """Initialize sprite layer.
+        
+        Args:
+            bgra: Image (h, w, 4); uint8 straight alpha or float32
+                premultiplied (alpha in [0, 1])
+            x: Left edge in frame coordinates
+            y: Top edge in frame coordinates
+            start_frame: First frame showing the sprite
+            end_frame: End frame, exclusive (None = until the end)
+            opacity: Overall opacity
+        """
+        if bgra.dtype == np.uint8:
+            alpha = bgra[..., 3:].astype(np.float32) / 255.0
+            bgra = np.concatenate([bgra[..., :3].astype(np.float32) * alpha, alpha], axis=2)
+        self.patch = LayerPatch(x, y, bgra.astype(np.float32), opacity)
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+    
+    def state(self, frame_idx, total_frames, size):
+        return self.start_frame <= frame_idx and (self.end_frame is None
+                                                  or frame_idx < self.end_frame)
+    
+    def patches(self, frame_idx, total_frames, size):
+        return [self.patch] if self.state(frame_idx, total_frames, size) else []
+
+
+def _clip_rect(rect: Tuple[int, int, int, int], h: int, w: int) -> Tuple[int, int, int, int]:
+    """Clip a rectangle (x0, y0, x1, y1) to the frame."""
+    x0, y0, x1, y1 = rect
+    return max(x0, 0), max(y0, 0), min(x1, w), min(y1, h)
+
+
+def blend_patch(frame: np.ndarray, patch: LayerPatch) -> None:
+    """Blend one patch onto a frame in place, clipped to the frame.
+    
+    Args:
+        frame: Frame (H, W, C) in BGR, modified in place
+        patch: Patch to blend
+    """
+    h, w = frame.shape[:2]
+    x0, y0, x1, y1 = _clip_rect(patch.bbox, h, w)
+    if x0 >= x1 or y0 >= y1:
+        return
+    blend_premultiplied(frame[y0:y1, x0:x1],
+                        patch.bgra[y0 - patch.y:y1 - patch.y, x0 - patch.x:x1 - patch.x],
+                        patch.opacity)
+
+
+class Compositor:
+    """Blends a stack of overlay layers onto frames, rectangle by rectangle.
+    
+    Patches whose rectangles overlap are merged: their union is composited
+    (over operator, in layer order) and blended onto the frame once.
+    Everything outside the patches is left untouched, so the cost scales
+    with on-screen overlay area, not frame size.
+    """
+    
+    def __init__(self, layers: Optional[List[OverlayLayer]] = None):
+        """Initialize compositor.
+        
+        Args:
+            layers: Layers, bottom first
+        """
+        self.layers: List[OverlayLayer] = list(layers or [])
+        # Last (size, state, patches) per layer, reused while the state holds
+        self._last: Dict[int, tuple] = {}
+    
+    def add_layer(self, layer: OverlayLayer) -> None:
+        """Add a layer on top of the stack.
+        
+        Args:
+            layer: Layer to add
+        """
+        self.layers.append(layer)
+    
+    def layer_patches(self, frame_idx: int, total_frames: int,
+                      size: Tuple[int, int]) -> List[Tuple[Hashable, List[LayerPatch]]]:
+        """Get (state, patches) of every layer at a frame.
+        
+        Patches are only re-rendered for layers whose state changed since
+        the last call.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            size: Frame size as (height, width)
+            
+        Returns:
+            One (state, patches) pair per layer, bottom first
+        """
+        result = []
+        for layer in self.layers:
+            state = layer.state(frame_idx, total_frames, size)
+            last = self._last.get(id(layer))
+            if last is not None and last[0] == size and last[1] == state:
+                patches = last[2]
+            else:
+                patches = layer.patches(frame_idx, total_frames, size)
+                # Single assignment, so concurrent overlay threads stay consistent
+                self._last[id(layer)] = (size, state, patches)
+            result.append((state, patches))
+        return result
+    
+    @staticmethod
+    def dirty_rects(patches: List[LayerPatch], h: int,
+                    w: int) -> List[Tuple[Tuple[int, int, int, int], List[LayerPatch]]]:
+        """Group patches into disjoint rectangles.
+        
+        Args:
+            patches: Patches in drawing order
+            h: Frame height
+            w: Frame width
+            
+        Returns:
+            List of (rect, patches) with rect = (x0, y0, x1, y1) clipped
+            to the frame and patches in drawing order
+        """
+        groups = []
+        for order, patch in enumerate(patches):
+            rect = _clip_rect(patch.bbox, h, w)
+            if rect[0] >= rect[2] or rect[1] >= rect[3]:
+                continue
+            members = [(order, patch)]
+            
+            # Absorb every group the growing rectangle touches
+            merged = True
+            while merged:
+                merged = False
+                for group in groups:
+                    g = group[0]
+                    if g[0] < rect[2] and rect[0] < g[2] and g[1] < rect[3] and rect[1] < g[3]:
+                        rect = (min(rect[0], g[0]), min(rect[1], g[1]),
+                                max(rect[2], g[2]), max(rect[3], g[3]))
+                        members += group[1]
+                        groups.remove(group)
+                        merged = True
+                        break
+            groups.append((rect, members))
+        
+        return [(rect, [patch for _, patch in sorted(members, key=lambda m: m[0])])
+                for rect, members in groups]
+    
+    def state(self, frame_idx: int, total_frames: int,
+              size: Tuple[int, int]) -> Tuple[Hashable, ...]:
+        """Summarize all layers at a frame.
+        
+        Two frames with equal states have identical overlays.
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            size: Frame size as (height, width)
+            
+        Returns:
+            Tuple of layer states, bottom first
+        """
+        return tuple(layer.state(frame_idx, total_frames, size) for layer in self.layers)
+    
+    @staticmethod
+    def _flatten(group: List[LayerPatch], rect: Tuple[int, int, int, int],
+                 h: int, w: int) -> np.ndarray:
+        """Composite a group of patches over transparency within rect."""
+        x0, y0, x1, y1 = rect
+        canvas = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.float32)
+        for patch in group:
+            px0, py0, px1, py1 = _clip_rect(patch.bbox, h, w)
+            src = patch.bgra[py0 - patch.y:py1 - patch.y, px0 - patch.x:px1 - patch.x]
+            if patch.opacity != 1.0:
+                src = src * patch.opacity
+            region = canvas[py0 - y0:py1 - y0, px0 - x0:px1 - x0]
+            region[:] = composite_over(region, src)
+        return canvas
+    
+    def composite(self, frame: np.ndarray, frame_idx: int, total_frames: int) -> None:
+        """Blend all layers onto a frame in place.
+        
+        Args:
+            frame: Frame (H, W, C) in BGR, modified in place
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+        """
+        h, w = frame.shape[:2]
+        patches = [patch for _, layer_patches in self.layer_patches(frame_idx, total_frames, (h, w))
+                   for patch in layer_patches]
+        
+        for rect, group in self.dirty_rects(patches, h, w):
+            if len(group) == 1:
+                blend_patch(frame, group[0])
+                continue
+            x0, y0, x1, y1 = rect
+            blend_premultiplied(frame[y0:y1, x0:x1], self._flatten(group, rect, h, w))
+    
+    def render_rgba(self, frame_idx: int, total_frames: int,
+                    size: Tuple[int, int]) -> np.ndarray:
+        """Render all layers onto a transparent canvas.
+        
+        Blending the result over a background (straight alpha "over")
+        gives the same pixels as composite().
+        
+        Args:
+            frame_idx: Current frame index
+            total_frames: Total number of frames
+            size: Frame size as (height, width)
+            
+        Returns:
+            (H, W, 4) uint8 BGRA image with straight (unpremultiplied) alpha
+        """
+        h, w = size
+        patches = [patch for _, layer_patches in self.layer_patches(frame_idx, total_frames, size)
+                   for patch in layer_patches]
+        
+        rgba = np.zeros((h, w, 4), dtype=np.uint8)
+        for rect, group in self.dirty_rects(patches, h, w):
+            x0, y0, x1, y1 = rect
+            canvas = self._flatten(group, rect, h, w)
+            alpha = canvas[..., 3:]
+            color = np.divide(canvas[..., :3], alpha, out=np.zeros_like(canvas[..., :3]),
+                              where=alpha > 0)
+            rgba[y0:y1, x0:x1, :3] = np.clip(color + 0.5, 0, 255)
+            rgba[y0:y1, x0:x1, 3:] = np.clip(alpha * 255.0 + 0.5, 0, 255)
+        return rgba
 
 
 class Overlay:
@@ -16,8 +426,37 @@ class Overlay:
             config: GenerationConfig instance
         """
         self.config = config
-        self.captions = []
+        self._captions: List[dict] = []
+        # Sweep index over caption intervals, rebuilt when marked dirty
+        self._caption_sweep: Tuple[List[int], List[Tuple[int, ...]]] = ([], [])
+        self._caption_index_dirty = False
+        self._caption_index_lock = threading.Lock()
+        # Caption sprites keyed by (text, font, scale, thickness)
+        self._sprites: Dict[tuple, CaptionSprite] = {}
+        # Glyph atlas renderers keyed by (font path, size, outline)
+        self._atlas_renderers: Dict[tuple, AtlasTextRenderer] = {}
+        # Progress bar strips keyed by frame size and progress bar settings
+        self._bar_strips: Dict[tuple, ProgressBarStrips] = {}
+        # Layer stack; add watermarks or stickers with compositor.add_layer()
+        self.compositor = Compositor([CaptionLayer(self), ProgressBarLayer(self)])
         
+    @property
+    def captions(self) -> Tuple[dict, ...]:
+        """Caption dicts with 'text', 'start' and 'end' frame keys.
+        
+        Read-only snapshot: lookups go through an index that is rebuilt
+        when captions are added with add_caption()/add_captions() or
+        assigned to this property. To edit, build a new list and assign
+        it (overlay.captions = edited); do not change the start or end
+        of a returned entry in place.
+        """
+        return tuple(self._captions)
+    
+    @captions.setter
+    def captions(self, captions: Iterable[dict]) -> None:
+        self._captions = list(captions)
+        self._caption_index_dirty = True
+    
     def add_caption(self, text: str, start_frame: int):
         """Add a caption to display.
         
@@ -26,97 +465,284 @@ class Overlay:
             start_frame: Frame to start displaying caption
         """
         end_frame = start_frame + int(self.config.caption_duration * self.config.fps)
-        self.captions.append({
+        self._captions.append({
             'text': text,
             'start': start_frame,
             'end': end_frame
         })
+        self._caption_index_dirty = True
     
-    def draw_caption(self, frame: np.ndarray, text: str, 
-                    alpha: float = 1.0) -> np.ndarray:
-        """Draw caption on frame.
+    def add_captions(self, captions: Iterable[Tuple[str, int]]) -> None:
+        """Add many captions at once (e.g. word-level captions from SRT).
         
         Args:
-            frame: Input frame (H, W, C) in BGR
-            text: Caption text
-            alpha: Opacity (0.0 to 1.0)
-            
+            captions: Iterable of (text, start_frame) tuples
+        """
+        duration = int(self.config.caption_duration * self.config.fps)
+        self._captions.extend({'text': text, 'start': start, 'end': start + duration}
+                              for text, start in captions)
+        self._caption_index_dirty = True
+    
+    def _caption_index(self) -> Tuple[List[int], List[Tuple[int, ...]]]:
+        """Get the caption sweep index, rebuilding it if marked dirty.
+        
+        The timeline is cut at every caption start and end; each
+        elementary interval [bounds[i], bounds[i + 1]) stores the indices
+        of the captions active in it, in insertion order. The index is
+        marked dirty by add_caption(), add_captions() and the captions
+        setter (see captions).
+        
         Returns:
-            Frame with caption
+            (bounds, segments) tuple
         """
-        h, w = frame.shape[:2]
-        result = frame.copy()
+        if not self._caption_index_dirty:
+            return self._caption_sweep
         
-        # Position in upper third
-        pos_y = int(h * 0.25)
+        with self._caption_index_lock:
+            if self._caption_index_dirty:
+                # Cleared first, so a change made while building marks it again
+                self._caption_index_dirty = False
+                starts: Dict[int, List[int]] = {}
+                ends: Dict[int, List[int]] = {}
+                for i, caption in enumerate(self._captions):
+                    if caption['start'] < caption['end']:
+                        starts.setdefault(caption['start'], []).append(i)
+                        ends.setdefault(caption['end'], []).append(i)
+                
+                bounds = sorted(starts.keys() | ends.keys())
+                segments = []
+                active = set()
+                for frame in bounds:
+                    active.difference_update(ends.get(frame, ()))
+                    active.update(starts.get(frame, ()))
+                    segments.append(tuple(sorted(active)))
+                
+                self._caption_sweep = (bounds, segments)
+            return self._caption_sweep
+    
+    def active_captions(self, frame_idx: int) -> List[dict]:
+        """Find the captions visible at a frame in O(log n + k).
         
-        # Font settings
+        Args:
+            frame_idx: Frame index
+            
+        Returns:
+            Active captions, in the order they were added
+        """
+        bounds, segments = self._caption_index()
+        pos = bisect.bisect_right(bounds, frame_idx) - 1
+        if pos < 0:
+            return []
+        return [self._captions[i] for i in segments[pos]]
+    
+    def _caption_font(self) -> Tuple[int, float, int]:
+        """Font face, scale and thickness used for captions."""
         font = cv2.FONT_HERSHEY_DUPLEX  # Bold-like font
         font_scale = self.config.caption_font_size / 30.0
         thickness = 3
-        
-        # Calculate text size
-        (text_w, text_h), baseline = cv2.getTextSize(text, font, 
-                                                     font_scale, thickness)
-        
-        # Center horizontally
-        pos_x = (w - text_w) // 2
+        return font, font_scale, thickness
+    
+    @staticmethod
+    def _draw_caption_text(canvas: np.ndarray, text: str, origin: Tuple[int, int],
+                           font: int, font_scale: float, thickness: int) -> None:
+        """Draw outlined caption text (black outline, white fill) in place."""
+        pos_x, pos_y = origin
         
         # Draw shadow/outline (black)
         for dx in [-2, -1, 0, 1, 2]:
             for dy in [-2, -1, 0, 1, 2]:
                 if dx != 0 or dy != 0:
-                    cv2.putText(result, text, 
+                    cv2.putText(canvas, text, 
                               (pos_x + dx, pos_y + dy),
                               font, font_scale, (0, 0, 0),
                               thickness + 1, cv2.LINE_AA)
         
         # Draw main text (white)
-        cv2.putText(result, text, (pos_x, pos_y),
+        cv2.putText(canvas, text, (pos_x, pos_y),
                    font, font_scale, (255, 255, 255),
                    thickness, cv2.LINE_AA)
+    
+    def get_caption_sprite(self, text: str) -> CaptionSprite:
+        """Get the rasterized sprite for a caption, rendering it on first use.
         
-        # Apply alpha blending if needed
-        if alpha < 1.0:
-            result = cv2.addWeighted(frame, 1 - alpha, result, alpha, 0)
+        The text is drawn once over black and once over white; the two
+        results give the premultiplied color (over black) and the
+        coverage (their difference), which is then cropped to its
+        bounding box.
         
-        return result
+        Args:
+            text: Caption text
+            
+        Returns:
+            CaptionSprite for the current font settings
+        """
+        font, font_scale, thickness = self._caption_font()
+        key = (text, font, font_scale, thickness)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            return sprite
+        
+        (text_w, text_h), baseline = cv2.getTextSize(text, font,
+                                                     font_scale, thickness)
+        pad = 2 + thickness + 2  # Outline offset plus stroke spread
+        size = (text_h + baseline + 2 * pad, text_w + 2 * pad, 3)
+        origin = (pad, pad + text_h)
+        
+        over_black = np.zeros(size, dtype=np.uint8)
+        over_white = np.full(size, 255, dtype=np.uint8)
+        self._draw_caption_text(over_black, text, origin, font, font_scale, thickness)
+        self._draw_caption_text(over_white, text, origin, font, font_scale, thickness)
+        
+        color = over_black.astype(np.float32)
+        alpha = 1.0 - (over_white[..., :1].astype(np.float32) - color[..., :1]) / 255.0
+        
+        # Crop to the covered area
+        ys, xs = np.nonzero(alpha[..., 0] > 0)
+        if len(ys) == 0:
+            y0 = y1 = x0 = x1 = 0
+        else:
+            y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+        bgra = np.concatenate([color, alpha], axis=2)[y0:y1, x0:x1]
+        
+        # Races between overlay threads only rasterize a sprite twice
+        sprite = CaptionSprite(np.ascontiguousarray(bgra),
+                               (int(x0) - origin[0], int(y0) - origin[1]))
+        self._sprites[key] = sprite
+        return sprite
     
-    def draw_progress_bar(self, frame: np.ndarray, 
-                         progress: float) -> np.ndarray:
-        """Draw enhanced progress bar on frame.
+    def get_atlas_renderer(self) -> AtlasTextRenderer:
+        """Get the glyph atlas renderer for the current caption font settings.
         
-        Implements research-backed design for retention & engagement:
-        - Slim horizontal line (2-3px) at bottom edge
-        - Bold brand-aligned foreground color (deep red/burgundy)
-        - Translucent gray background track
-        - Glowing end marker dot
-        - Goal-gradient effect (acceleration at ~80%)
-        - Shadow for contrast
+        Returns:
+            AtlasTextRenderer instance
+        """
+        key = (self.config.caption_font_path, self.config.caption_font_size,
+               self.config.caption_outline_width)
+        renderer = self._atlas_renderers.get(key)
+        if renderer is None:
+            renderer = AtlasTextRenderer(GlyphAtlas(*key))
+            self._atlas_renderers[key] = renderer
+        return renderer
+    
+    def _place_caption(self, text: str, h: int, w: int) -> Tuple[np.ndarray, int, int]:
+        """Get a caption's sprite and its top-left corner in the frame.
+        
+        Captions sit in the upper third (first baseline at 25% height),
+        centered horizontally.
         
         Args:
-            frame: Input frame (H, W, C) in BGR
-            progress: Progress value (0.0 to 1.0)
+            text: Caption text
+            h: Frame height
+            w: Frame width
             
         Returns:
-            Frame with progress bar
+            (bgra, x, y) tuple
         """
-        h, w = frame.shape[:2]
-        result = frame.copy()
+        pos_y = int(h * 0.25)
         
-        # Progress bar dimensions (full width at very bottom)
-        bar_height = self.config.progress_bar_height
-        if self.config.progress_bar_full_width:
-            bar_width = w  # Full width
-            bar_x = 0
+        if self.config.caption_renderer == "atlas":
+            bgra, (dx, dy) = self.get_atlas_renderer().render(text, int(w * 0.9))
+            return bgra, w // 2 + dx, pos_y + dy
+        
+        sprite = self.get_caption_sprite(text)
+        font, font_scale, thickness = self._caption_font()
+        (text_w, _), _ = cv2.getTextSize(text, font, font_scale, thickness)
+        return (sprite.bgra, (w - text_w) // 2 + sprite.offset[0],
+                pos_y + sprite.offset[1])
+    
+    def caption_animation(self, caption: dict, frame_idx: int) -> Tuple[float, float]:
+        """Compute a caption's fade and scale at a frame.
+        
+        Args:
+            caption: Caption dictionary (text, start, end)
+            frame_idx: Current frame index
+            
+        Returns:
+            (alpha, scale) tuple
+        """
+        # Calculate fade in/out
+        fade_frames = self.config.fps // 5  # 0.2s fade
+        
+        if frame_idx < caption['start'] + fade_frames:
+            # Fade in
+            alpha = (frame_idx - caption['start']) / fade_frames
+            # Scale animation
+            scale = 0.9 + 0.1 * alpha
+        elif frame_idx > caption['end'] - fade_frames:
+            # Fade out
+            alpha = (caption['end'] - frame_idx) / fade_frames
+            scale = 1.0
         else:
-            bar_width = int(w * 0.9)  # 90% of width
-            bar_x = (w - bar_width) // 2
+            alpha = 1.0
+            scale = 1.0
+        return alpha, scale
+    
+    def caption_patch(self, text: str, alpha: float, scale: float,
+                      h: int, w: int) -> Optional[LayerPatch]:
+        """Place a caption sprite on a frame of the given size.
         
-        # Position at very bottom edge
-        bar_y = h - bar_height - self.config.progress_bar_y_offset
+        Args:
+            text: Caption text
+            alpha: Opacity (0.0 to 1.0)
+            scale: Size relative to the rasterized caption, around its center
+            h: Frame height
+            w: Frame width
+            
+        Returns:
+            LayerPatch, or None if nothing would be drawn
+        """
+        if alpha <= 0:
+            return None
+        bgra, x, y = self._place_caption(text, h, w)
+        sh, sw = bgra.shape[:2]
+        if sh == 0 or sw == 0:
+            return None
+        
+        if scale != 1.0:
+            new_w, new_h = max(1, round(sw * scale)), max(1, round(sh * scale))
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            bgra = cv2.resize(bgra, (new_w, new_h), interpolation=interpolation)
+            x += (sw - new_w) // 2
+            y += (sh - new_h) // 2
+        
+        return LayerPatch(x, y, bgra, min(alpha, 1.0))
+    
+    def draw_caption(self, frame: np.ndarray, text: str, 
+                    alpha: float = 1.0, scale: float = 1.0) -> np.ndarray:
+        """Draw caption on frame.
         
-        # Apply goal-gradient effect (slight acceleration at ~80%)
+        The caption is rasterized once into a cached sprite (Hershey
+        text via get_caption_sprite, or composed from the glyph atlas
+        with config.caption_renderer = "atlas"); each call only blends
+        the sprite's rectangle.
+        
+        Args:
+            frame: Input frame (H, W, C) in BGR
+            text: Caption text
+            alpha: Opacity (0.0 to 1.0)
+            scale: Caption size (animated from 0.9 to 1.0 while fading in)
+            
+        Returns:
+            Frame with caption
+        """
+        result = frame.copy()
+        patch = self.caption_patch(text, alpha, scale, *frame.shape[:2])
+        if patch is not None:
+            blend_patch(result, patch)
+        return result
+    
+    def visual_progress(self, progress: float) -> float:
+        """Map playback progress to displayed bar progress.
+        
+        Applies the goal-gradient effect (slight acceleration from
+        config.progress_bar_gradient_start).
+        
+        Args:
+            progress: Progress value (0.0 to 1.0)
+            
+        Returns:
+            Displayed progress (0.0 to 1.0)
+        """
         if progress >= self.config.progress_bar_gradient_start:
             # Calculate accelerated progress for visual effect
             base_progress = self.config.progress_bar_gradient_start
@@ -128,107 +754,248 @@ class Overlay:
             visual_progress = progress
         
         # Clamp visual progress to valid range
-        visual_progress = max(0.0, min(1.0, visual_progress))
-        
-        # Create overlay for alpha blending
-        overlay = result.copy()
-        
-        # Draw shadow if enabled (for better contrast)
-        if self.config.progress_bar_shadow_enabled:
-            shadow_y = bar_y + self.config.progress_bar_shadow_offset
-            # Background shadow
-            cv2.rectangle(overlay,
-                         (bar_x, shadow_y),
-                         (bar_x + bar_width, shadow_y + bar_height),
-                         (0, 0, 0), -1)
-            # Apply shadow with opacity
-            result = cv2.addWeighted(result, 1.0, overlay, self.config.progress_bar_shadow_opacity, 0)
-            overlay = result.copy()
-        
-        # Draw background track (translucent gray)
-        cv2.rectangle(overlay,
-                     (bar_x, bar_y),
-                     (bar_x + bar_width, bar_y + bar_height),
-                     self.config.progress_bar_bg_color, -1)
-        
-        # Apply background with its opacity
-        result = cv2.addWeighted(result, 1 - self.config.progress_bar_bg_opacity, 
-                                overlay, self.config.progress_bar_bg_opacity, 0)
-        overlay = result.copy()
+        return max(0.0, min(1.0, visual_progress))
+    
+    def get_progress_bar_strips(self, height: int, width: int) -> ProgressBarStrips:
+        """Get the precomputed progress bar strips for a frame size.
         
-        # Draw progress fill (bold brand color - deep red/burgundy)
-        fill_width = int(bar_width * visual_progress)
+        Built once per frame size and progress bar settings: the shadow
+        and background track are composited into a static strip, and the
+        fill over it into a fully filled strip. Layers are opaque colors
+        at their configured opacity, combined with the over operator.
+        
+        Args:
+            height: Frame height
+            width: Frame width
+            
+        Returns:
+            ProgressBarStrips instance
+        """
+        settings = {name: value for name, value in vars(self.config).items()
+                    if name.startswith('progress_bar_')}
+        key = (height, width, repr(sorted(settings.items())))
+        strips = self._bar_strips.get(key)
+        if strips is not None:
+            return strips
+        
+        cfg = self.config
+        
+        # Progress bar dimensions (full width at very bottom)
+        bar_height = cfg.progress_bar_height
+        if cfg.progress_bar_full_width:
+            bar_width = width  # Full width
+            bar_x = 0
+        else:
+            bar_width = int(width * 0.9)  # 90% of width
+            bar_x = (width - bar_width) // 2
+        
+        # Position at very bottom edge
+        bar_y = height - bar_height - cfg.progress_bar_y_offset
+        marker_y = bar_y + (bar_height // 2)
+        glow_radius = cfg.progress_bar_marker_glow_radius if cfg.progress_bar_marker_enabled else 0
+        
+        # Rows covered by shadow, track and marker glow
+        top = [bar_y]
+        bottom = [bar_y + bar_height]
+        if cfg.progress_bar_shadow_enabled:
+            bottom.append(bar_y + cfg.progress_bar_shadow_offset + bar_height)
+        if glow_radius:
+            top.append(marker_y - glow_radius)
+            bottom.append(marker_y + glow_radius)
+        y0 = max(0, min(top))
+        y1 = min(height, max(bottom) + 1)
+        
+        def layer(color, opacity, rows, cols):
+            # Opaque color at the given opacity over rows/cols (inclusive)
+            out = np.zeros((max(0, y1 - y0), width, 4), dtype=np.float32)
+            r0, r1 = max(rows[0] - y0, 0), max(rows[1] + 1 - y0, 0)
+            c0, c1 = max(cols[0], 0), max(cols[1] + 1, 0)
+            out[r0:r1, c0:c1, :3] = np.asarray(color, dtype=np.float32) * opacity
+            out[r0:r1, c0:c1, 3] = opacity
+            return out
+        
+        track_cols = (bar_x, bar_x + bar_width)
+        static = np.zeros((max(0, y1 - y0), width, 4), dtype=np.float32)
+        if cfg.progress_bar_shadow_enabled:
+            shadow_y = bar_y + cfg.progress_bar_shadow_offset
+            static = composite_over(static, layer(
+                (0, 0, 0), cfg.progress_bar_shadow_opacity,
+                (shadow_y, shadow_y + bar_height), track_cols))
+        static = composite_over(static, layer(
+            cfg.progress_bar_bg_color, cfg.progress_bar_bg_opacity,
+            (bar_y, bar_y + bar_height), track_cols))
+        filled = composite_over(static, layer(
+            cfg.progress_bar_fg_color, cfg.progress_bar_opacity,
+            (bar_y, bar_y + bar_height), (bar_x, width - 1)))
+        
+        # Glow and marker dot as one patch centered on the marker
+        size = 2 * glow_radius + 1
+        marker = np.zeros((size, size, 4), dtype=np.float32)
+        if glow_radius:
+            center = (glow_radius, glow_radius)
+            for radius, opacity in [(glow_radius, 0.3),
+                                    (cfg.progress_bar_marker_radius, 0.6)]:
+                mask = np.zeros((size, size), dtype=np.uint8)
+                cv2.circle(mask, center, radius, 1, -1)
+                dot = np.zeros_like(marker)
+                dot[mask > 0, :3] = np.asarray(cfg.progress_bar_marker_color,
+                                               dtype=np.float32) * opacity
+                dot[mask > 0, 3] = opacity
+                marker = composite_over(marker, dot)
+        
+        strips = ProgressBarStrips(y0, y1, static, filled, marker,
+                                   bar_x, bar_width, marker_y - y0)
+        self._bar_strips[key] = strips
+        return strips
+    
+    def progress_bar_patch(self, progress: float, h: int, w: int) -> Optional[LayerPatch]:
+        """Assemble the progress bar strip for a progress value.
         
+        The patch covers only the bottom strip (rows y0..y1 of the
+        precomputed strips).
+        
+        Args:
+            progress: Progress value (0.0 to 1.0)
+            h: Frame height
+            w: Frame width
+            
+        Returns:
+            LayerPatch, or None if the bar lies outside the frame
+        """
+        strips = self.get_progress_bar_strips(h, w)
+        if strips.y1 <= strips.y0:
+            return None
+        
+        # Draw progress fill (bold brand color - deep red/burgundy)
+        fill_width = int(strips.bar_width * self.visual_progress(progress))
         if fill_width > 0:
-            cv2.rectangle(overlay,
-                         (bar_x, bar_y),
-                         (bar_x + fill_width, bar_y + bar_height),
-                         self.config.progress_bar_fg_color, -1)
-        
-        # Apply foreground with opacity
-        result = cv2.addWeighted(result, 1 - self.config.progress_bar_opacity, 
-                                overlay, self.config.progress_bar_opacity, 0)
-        
-        # Draw glowing end marker dot if enabled and progress > 0
-        if self.config.progress_bar_marker_enabled and fill_width > 0:
-            overlay = result.copy()
-            
-            # Calculate marker position
-            marker_x = bar_x + fill_width
-            marker_y = bar_y + (bar_height // 2)
-            
-            # Draw glow effect (larger, semi-transparent)
-            glow_radius = self.config.progress_bar_marker_glow_radius
-            cv2.circle(overlay, (marker_x, marker_y), glow_radius,
-                      self.config.progress_bar_marker_color, -1)
-            result = cv2.addWeighted(result, 0.7, overlay, 0.3, 0)
-            
-            # Draw main marker dot (smaller, more opaque)
-            overlay = result.copy()
-            marker_radius = self.config.progress_bar_marker_radius
-            cv2.circle(overlay, (marker_x, marker_y), marker_radius,
-                      self.config.progress_bar_marker_color, -1)
-            result = cv2.addWeighted(result, 0.4, overlay, 0.6, 0)
+            fill_end = min(strips.bar_x + fill_width + 1, w)
+            strip = strips.static.copy()
+            strip[:, strips.bar_x:fill_end] = strips.filled[:, strips.bar_x:fill_end]
+        else:
+            strip = strips.static
+        
+        # Glowing end marker dot
+        radius = strips.marker.shape[0] // 2
+        if radius and fill_width > 0:
+            cx = strips.bar_x + fill_width
+            cy = strips.marker_y
+            x0, x1 = max(cx - radius, 0), min(cx + radius + 1, w)
+            r0, r1 = max(cy - radius, 0), min(cy + radius + 1, strip.shape[0])
+            if x0 < x1 and r0 < r1:
+                patch = strips.marker[r0 - (cy - radius):r1 - (cy - radius),
+                                      x0 - (cx - radius):x1 - (cx - radius)]
+                strip[r0:r1, x0:x1] = composite_over(strip[r0:r1, x0:x1], patch)
+        
+        return LayerPatch(0, strips.y0, strip)
+    
+    def draw_progress_bar(self, frame: np.ndarray, 
+                         progress: float) -> np.ndarray:
+        """Draw enhanced progress bar on frame.
+        
+        Implements research-backed design for retention & engagement:
+        - Slim horizontal line (2-3px) at bottom edge
+        - Bold brand-aligned foreground color (deep red/burgundy)
+        - Translucent gray background track
+        - Glowing end marker dot
+        - Goal-gradient effect (acceleration at ~80%)
+        - Shadow for contrast
+        
+        All layers are precomputed into strips (see
+        get_progress_bar_strips); each call only blends the bottom strip.
         
+        Args:
+            frame: Input frame (H, W, C) in BGR
+            progress: Progress value (0.0 to 1.0)
+            
+        Returns:
+            Frame with progress bar
+        """
+        result = frame.copy()
+        patch = self.progress_bar_patch(progress, *frame.shape[:2])
+        if patch is not None:
+            blend_patch(result, patch)
         return result
     
     def apply_overlays(self, frame: np.ndarray, 
-                      frame_idx: int, total_frames: int) -> np.ndarray:
+                      frame_idx: int, total_frames: int,
+                      in_place: bool = False) -> np.ndarray:
         """Apply all overlays to frame.
         
+        Layers (captions, progress bar and anything added to
+        self.compositor) are blended only inside the rectangles they
+        cover.
+        
         Args:
             frame: Input frame (H, W, C) in BGR
             frame_idx: Current frame index
             total_frames: Total number of frames
+            in_place: Draw onto frame itself instead of a copy
             
         Returns:
             Frame with overlays
         """
-        result = frame.copy()
+        result = frame if in_place else frame.copy()
+        self.compositor.composite(result, frame_idx, total_frames)
+        return result
+
+
+@dataclass
+class OverlayVariant:
+    """One overlay variant of a video for A/B tests.
+    
+    Variants share everything up to the overlay stage and differ only in
+    captions and progress bar settings.
+    """
+    
+    name: str
+    captions: List[Tuple[str, int]] = field(default_factory=list)
+    overrides: Dict[str, Any] = field(default_factory=dict)  # progress_bar_* config fields
+    output_path: Optional[str] = None  # None = "<stem>_<name><ext>" of the export path
+    
+    def make_config(self, config):
+        """Apply this variant's overrides to a configuration.
         
-        # Draw captions
-        for caption in self.captions:
-            if caption['start'] <= frame_idx < caption['end']:
-                # Calculate fade in/out
-                fade_frames = self.config.fps // 5  # 0.2s fade
-                
-                if frame_idx < caption['start'] + fade_frames:
-                    # Fade in
-                    alpha = (frame_idx - caption['start']) / fade_frames
-                    # Scale animation
-                    scale = 0.9 + 0.1 * alpha
-                elif frame_idx > caption['end'] - fade_frames:
-                    # Fade out
-                    alpha = (caption['end'] - frame_idx) / fade_frames
-                    scale = 1.0
-                else:
-                    alpha = 1.0
-                    scale = 1.0
-                
-                result = self.draw_caption(result, caption['text'], alpha)
+        Args:
+            config: Base GenerationConfig
+            
+        Returns:
+            New GenerationConfig
+            
+        Raises:
+            ValueError: If an override is not a progress_bar_* field
+        """
+        fields = {f.name for f in dataclasses.fields(config)}
+        invalid = [name for name in self.overrides
+                   if not name.startswith('progress_bar_') or name not in fields]
+        if invalid:
+            raise ValueError(f"variant {self.name!r}: only progress_bar_* settings "
+                             f"can vary, got {', '.join(sorted(invalid))}")
+        return dataclasses.replace(config, **self.overrides)
+    
+    def make_overlay(self, config) -> Overlay:
+        """Create the overlay system for this variant.
         
-        # Draw progress bar
-        progress = frame_idx / total_frames
-        result = self.draw_progress_bar(result, progress)
+        Args:
+            config: Base GenerationConfig
+            
+        Returns:
+            Overlay with the variant's settings and captions
+        """
+        overlay = Overlay(self.make_config(config))
+        overlay.add_captions(self.captions)
+        return overlay
+    
+    def resolve_path(self, base_path: str) -> str:
+        """Resolve the output path of this variant.
         
-        return result
+        Args:
+            base_path: Path passed to the export, e.g. "out/video.mp4"
+            
+        Returns:
+            self.output_path, or "<base stem>_<name><base ext>"
+        """
+        if self.output_path:
+            return self.output_path
+        stem, ext = os.path.splitext(base_path)
+        return f"{stem}_{self.name}{ext or '.mp4'}"
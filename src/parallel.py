@@ -0,0 +1,159 @@
+"""
+Parallel execution helpers for per-frame pipeline stages.
+"""
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+import cv2
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# cv2.setNumThreads is process-global; pools share one override
+_cv_threads_lock = threading.Lock()
+_cv_threads_users = 0
+_cv_threads_saved = None
+
+
+def acquire_cv_threads(workers: int) -> None:
+    """Reduce OpenCV's internal threading while a frame pool is running.
+    
+    Each pool worker already keeps one core busy, so OpenCV gets only
+    the remaining share of cores to avoid oversubscription. Calls nest;
+    the original setting is restored by the last release_cv_threads().
+    
+    Args:
+        workers: Number of pool worker threads
+    """
+    global _cv_threads_users, _cv_threads_saved
+    with _cv_threads_lock:
+        if _cv_threads_users == 0:
+            _cv_threads_saved = cv2.getNumThreads()
+        _cv_threads_users += 1
+        cv2.setNumThreads(max(1, (os.cpu_count() or 1) // workers))
+
+
+def release_cv_threads() -> None:
+    """Undo one acquire_cv_threads() call."""
+    global _cv_threads_users, _cv_threads_saved
+    with _cv_threads_lock:
+        _cv_threads_users -= 1
+        if _cv_threads_users == 0:
+            cv2.setNumThreads(_cv_threads_saved)
+            _cv_threads_saved = None
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], workers: int,
+                max_in_flight: Optional[int] = None) -> Iterator[R]:
+    """Map a function over a stream on a thread pool, preserving order.
+    
+    Heavy OpenCV calls release the GIL, so frames of one stage can be
+    processed concurrently. At most max_in_flight items are submitted
+    ahead of the consumer, which bounds memory for streaming input.
+    
+    Args:
+        func: Function applied to each item
+        items: Input stream
+        workers: Number of threads (1 runs inline, without a pool)
+        max_in_flight: Submission window (defaults to 2 * workers)
+        
+    Yields:
+        func(item) for each item, in input order
+    """
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    
+    window = max_in_flight or 2 * workers
+    pending = deque()
+    
+    acquire_cv_threads(workers)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        release_cv_threads()
+
+
+class _StageFailure:
+    """Carries an upstream exception across a stage queue."""
+    
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_STAGE_DONE = object()
+
+
+def threaded_stage(items: Iterable[T], maxsize: int,
+                   name: str = "stage") -> Iterator[T]:
+    """Run an upstream stream on its own thread behind a bounded queue.
+    
+    The upstream iterator (usually a stage generator) is advanced by a
+    dedicated thread, so chaining several threaded stages runs them
+    concurrently as a pipeline. When the queue is full the producer
+    blocks, applying backpressure to everything upstream. Upstream
+    exceptions are re-raised in the consumer; closing the consumer stops
+    the producer.
+    
+    Args:
+        items: Upstream stream
+        maxsize: Queue capacity (items buffered between the stages)
+        name: Thread name, for debugging
+        
+    Yields:
+        Items of the upstream stream, in order
+    """
+    buffer = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_STAGE_DONE)
+        except BaseException as exc:
+            put(_StageFailure(exc))
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+    
+    thread = threading.Thread(target=produce, name=f"{name}-producer", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _STAGE_DONE:
+                return
+            if isinstance(item, _StageFailure):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        thread.join()
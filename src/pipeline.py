@@ -2,27 +2,37 @@
 Main video processing pipeline.
 Orchestrates generation, effects, and export.
 """
-import cv2
 import numpy as np
-from typing import List, Optional
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional
 import os
-import sys
+import time
 
 # Support both package and standalone execution
 if __name__ == '__main__' or '.' not in __name__:
     # Running as standalone script
     from config import GenerationConfig
-    from generator import VideoGenerator
-    from motion import MotionEffects
+    from generator import TiledTimeline, VideoGenerator
+    from motion import MotionEffects, MotionSchedule
     from visual_style import VisualStyle
-    from overlay import Overlay
+    from overlay import Overlay, OverlayVariant
+    from parallel import ordered_map, threaded_stage
+    from sharded import ShardedRenderer
+    from video_io import (ALPHA_CODECS, EncodingSettings, FFmpegWriter, OpenCVWriter,
+                          PNGSequenceWriter, ProgressiveWriter, Rendition,
+                          RenditionWriter, SegmentedExporter, ThreadedVideoReader)
 else:
     # Running as part of package
     from .config import GenerationConfig
-    from .generator import VideoGenerator
-    from .motion import MotionEffects
+    from .generator import TiledTimeline, VideoGenerator
+    from .motion import MotionEffects, MotionSchedule
     from .visual_style import VisualStyle
-    from .overlay import Overlay
+    from .overlay import Overlay, OverlayVariant
+    from .parallel import ordered_map, threaded_stage
+    from .sharded import ShardedRenderer
+    from .video_io import (ALPHA_CODECS, EncodingSettings, FFmpegWriter, OpenCVWriter,
+                           PNGSequenceWriter, ProgressiveWriter, Rendition,
+                           RenditionWriter, SegmentedExporter, ThreadedVideoReader)
 
 
 class VideoPipeline:
@@ -44,37 +54,150 @@ class VideoPipeline:
         
         # State
         self.frames = []
-        self.current_break = None
-        self.break_start_frame = None
+        self._timeline = None
+        self._schedule = None
+        self._job_start = None
+        self.metrics: Dict[str, float] = {}
         
+    def get_timeline(self) -> TiledTimeline:
+        """Get the tiled base video, generating the base clip on first use.
+        
+        Returns:
+            Lazy TiledTimeline covering the full duration
+        """
+        if self._timeline is None:
+            base_frames = self.generator.generate_base_clip()
+            self._timeline = self.generator.tile_clip(base_frames)
+        return self._timeline
+    
+    def get_motion_schedule(self, total: int) -> MotionSchedule:
+        """Get the precomputed motion schedule for a timeline length.
+        
+        Args:
+            total: Total number of frames in the video
+            
+        Returns:
+            MotionSchedule covering frames 0..total-1
+        """
+        if self._schedule is None or len(self._schedule) != total:
+            self._schedule = self.motion.build_schedule(total)
+        return self._schedule
+    
     def generate_base_video(self) -> None:
         """Generate base 3-second video clip."""
         print("=" * 60)
         print("STEP 1: Generating base video clip")
         print("=" * 60)
         
-        base_frames = self.generator.generate_base_clip()
-        self.frames = self.generator.tile_clip(base_frames)
+        self.frames = self.get_timeline()
         
         print(f"✓ Base video ready: {len(self.frames)} frames\n")
     
+    def iter_base_video(self) -> Iterator[np.ndarray]:
+        """Stream the tiled base video frame by frame.
+        
+        Only the base clip is held in memory; the full-duration timeline
+        is produced lazily.
+        
+        Yields:
+            Base video frames, in order
+        """
+        yield from self.get_timeline()
+    
+    def iter_visual_style(self, frames: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        """Stream frames through the visual style stage.
+        
+        Args:
+            frames: Input frames, in order
+            
+        Yields:
+            Styled frames
+        """
+        def style_frame(item):
+            i, frame = item
+            return self.style.apply_full_style(frame, i)
+        
+        yield from ordered_map(style_frame, enumerate(frames),
+                               self.config.stage_threads)
+    
+    def iter_motion_effects(self, frames: Iterable[np.ndarray],
+                            total: int) -> Iterator[np.ndarray]:
+        """Stream frames through the motion stage.
+        
+        Args:
+            frames: Input frames, in order
+            total: Total number of frames in the video
+            
+        Yields:
+            Frames with motion effects and pattern breaks applied
+        """
+        schedule = self.get_motion_schedule(total)
+        
+        def announce_breaks():
+            for i, frame in enumerate(frames):
+                break_type, progress = schedule.break_at(i)
+                if break_type is not None and progress == 0:
+                    print(f"  Pattern break at frame {i}: {break_type}")
+                yield i, frame
+        
+        def move_frame(item):
+            i, frame = item
+            return self.motion.apply_scheduled(frame, schedule, i)
+        
+        yield from ordered_map(move_frame, announce_breaks(),
+                               self.config.stage_threads)
+    
+    def iter_overlays(self, frames: Iterable[np.ndarray], total: int,
+                      in_place: bool = False) -> Iterator[np.ndarray]:
+        """Stream frames through the overlay stage.
+        
+        Args:
+            frames: Input frames, in order
+            total: Total number of frames in the video
+            in_place: Draw onto the input frames instead of copies (only
+                for frames nothing else holds on to)
+            
+        Yields:
+            Frames with captions and progress bar
+        """
+        def overlay_frame(item):
+            i, frame = item
+            return self.overlay.apply_overlays(frame, i, total, in_place)
+        
+        yield from ordered_map(overlay_frame, enumerate(frames),
+                               self.config.stage_threads)
+    
+    def _collect(self, frames: Iterable[np.ndarray], total: int,
+                 verb: str) -> List[np.ndarray]:
+        """Materialise a stage stream into a list, reporting progress.
+        
+        Args:
+            frames: Stage output stream
+            total: Expected number of frames
+            verb: Progress label (e.g. "Styled")
+            
+        Returns:
+            List of frames
+        """
+        result = []
+        
+        for i, frame in enumerate(frames):
+            result.append(frame)
+            
+            if (i + 1) % 100 == 0:
+                print(f"  {verb} {i + 1}/{total} frames")
+        
+        return result
+    
     def apply_visual_style(self) -> None:
         """Apply high-contrast neon visual style."""
         print("=" * 60)
         print("STEP 2: Applying visual style (high contrast + neon)")
         print("=" * 60)
         
-        styled_frames = []
         total = len(self.frames)
-        
-        for i, frame in enumerate(self.frames):
-            styled = self.style.apply_full_style(frame)
-            styled_frames.append(styled)
-            
-            if (i + 1) % 100 == 0:
-                print(f"  Styled {i + 1}/{total} frames")
-        
-        self.frames = styled_frames
+        self.frames = self._collect(self.iter_visual_style(self.frames),
+                                    total, "Styled")
         print(f"✓ Visual style applied\n")
     
     def apply_motion_effects(self) -> None:
@@ -83,40 +206,9 @@ class VideoPipeline:
         print("STEP 3: Applying motion effects")
         print("=" * 60)
         
-        motion_frames = []
         total = len(self.frames)
-        
-        for i, frame in enumerate(self.frames):
-            # Apply base motion effects
-            frame = self.motion.apply_micro_movement(frame, i)
-            frame = self.motion.apply_parallax(frame, i)
-            frame = self.motion.apply_micro_zoom(frame, i, total)
-            
-            # Check for pattern breaks
-            should_break, break_type = self.motion.should_apply_pattern_break(i)
-            
-            if should_break:
-                self.current_break = break_type
-                self.break_start_frame = i
-                print(f"  Pattern break at frame {i}: {break_type}")
-            
-            # Apply pattern break if active
-            if self.current_break is not None:
-                frames_into_break = i - self.break_start_frame
-                if frames_into_break < self.config.break_duration:
-                    progress = frames_into_break / self.config.break_duration
-                    frame = self.motion.apply_pattern_break(
-                        frame, i, self.current_break, progress
-                    )
-                else:
-                    self.current_break = None
-            
-            motion_frames.append(frame)
-            
-            if (i + 1) % 100 == 0:
-                print(f"  Processed {i + 1}/{total} frames")
-        
-        self.frames = motion_frames
+        self.frames = self._collect(self.iter_motion_effects(self.frames, total),
+                                    total, "Processed")
         print(f"✓ Motion effects applied\n")
     
     def add_captions(self, captions: List[tuple]) -> None:
@@ -129,9 +221,14 @@ class VideoPipeline:
         print("STEP 4: Adding captions")
         print("=" * 60)
         
-        for text, start_frame in captions:
-            self.overlay.add_caption(text, start_frame)
-            print(f"  Caption at frame {start_frame}: {text}")
+        captions = list(captions)
+        self.overlay.add_captions(captions)
+        if len(captions) <= 20:
+            for text, start_frame in captions:
+                print(f"  Caption at frame {start_frame}: {text}")
+        else:
+            print(f"  Frames {captions[0][1]}-{captions[-1][1]}: "
+                  f"{captions[0][0]} ... {captions[-1][0]}")
         
         print(f"✓ {len(captions)} captions added\n")
     
@@ -141,52 +238,543 @@ class VideoPipeline:
         print("STEP 5: Applying overlays")
         print("=" * 60)
         
-        overlay_frames = []
         total = len(self.frames)
-        
-        for i, frame in enumerate(self.frames):
-            frame = self.overlay.apply_overlays(frame, i, total)
-            overlay_frames.append(frame)
-            
-            if (i + 1) % 100 == 0:
-                print(f"  Overlaid {i + 1}/{total} frames")
-        
-        self.frames = overlay_frames
+        self.frames = self._collect(self.iter_overlays(self.frames, total),
+                                    total, "Overlaid")
         print(f"✓ Overlays applied\n")
     
-    def export_video(self, output_path: str) -> None:
-        """Export final video.
+    def open_writer(self, output_path: str,
+                    encoding: Optional[EncodingSettings] = None,
+                    renditions: Optional[List[Rendition]] = None):
+        """Open the video writer configured for this pipeline.
+        
+        The ffmpeg backend is used when config.export_backend is "ffmpeg",
+        explicit encoding settings are given (e.g. from
+        EncodingSettings.from_structure()) or renditions are requested.
+        With config.encode_workers > 1 each output is encoded as
+        GOP-aligned segments in parallel and stitched losslessly. With
+        config.progressive_format set, the output is written as HLS
+        segments or fragmented MP4 that can be played while rendering;
+        progressive output is a single encoder and cannot be combined with
+        renditions or encode_workers > 1.
         
         Args:
             output_path: Path to save video file
+            encoding: Optional ffmpeg encoder settings
+            renditions: Optional output ladder; every rendition is fed
+                from the same frames through a shared downscale pyramid
+                and written next to output_path (see Rendition.output_path)
+            
+        Returns:
+            Writer with write(frame), close() and abort()
+            
+        Raises:
+            ValueError: If progressive output is combined with renditions
+                or parallel segment encoding
         """
-        print("=" * 60)
-        print("STEP 6: Exporting video")
-        print("=" * 60)
+        fps = self.config.fps
+        use_ffmpeg = (encoding is not None or bool(renditions)
+                      or self.config.export_backend == "ffmpeg")
+        settings = None
+        if use_ffmpeg:
+            settings = encoding or EncodingSettings.from_config(self.config)
+        
+        def open_output(path, size, settings, output_args=None):
+            if settings is not None:
+                def open_segment(segment_path):
+                    return FFmpegWriter(segment_path, fps, size, settings,
+                                        self.config.writer_queue_size, output_args)
+                gop_size = settings.gop_size or self.config.gop_frames
+            else:
+                def open_segment(segment_path):
+                    return OpenCVWriter(segment_path, fps, size)
+                gop_size = self.config.gop_frames
+            
+            if self.config.encode_workers > 1:
+                return SegmentedExporter(path, fps, size, gop_size,
+                                         self.config.segment_gops,
+                                         self.config.encode_workers,
+                                         writer_factory=open_segment,
+                                         queue_size=self.config.writer_queue_size)
+            return open_segment(path)
+        
+        if self.config.progressive_format:
+            if renditions:
+                raise ValueError("progressive output does not support renditions")
+            if self.config.encode_workers > 1:
+                raise ValueError("progressive output does not support encode_workers > 1")
+            return ProgressiveWriter(
+                output_path, fps, self.config.output_resolution,
+                settings or EncodingSettings.from_config(self.config),
+                self.config.progressive_format,
+                self.config.progressive_segment_seconds,
+                self.config.writer_queue_size, start_time=self._job_start)
+        
+        if not renditions:
+            return open_output(output_path, self.config.output_resolution, settings)
+        
+        outputs = []
+        try:
+            for rendition in renditions:
+                # Segments are joined by the concat demuxer, which picks the
+                # container from the file name, so only direct writes need -f
+                output_args = (rendition.output_args()
+                               if self.config.encode_workers <= 1 else None)
+                writer = open_output(rendition.output_path(output_path),
+                                     tuple(rendition.resolution),
+                                     rendition.encoding(settings), output_args)
+                outputs.append((tuple(rendition.resolution), writer))
+        except BaseException:
+            for _, writer in outputs:
+                writer.abort()
+            raise
+        return RenditionWriter(outputs)
+    
+    def write_frames(self, frames: Iterable[np.ndarray], output_path: str,
+                     total: int,
+                     encoding: Optional[EncodingSettings] = None,
+                     renditions: Optional[List[Rendition]] = None) -> int:
+        """Encode a stream of frames to a video file.
         
+        Args:
+            frames: Final frames, in order
+            output_path: Path to save video file
+            total: Expected number of frames (for reporting)
+            encoding: Optional ffmpeg encoder settings (see open_writer)
+            renditions: Optional output ladder (see open_writer)
+            
+        Returns:
+            Number of frames written
+        """
         # Ensure output directory exists
         os.makedirs(os.path.dirname(output_path) if os.path.dirname(output_path) else '.', 
                    exist_ok=True)
         
         # Set up video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         w, h = self.config.output_resolution
-        out = cv2.VideoWriter(output_path, fourcc, self.config.fps, (w, h))
+        out = self.open_writer(output_path, encoding, renditions)
         
         print(f"  Resolution: {w}×{h}")
+        for rendition in renditions or []:
+            rw, rh = rendition.resolution
+            print(f"    {rendition.name}: {rw}×{rh} "
+                  f"→ {rendition.output_path(output_path)}")
         print(f"  FPS: {self.config.fps}")
-        print(f"  Frames: {len(self.frames)}")
-        print(f"  Duration: {len(self.frames) / self.config.fps:.1f}s")
+        print(f"  Frames: {total}")
+        print(f"  Duration: {total / self.config.fps:.1f}s")
         
         # Write frames
-        for i, frame in enumerate(self.frames):
-            out.write(frame)
+        written = 0
+        try:
+            for frame in frames:
+                out.write(frame)
+                written += 1
+                
+                if written % 100 == 0:
+                    print(f"  Wrote {written}/{total} frames")
+        except BaseException:
+            out.abort()
+            raise
+        
+        out.close()
+        
+        if isinstance(out, ProgressiveWriter) and out.time_to_first_segment is not None:
+            self.metrics['time_to_first_segment'] = out.time_to_first_segment
+            print(f"  First segment playable after {out.time_to_first_segment:.2f}s")
+        return written
+    
+    def export_video(self, output_path: str,
+                     encoding: Optional[EncodingSettings] = None,
+                     renditions: Optional[List[Rendition]] = None) -> None:
+        """Export final video.
+        
+        Args:
+            output_path: Path to save video file
+            encoding: Optional ffmpeg encoder settings (see open_writer)
+            renditions: Optional output ladder rendered from the same
+                frames, e.g. [Rendition("1080p", (1080, 1920), "8M"),
+                Rendition("720p", (720, 1280), "4M")]
+        """
+        print("=" * 60)
+        print("STEP 6: Exporting video")
+        print("=" * 60)
+        
+        self.write_frames(self.frames, output_path, len(self.frames), encoding,
+                          renditions)
+        if renditions:
+            print(f"✓ {len(renditions)} renditions exported next to: {output_path}\n")
+        else:
+            print(f"✓ Video exported to: {output_path}\n")
+    
+    def _connect(self, frames: Iterator[np.ndarray], name: str) -> Iterator[np.ndarray]:
+        """Decouple a stage onto its own thread when running concurrently.
+        
+        Args:
+            frames: Stage output stream
+            name: Stage name
             
-            if (i + 1) % 100 == 0:
-                print(f"  Wrote {i + 1}/{len(self.frames)} frames")
+        Returns:
+            The stream, behind a bounded queue if config.concurrent_stages
+        """
+        if not self.config.concurrent_stages:
+            return frames
+        return threaded_stage(frames, self.config.stage_queue_size, name)
+    
+    def iter_final_frames(self, clean_plate=None) -> Iterator[np.ndarray]:
+        """Stream final frames through all stages.
+        
+        With config.concurrent_stages, generate, style, motion and overlay
+        each run on their own thread, connected by bounded queues of
+        config.stage_queue_size frames; the consumer (usually the
+        encoder) is the last stage. A slow stage blocks its upstream, so
+        memory stays bounded and throughput approaches the slowest stage.
+        
+        With config.render_processes > 1, frames are instead rendered by
+        worker processes through a shared-memory ring buffer (see
+        ShardedRenderer).
+        
+        Args:
+            clean_plate: Optional writer that receives every frame before
+                overlays (see rerender_overlays)
+        
+        Yields:
+            Final frames, in order
+        """
+        if self.config.render_processes > 1:
+            if clean_plate is not None:
+                raise ValueError("clean plate export requires render_processes == 1")
+            renderer = ShardedRenderer(self, self.config.render_processes,
+                                       self.config.render_chunk_size)
+            return renderer.iter_frames()
+        
+        total = self.config.total_frames
+        
+        frames = self.iter_clean_frames()
+        if clean_plate is not None:
+            frames = self._tee(frames, clean_plate)
+        # Motion output is freshly allocated per frame, so draw on it directly
+        frames = self._connect(self.iter_overlays(frames, total, in_place=True), "overlay")
+        return frames
+    
+    def iter_clean_frames(self) -> Iterator[np.ndarray]:
+        """Stream frames through every stage before overlays.
+        
+        Yields:
+            Generated, styled and moved frames, in order
+        """
+        total = self.config.total_frames
+        
+        frames = self._connect(self.iter_base_video(), "generate")
+        frames = self._connect(self.iter_visual_style(frames), "style")
+        return self._connect(self.iter_motion_effects(frames, total), "motion")
+    
+    @staticmethod
+    def _tee(frames: Iterable[np.ndarray], writer) -> Iterator[np.ndarray]:
+        """Pass frames through, writing a copy of each to a second writer."""
+        for frame in frames:
+            writer.write(frame.copy())
+            yield frame
+    
+    def open_clean_plate(self, path: str) -> FFmpegWriter:
+        """Open a writer for the pre-overlay frames (the clean plate).
+        
+        The plate is encoded with the configured codec at
+        config.clean_plate_crf, so overlays can later be re-rendered on
+        top of it with little generation loss.
+        
+        Args:
+            path: Clean plate video path
+            
+        Returns:
+            FFmpegWriter instance
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        settings = replace(EncodingSettings.from_config(self.config),
+                           crf=self.config.clean_plate_crf, bitrate=None)
+        return FFmpegWriter(path, self.config.fps, self.config.output_resolution,
+                            settings, self.config.writer_queue_size)
+    
+    def render_frame(self, frame_idx: int) -> np.ndarray:
+        """Render the final frame at any index without the full timeline.
+        
+        Every stage is stateless per frame (tiled crossfade, style RNG,
+        scheduled motion and pattern breaks, captions, progress bar), so
+        the result is identical to the same frame of a full render.
+        
+        Args:
+            frame_idx: Frame index (negative values count from the end)
+            
+        Returns:
+            Final frame (H, W, C) in BGR
+        """
+        timeline = self.get_timeline()
+        total = len(timeline)
+        
+        if frame_idx < 0:
+            frame_idx += total
+        if not 0 <= frame_idx < total:
+            raise IndexError(f"frame index {frame_idx} out of range for {total} frames")
+        
+        frame = self.style.apply_full_style(timeline[frame_idx], frame_idx)
+        frame = self.motion.apply_scheduled(frame, self.get_motion_schedule(total),
+                                            frame_idx)
+        return self.overlay.apply_overlays(frame, frame_idx, total, in_place=True)
+    
+    def render_range(self, start: int, stop: int) -> List[np.ndarray]:
+        """Render final frames start..stop-1 independently of other frames.
+        
+        Args:
+            start: First frame index
+            stop: End frame index (exclusive)
+            
+        Returns:
+            List of final frames
+        """
+        return [self.render_frame(i) for i in range(start, stop)]
+    
+    def run_streaming_pipeline(self, output_path: str,
+                               captions: Optional[List[tuple]] = None,
+                               encoding: Optional[EncodingSettings] = None,
+                               renditions: Optional[List[Rendition]] = None,
+                               clean_plate_path: Optional[str] = None) -> Dict[str, float]:
+        """Run the pipeline with frames streamed through every stage.
+        
+        Stages are chained generators, so each frame flows from the
+        generator through style, motion and overlays straight into the
+        video writer. Peak memory is the base clip plus a handful of
+        in-flight frames, independent of target duration. Output is
+        identical to run_full_pipeline(); self.frames is left untouched.
+        
+        Args:
+            output_path: Path to save final video
+            captions: Optional list of (text, start_frame) captions
+            encoding: Optional ffmpeg encoder settings (see open_writer)
+            renditions: Optional output ladder (see export_video)
+            clean_plate_path: Also export the frames before overlays, so
+                captions can be fixed later with rerender_overlays()
+            
+        Returns:
+            Export metrics, e.g. time_to_first_segment (seconds from the
+            start of the job) with config.progressive_format
+        """
+        self._job_start = time.perf_counter()
+        self.metrics = {}
+        
+        print("\n" + "=" * 60)
+        print("VISUAL ENGAGEMENT VIDEO GENERATOR (streaming)")
+        print("=" * 60 + "\n")
+        
+        if captions:
+            self.add_captions(captions)
+        
+        total = self.config.total_frames
+        plate = self.open_clean_plate(clean_plate_path) if clean_plate_path else None
+        
+        print("=" * 60)
+        print("Rendering and exporting video")
+        print("=" * 60)
+        
+        try:
+            frames = self.iter_final_frames(plate)
+            self.write_frames(frames, output_path, total, encoding, renditions)
+        except BaseException:
+            if plate is not None:
+                plate.abort()
+            raise
         
-        out.release()
         print(f"✓ Video exported to: {output_path}\n")
+        if plate is not None:
+            plate.close()
+            print(f"✓ Clean plate exported to: {clean_plate_path}\n")
+        print("=" * 60)
+        print("PIPELINE COMPLETE!")
+        print("=" * 60)
+        print(f"\nOutput video: {output_path}")
+        print(f"Duration: {self.config.target_duration}s")
+        print(f"Resolution: {self.config.output_resolution[0]}×{self.config.output_resolution[1]}")
+        print(f"FPS: {self.config.fps}")
+        return self.metrics
+    
+    def rerender_overlays(self, input_path: str, output_path: str,
+                          captions: Optional[List[tuple]] = None,
+                          encoding: Optional[EncodingSettings] = None,
+                          renditions: Optional[List[Rendition]] = None) -> int:
+        """Re-apply overlays to an already rendered video.
+        
+        Decodes input_path on a reader thread, applies only the overlay
+        stage and streams the result into the writer, so memory stays
+        constant and no generation, style or motion work is repeated.
+        The input should be a clean plate (see run_streaming_pipeline);
+        on a video that already has overlays the new ones are drawn on
+        top of the old ones.
+        
+        Args:
+            input_path: Rendered video without overlays
+            output_path: Path to save the re-rendered video
+            captions: New (text, start_frame) captions; replaces the
+                current captions when given
+            encoding: Optional ffmpeg encoder settings (see open_writer)
+            renditions: Optional output ladder (see export_video)
+            
+        Returns:
+            Number of frames written
+        """
+        print("=" * 60)
+        print("Re-rendering overlays")
+        print("=" * 60)
+        
+        if captions is not None:
+            self.overlay.captions = []
+            self.add_captions(captions)
+        
+        reader = ThreadedVideoReader(input_path, self.config.writer_queue_size)
+        if reader.size != tuple(self.config.output_resolution):
+            reader.close()
+            raise ValueError(f"{input_path} is {reader.size[0]}×{reader.size[1]}, "
+                             f"config expects {self.config.output_resolution[0]}×"
+                             f"{self.config.output_resolution[1]}")
+        
+        total = reader.frame_count or self.config.total_frames
+        # Decoded frames belong to the reader alone, so draw on them directly
+        frames = self._connect(self.iter_overlays(reader, total, in_place=True), "overlay")
+        try:
+            written = self.write_frames(frames, output_path, total, encoding, renditions)
+        finally:
+            reader.close()
+        
+        print(f"✓ Video re-rendered to: {output_path}\n")
+        return written
+    
+    def run_variants(self, output_path: str, variants: List[OverlayVariant],
+                     encoding: Optional[EncodingSettings] = None) -> Dict[str, str]:
+        """Render several overlay variants of one video in a single pass.
+        
+        Generation, style and motion run once; every post-motion frame is
+        fanned out to one overlay and one writer per variant, so each
+        extra variant costs roughly an overlay pass plus an encode.
+        Consecutive frames are overlaid on config.stage_threads threads;
+        the variants of one frame are drawn one after another in the
+        same task.
+        
+        Args:
+            output_path: Base output path; variants are written next to it
+                (see OverlayVariant.resolve_path)
+            variants: Variants with their captions and progress_bar_*
+                overrides
+            encoding: Optional ffmpeg encoder settings (see open_writer)
+            
+        Returns:
+            Dictionary mapping variant name to output path
+        """
+        if not variants:
+            raise ValueError("no variants given")
+        if self.config.render_processes > 1:
+            raise ValueError("variant rendering requires render_processes == 1")
+        
+        print("\n" + "=" * 60)
+        print(f"VISUAL ENGAGEMENT VIDEO GENERATOR ({len(variants)} variants)")
+        print("=" * 60 + "\n")
+        
+        overlays = [variant.make_overlay(self.config) for variant in variants]
+        paths = {variant.name: variant.resolve_path(output_path) for variant in variants}
+        if len(paths) != len(variants):
+            raise ValueError("variant names must be unique")
+        
+        total = self.config.total_frames
+        writers = []
+        try:
+            for variant in variants:
+                path = paths[variant.name]
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                writers.append(self.open_writer(path, encoding))
+                print(f"  {variant.name}: {len(variant.captions)} captions → {path}")
+            
+            def overlay_variants(item):
+                i, frame = item
+                # The last variant draws on the shared frame itself
+                return [overlay.apply_overlays(frame, i, total, in_place=k == len(overlays) - 1)
+                        for k, overlay in enumerate(overlays)]
+            
+            written = 0
+            for outputs in ordered_map(overlay_variants, enumerate(self.iter_clean_frames()),
+                                       self.config.stage_threads):
+                for writer, frame in zip(writers, outputs):
+                    writer.write(frame)
+                written += 1
+                if written % 100 == 0:
+                    print(f"  Wrote {written}/{total} frames")
+        except BaseException:
+            for writer in writers:
+                writer.abort()
+            raise
+        
+        for writer in writers:
+            writer.close()
+        
+        print(f"✓ {len(variants)} variants exported\n")
+        return paths
+    
+    def export_overlay_track(self, output_path: str, codec: str = "png") -> int:
+        """Export only the overlays (captions, progress bar) with alpha.
+        
+        The track is rendered onto a transparent canvas, so it can be
+        composited over any background later, e.g. with ffmpeg's overlay
+        filter, without re-rendering. Frames whose layers are unchanged
+        from the previous frame are not rendered again; in a PNG
+        sequence they are not stored either.
+        
+        Args:
+            output_path: Directory for "png"; .mov file for "qtrle"
+                (QuickTime Animation) or "prores" (ProRes 4444)
+            codec: "png", "qtrle" or "prores"
+            
+        Returns:
+            Number of distinct overlay frames rendered
+        """
+        if codec != "png" and codec not in ALPHA_CODECS:
+            raise ValueError(f"codec must be 'png' or one of {sorted(ALPHA_CODECS)}, got {codec!r}")
+        
+        print("=" * 60)
+        print(f"Exporting overlay track ({codec})")
+        print("=" * 60)
+        
+        w, h = self.config.output_resolution
+        total = self.config.total_frames
+        compositor = self.overlay.compositor
+        
+        if codec == "png":
+            writer = PNGSequenceWriter(output_path, self.config.fps)
+        else:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            settings, output_args = ALPHA_CODECS[codec]
+            writer = FFmpegWriter(output_path, self.config.fps, (w, h), settings,
+                                  self.config.writer_queue_size, output_args,
+                                  input_pix_fmt='bgra')
+        
+        rendered = 0
+        last_state = last_frame = None
+        try:
+            for i in range(total):
+                state = compositor.state(i, total, (h, w))
+                if last_frame is not None and state == last_state:
+                    if codec == "png":
+                        writer.repeat()
+                    else:
+                        writer.write(last_frame)
+                    continue
+                
+                last_frame = compositor.render_rgba(i, total, (h, w))
+                last_state = state
+                writer.write(last_frame)
+                rendered += 1
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        
+        print(f"  Rendered {rendered} distinct frames of {total}")
+        print(f"✓ Overlay track exported to: {output_path}\n")
+        return rendered
     
     def run_full_pipeline(self, output_path: str, 
                          captions: Optional[List[tuple]] = None) -> None:
@@ -0,0 +1,43 @@
+"""
+Deterministic per-frame random number generation.
+
+Every random draw in the pipeline is keyed by (seed, stage, frame_idx)
+through a counter-based Philox generator, so a frame renders bit-identical
+no matter which worker renders it or in which order.
+"""
+import zlib
+import numpy as np
+
+
+def stage_key(stage: str) -> int:
+    """Map a stage name to a stable 32-bit identifier.
+    
+    Args:
+        stage: Stage name (e.g. "noise", "neon")
+        
+    Returns:
+        Stable integer key for the stage
+    """
+    return zlib.crc32(stage.encode('utf-8'))
+
+
+def frame_rng(seed: int, stage: str, frame_idx: int) -> np.random.Generator:
+    """Create the random generator for one frame of one stage.
+    
+    The seed is the Philox key; stage and frame index occupy the high
+    words of the 256-bit counter, leaving the low word for the draws
+    themselves, so streams never overlap.
+    
+    Args:
+        seed: Global generation seed
+        stage: Stage name
+        frame_idx: Frame index within the stage
+        
+    Returns:
+        Independent np.random.Generator for this (seed, stage, frame)
+    """
+    bit_generator = np.random.Philox(
+        key=seed & ((1 << 128) - 1),
+        counter=[0, 0, stage_key(stage), frame_idx],
+    )
+    return np.random.Generator(bit_generator)
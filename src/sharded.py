@@ -0,0 +1,201 @@
+"""
+Process-sharded rendering with a shared-memory frame ring buffer.
+"""
+import multiprocessing as mp
+import queue
+import traceback
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Pipeline handed to forked workers without pickling (set while starting)
+_FORK_PIPELINE = None
+
+
+def _load_worker_pipeline(config, captions: List[dict]):
+    """Build a worker pipeline when it cannot be inherited via fork."""
+    if '.' not in __name__:
+        from pipeline import VideoPipeline
+    else:
+        from .pipeline import VideoPipeline
+    
+    pipeline = VideoPipeline(config)
+    pipeline.overlay.captions = list(captions)
+    return pipeline
+
+
+def _shard_worker(worker_idx: int, config, captions: List[dict], shm_name: str,
+                  shape: Tuple[int, ...], chunks: List[Tuple[int, int]],
+                  slot_frames, consumed, cond, errors) -> None:
+    """Worker process: render owned frame chunks into the ring buffer.
+    
+    Frame i goes to slot i % slots once the exporter has drained the
+    frame that previously occupied that slot.
+    """
+    shm = None
+    try:
+        pipeline = _FORK_PIPELINE or _load_worker_pipeline(config, captions)
+        shm = shared_memory.SharedMemory(name=shm_name)
+        ring = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        slots = shape[0]
+        
+        for start, stop in chunks:
+            for i in range(start, stop):
+                frame = pipeline.render_frame(i)
+                slot = i % slots
+                
+                with cond:
+                    while consumed.value <= i - slots:
+                        cond.wait()
+                
+                ring[slot] = frame
+                
+                with cond:
+                    slot_frames[slot] = i
+                    cond.notify_all()
+        
+        del ring
+    except BaseException:
+        errors.put((worker_idx, traceback.format_exc()))
+        raise
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class ShardedRenderer:
+    """Renders final frames across worker processes.
+    
+    The timeline is split into chunks of chunk_size frames that are
+    dealt round-robin to the workers, so every worker owns an
+    interleaved set of frame ranges. Workers render with the stateless
+    VideoPipeline.render_frame() and write finished frames into a
+    multiprocessing.shared_memory ring buffer; the exporter drains it in
+    frame order. No frame is ever pickled. If a worker dies or raises,
+    the remaining workers are terminated and the job fails with
+    RuntimeError instead of hanging.
+    """
+    
+    def __init__(self, pipeline, workers: int, chunk_size: int = 8,
+                 ring_slots: Optional[int] = None, poll_interval: float = 0.5):
+        """Initialize sharded renderer.
+        
+        Args:
+            pipeline: VideoPipeline with captions already added
+            workers: Number of worker processes
+            chunk_size: Frames per owned chunk
+            ring_slots: Ring buffer capacity in frames
+                (defaults to 2 * workers * chunk_size)
+            poll_interval: Seconds between worker health checks while waiting
+        """
+        self.pipeline = pipeline
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.ring_slots = ring_slots or 2 * workers * chunk_size
+        self.poll_interval = poll_interval
+    
+    def assign_chunks(self, total: int) -> List[List[Tuple[int, int]]]:
+        """Deal frame chunks to workers round-robin.
+        
+        Args:
+            total: Total number of frames
+            
+        Returns:
+            Per-worker lists of (start, stop) frame ranges
+        """
+        assignments = [[] for _ in range(self.workers)]
+        for k, start in enumerate(range(0, total, self.chunk_size)):
+            stop = min(start + self.chunk_size, total)
+            assignments[k % self.workers].append((start, stop))
+        return assignments
+    
+    def iter_frames(self) -> Iterator[np.ndarray]:
+        """Render all frames and yield them in order.
+        
+        Yields:
+            Final frames, in order
+        """
+        global _FORK_PIPELINE
+        
+        pipeline = self.pipeline
+        config = pipeline.config
+        timeline = pipeline.get_timeline()
+        total = len(timeline)
+        pipeline.get_motion_schedule(total)
+        
+        w, h = config.output_resolution
+        shape = (self.ring_slots, h, w, 3)
+        
+        use_fork = 'fork' in mp.get_all_start_methods()
+        ctx = mp.get_context('fork' if use_fork else None)
+        cond = ctx.Condition()
+        consumed = ctx.Value('q', 0, lock=False)
+        slot_frames = ctx.Array('q', [-1] * self.ring_slots, lock=False)
+        errors = ctx.Queue()
+        
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        processes = []
+        try:
+            ring = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            captions = pipeline.overlay.captions
+            
+            if use_fork:
+                _FORK_PIPELINE = pipeline
+            try:
+                for worker_idx, chunks in enumerate(self.assign_chunks(total)):
+                    process = ctx.Process(
+                        target=_shard_worker,
+                        args=(worker_idx, config, captions, shm.name, shape,
+                              chunks, slot_frames, consumed, cond, errors),
+                        daemon=True,
+                    )
+                    process.start()
+                    processes.append(process)
+            finally:
+                _FORK_PIPELINE = None
+            
+            for i in range(total):
+                slot = i % self.ring_slots
+                
+                with cond:
+                    while slot_frames[slot] != i:
+                        if not cond.wait(self.poll_interval):
+                            self._check_workers(processes, errors)
+                
+                frame = ring[slot].copy()
+                
+                with cond:
+                    consumed.value = i + 1
+                    cond.notify_all()
+                
+                yield frame
+            
+            del ring
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            for process in processes:
+                process.join()
+            shm.close()
+            shm.unlink()
+    
+    def _check_workers(self, processes: List, errors) -> None:
+        """Fail the job if any worker has crashed.
+        
+        Raises:
+            RuntimeError: If a worker raised or exited abnormally
+        """
+        try:
+            worker_idx, details = errors.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            raise RuntimeError(f"Shard worker {worker_idx} failed:\n{details}")
+        
+        for worker_idx, process in enumerate(processes):
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(
+                    f"Shard worker {worker_idx} exited with code {process.exitcode}"
+                )
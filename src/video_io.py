@@ -0,0 +1,886 @@
+"""
+Video encoding backends and exporters.
+"""
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def get_ffmpeg_exe() -> str:
+    """Locate an ffmpeg binary.
+    
+    Prefers the binary bundled with imageio-ffmpeg, falling back to
+    ffmpeg on PATH.
+    
+    Returns:
+        Path to the ffmpeg executable
+        
+    Raises:
+        RuntimeError: If no ffmpeg binary is available
+    """
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        pass
+    
+    exe = shutil.which('ffmpeg')
+    if exe is None:
+        raise RuntimeError("ffmpeg not found: install imageio-ffmpeg or add ffmpeg to PATH")
+    return exe
+
+
+_READER_END = object()
+
+
+class ThreadedVideoReader:
+    """Decodes a video on a background thread into a bounded queue.
+    
+    Decoding overlaps whatever the consumer does with each frame, and
+    memory stays at queue_size frames regardless of video length.
+    """
+    
+    def __init__(self, path: str, queue_size: int = 16):
+        """Open a video for reading.
+        
+        Args:
+            path: Video file path
+            queue_size: Frames decoded ahead of the consumer
+        """
+        self.path = path
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Could not open video {path}")
+        
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.size = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                     int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.error: Optional[BaseException] = None
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='video-reader',
+                                       daemon=True)
+        self.thread.start()
+    
+    def _run(self) -> None:
+        """Reader thread: decode frames until the end of the video."""
+        try:
+            while not self.stop.is_set():
+                ok, frame = self.capture.read()
+                if not ok:
+                    break
+                while not self.stop.is_set():
+                    try:
+                        self.frames.put(frame, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            self.capture.release()
+            while not self.stop.is_set():
+                try:
+                    self.frames.put(_READER_END, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+    
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """Yield decoded BGR frames in order.
+        
+        Raises:
+            RuntimeError: If decoding failed
+        """
+        try:
+            while True:
+                frame = self.frames.get()
+                if frame is _READER_END:
+                    break
+                yield frame
+            if self.error is not None:
+                raise RuntimeError(f"Decoding {self.path} failed: {self.error}")
+        finally:
+            self.close()
+    
+    def close(self) -> None:
+        """Stop decoding and release the file."""
+        self.stop.set()
+        self.thread.join()
+
+
+class OpenCVWriter:
+    """Frame writer backed by cv2.VideoWriter (MPEG-4 Part 2)."""
+    
+    def __init__(self, output_path: str, fps: int, size: Tuple[int, int]):
+        """Open video writer.
+        
+        Args:
+            output_path: Path to save video file
+            fps: Frame rate
+            size: Frame size as (width, height)
+        """
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.writer = cv2.VideoWriter(output_path, fourcc, fps, size)
+        if not self.writer.isOpened():
+            raise RuntimeError(f"Could not open video writer for {output_path}")
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Encode one BGR frame."""
+        self.writer.write(frame)
+    
+    def close(self) -> None:
+        """Finish the file."""
+        self.writer.release()
+    
+    def abort(self) -> None:
+        """Stop writing, keeping whatever was encoded so far."""
+        self.writer.release()
+
+
+# Human-readable codec names (as in structure['encoding']) to ffmpeg encoders
+CODEC_ALIASES = {
+    'h.264': 'libx264',
+    'h264': 'libx264',
+    'avc': 'libx264',
+    'h.265': 'libx265',
+    'h265': 'libx265',
+    'hevc': 'libx265',
+}
+
+
+@dataclass
+class EncodingSettings:
+    """Encoder settings for the ffmpeg backend."""
+    
+    codec: str = 'libx264'
+    preset: str = 'medium'
+    crf: Optional[int] = None  # Constant quality; takes precedence over bitrate
+    bitrate: Optional[str] = '8M'  # Target bitrate (peak bitrate when crf is set)
+    gop_size: Optional[int] = None  # Frames per GOP (None = 2 seconds)
+    pixel_format: str = 'yuv420p'
+    
+    @classmethod
+    def from_config(cls, config) -> 'EncodingSettings':
+        """Create settings from a GenerationConfig.
+        
+        Args:
+            config: GenerationConfig instance
+            
+        Returns:
+            EncodingSettings instance
+        """
+        return cls(codec=CODEC_ALIASES.get(config.video_codec.lower(), config.video_codec),
+                   preset=config.encoder_preset, crf=config.crf,
+                   bitrate=config.bitrate, gop_size=config.gop_frames,
+                   pixel_format=config.pixel_format)
+    
+    @classmethod
+    def from_structure(cls, structure: Dict, **overrides) -> 'EncodingSettings':
+        """Create settings from a video structure's encoding spec.
+        
+        Accepts either the structure returned by
+        create_video_structure_from_srt() or its 'encoding' dict.
+        
+        Args:
+            structure: Video structure or encoding dictionary
+            **overrides: Fields to override (e.g. preset, crf)
+            
+        Returns:
+            EncodingSettings instance
+        """
+        encoding = structure.get('encoding', structure)
+        settings = cls()
+        
+        codec = encoding.get('codec')
+        if codec:
+            settings.codec = CODEC_ALIASES.get(codec.lower(), codec)
+        settings.bitrate = encoding.get('bitrate', settings.bitrate)
+        settings.gop_size = encoding.get('gop_size', settings.gop_size)
+        settings.pixel_format = encoding.get('pixel_format', settings.pixel_format)
+        
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        return settings
+    
+    def ffmpeg_args(self, fps: int) -> List[str]:
+        """Build ffmpeg output arguments for these settings.
+        
+        Args:
+            fps: Frame rate (for the default GOP)
+            
+        Returns:
+            List of ffmpeg command-line arguments
+        """
+        args = ['-c:v', self.codec]
+        if self.preset:
+            args += ['-preset', self.preset]
+        
+        if self.crf is not None:
+            args += ['-crf', str(self.crf)]
+            if self.bitrate:
+                args += ['-maxrate', self.bitrate, '-bufsize', self.bitrate]
+        elif self.bitrate:
+            args += ['-b:v', self.bitrate]
+        
+        gop = self.gop_size or fps * 2
+        args += ['-g', str(gop), '-keyint_min', str(gop), '-sc_threshold', '0',
+                 '-pix_fmt', self.pixel_format]
+        return args
+
+
+# Container names to ffmpeg muxers
+CONTAINER_FORMATS = {
+    'mp4': 'mp4',
+    'mov': 'mov',
+    'mkv': 'matroska',
+    'webm': 'webm',
+    'ts': 'mpegts',
+}
+
+
+@dataclass
+class Rendition:
+    """One output of a multi-rendition export (e.g. a platform/bitrate tier)."""
+    
+    name: str
+    resolution: Tuple[int, int]  # (width, height); even sizes for yuv420p
+    bitrate: Optional[str] = None  # None = bitrate of the base encoder settings
+    container: str = 'mp4'
+    path: Optional[str] = None  # None = derived from the export path
+    
+    def output_path(self, base_path: str) -> str:
+        """Resolve the file path of this rendition.
+        
+        Args:
+            base_path: Path passed to the export, e.g. "out/video.mp4"
+            
+        Returns:
+            self.path, or "<base stem>_<name>.<container>"
+        """
+        if self.path:
+            return self.path
+        stem = os.path.splitext(base_path)[0]
+        return f"{stem}_{self.name}.{self.container}"
+    
+    def encoding(self, base: EncodingSettings) -> EncodingSettings:
+        """Encoder settings for this rendition.
+        
+        Args:
+            base: Shared encoder settings
+            
+        Returns:
+            base with this rendition's bitrate applied
+        """
+        if self.bitrate is None:
+            return base
+        return replace(base, bitrate=self.bitrate)
+    
+    def output_args(self) -> List[str]:
+        """ffmpeg arguments selecting the container."""
+        return ['-f', CONTAINER_FORMATS.get(self.container, self.container)]
+
+
+def downscale_pyramid(frame: np.ndarray,
+                      sizes: List[Tuple[int, int]]) -> Dict[Tuple[int, int], np.ndarray]:
+    """Resize a frame to several sizes, reusing larger levels.
+    
+    Sizes are produced largest first, and each is resized from the
+    smallest level already computed that covers it, so a ladder of
+    renditions costs about one full-resolution resize rather than one
+    per output.
+    
+    Args:
+        frame: Source frame (H, W, C)
+        sizes: Target sizes as (width, height)
+        
+    Returns:
+        Dictionary mapping (width, height) to frame; the source frame
+        itself is returned for its own size
+    """
+    h, w = frame.shape[:2]
+    levels = {(w, h): frame}
+    
+    for size in sorted(set(sizes), key=lambda s: s[0] * s[1], reverse=True):
+        if size in levels:
+            continue
+        covering = [s for s in levels if s[0] >= size[0] and s[1] >= size[1]]
+        if covering:
+            source = min(covering, key=lambda s: s[0] * s[1])
+            interpolation = cv2.INTER_AREA
+        else:
+            source = (w, h)
+            interpolation = cv2.INTER_LINEAR
+        levels[size] = cv2.resize(levels[source], size, interpolation=interpolation)
+    
+    return levels
+
+
+class RenditionWriter:
+    """Feeds one stream of frames to several writers at different sizes.
+    
+    Each frame is scaled once per distinct size through a shared
+    downscale pyramid and handed to every writer of that size.
+    """
+    
+    def __init__(self, outputs: List[Tuple[Tuple[int, int], object]]):
+        """Initialize rendition writer.
+        
+        Args:
+            outputs: List of ((width, height), writer) pairs; writers
+                provide write/close/abort
+        """
+        self.outputs = outputs
+        self.sizes = [size for size, _ in outputs]
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Scale and encode one frame for every rendition.
+        
+        Args:
+            frame: Full-resolution BGR frame
+        """
+        levels = downscale_pyramid(frame, self.sizes)
+        for size, writer in self.outputs:
+            writer.write(levels[size])
+    
+    def close(self) -> None:
+        """Finish every rendition, then raise the first failure, if any."""
+        error = None
+        for _, writer in self.outputs:
+            try:
+                writer.close()
+            except Exception as exc:
+                error = error or exc
+        if error is not None:
+            raise error
+    
+    def abort(self) -> None:
+        """Stop every rendition."""
+        for _, writer in self.outputs:
+            writer.abort()
+
+
+_WRITER_END = object()
+
+
+class FFmpegWriter:
+    """Frame writer that streams raw BGR frames to an ffmpeg subprocess.
+    
+    Frames are handed to a dedicated writer thread through a bounded
+    queue, so encoding overlaps rendering; when ffmpeg falls behind,
+    write() blocks.
+    """
+    
+    def __init__(self, output_path: str, fps: int, size: Tuple[int, int],
+                 settings: Optional[EncodingSettings] = None,
+                 queue_size: int = 16,
+                 output_args: Optional[List[str]] = None,
+                 input_pix_fmt: str = 'bgr24'):
+        """Start ffmpeg and the writer thread.
+        
+        Args:
+            output_path: Path to save video file
+            fps: Frame rate
+            size: Frame size as (width, height)
+            settings: Encoder settings (defaults to EncodingSettings())
+            queue_size: Frames buffered ahead of the encoder
+            output_args: Extra ffmpeg arguments placed before the output path
+            input_pix_fmt: Layout of the frames passed to write()
+                ("bgr24", or "bgra" for frames with alpha)
+        """
+        self.output_path = output_path
+        self.settings = settings or EncodingSettings()
+        w, h = size
+        
+        cmd = [get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', input_pix_fmt, '-s', f'{w}x{h}',
+               '-r', str(fps), '-i', '-', '-an']
+        cmd += self.settings.ffmpeg_args(fps)
+        cmd += output_args or []
+        cmd.append(output_path)
+        
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                                        stderr=self.stderr)
+        self.frames = queue.Queue(maxsize=max(1, queue_size))
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(target=self._run, name='ffmpeg-writer',
+                                       daemon=True)
+        self.thread.start()
+    
+    def _run(self) -> None:
+        """Writer thread: pipe queued frames into ffmpeg."""
+        try:
+            while True:
+                frame = self.frames.get()
+                if frame is _WRITER_END:
+                    break
+                self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BaseException as exc:
+            self.error = exc
+            # Keep draining so producers never block on a dead writer
+            while self.frames.get() is not _WRITER_END:
+                pass
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Queue one BGR frame for encoding.
+        
+        Args:
+            frame: BGR frame; it must not be modified afterwards
+        """
+        if self.error is not None:
+            raise RuntimeError(f"ffmpeg writer failed: {self._stderr_text() or self.error}")
+        self.frames.put(frame)
+    
+    def _stderr_text(self) -> str:
+        """Read what ffmpeg reported on stderr."""
+        self.stderr.seek(0)
+        return self.stderr.read().decode('utf-8', errors='replace').strip()
+    
+    def close(self) -> None:
+        """Flush remaining frames and finish the file."""
+        self.frames.put(_WRITER_END)
+        self.thread.join()
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        returncode = self.process.wait()
+        message = self._stderr_text()
+        self.stderr.close()
+        
+        if self.error is not None or returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {returncode}: "
+                               f"{message or self.error}")
+    
+    def abort(self) -> None:
+        """Stop encoding immediately."""
+        self.process.kill()
+        self.frames.put(_WRITER_END)
+        self.thread.join()
+        self.process.wait()
+        self.stderr.close()
+
+
+PROGRESSIVE_FORMATS = ("hls", "fmp4")
+
+
+class ProgressiveWriter:
+    """Encodes frames as HLS segments or fragmented MP4 while rendering.
+    
+    Output becomes playable as soon as the first segment (HLS) or
+    fragment (fMP4) is complete, long before the render finishes. A
+    watcher thread records when that happens as time_to_first_segment,
+    measured from start_time.
+    """
+    
+    def __init__(self, output_path: str, fps: int, size: Tuple[int, int],
+                 settings: Optional[EncodingSettings] = None,
+                 mode: str = "hls", segment_seconds: float = 2.0,
+                 queue_size: int = 16, start_time: Optional[float] = None,
+                 poll_interval: float = 0.05):
+        """Start the encoder and the segment watcher.
+        
+        Args:
+            output_path: Playlist path (HLS, e.g. "out/video.m3u8") or
+                fragmented MP4 path
+            fps: Frame rate
+            size: Frame size as (width, height)
+            settings: Encoder settings; the GOP is aligned to the segment
+                duration so every segment starts on a keyframe
+            mode: "hls" or "fmp4"
+            segment_seconds: Target segment/fragment duration
+            queue_size: Frames buffered ahead of the encoder
+            start_time: time.perf_counter() value the metric is measured
+                from (defaults to now)
+            poll_interval: Seconds between output checks
+        """
+        if mode not in PROGRESSIVE_FORMATS:
+            raise ValueError(f"mode must be one of {PROGRESSIVE_FORMATS}, got {mode!r}")
+        
+        self.output_path = output_path
+        self.mode = mode
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.poll_interval = poll_interval
+        self.time_to_first_segment: Optional[float] = None
+        
+        segment_frames = max(1, int(round(segment_seconds * fps)))
+        settings = replace(settings or EncodingSettings(), gop_size=segment_frames)
+        
+        if mode == "hls":
+            stem = os.path.splitext(output_path)[0]
+            output_args = ['-f', 'hls', '-hls_time', str(segment_seconds),
+                           '-hls_list_size', '0', '-hls_playlist_type', 'event',
+                           '-hls_flags', 'independent_segments',
+                           '-hls_segment_filename', f"{stem}_%05d.ts"]
+        else:
+            output_args = ['-f', 'mp4',
+                           '-movflags', 'frag_keyframe+empty_moov+default_base_moof']
+        
+        self.writer = FFmpegWriter(output_path, fps, size, settings, queue_size,
+                                   output_args)
+        self.done = threading.Event()
+        self.watcher = threading.Thread(target=self._watch, name='segment-watcher',
+                                        daemon=True)
+        self.watcher.start()
+    
+    def _first_segment_ready(self) -> bool:
+        """Check whether the first segment or fragment has been written."""
+        try:
+            if self.mode == "hls":
+                # ffmpeg lists a segment in the playlist once it is complete
+                with open(self.output_path, 'r', encoding='utf-8') as f:
+                    return any(line.strip() and not line.startswith('#') for line in f)
+            with open(self.output_path, 'rb') as f:
+                return b'moof' in f.read()
+        except OSError:
+            return False
+    
+    def _watch(self) -> None:
+        """Watcher thread: record the time the output became playable."""
+        while True:
+            finished = self.done.wait(self.poll_interval)
+            if self._first_segment_ready():
+                self.time_to_first_segment = time.perf_counter() - self.start_time
+                return
+            if finished:
+                return
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Queue one BGR frame for encoding."""
+        self.writer.write(frame)
+    
+    def close(self) -> None:
+        """Finish the stream and the watcher."""
+        try:
+            self.writer.close()
+        finally:
+            self.done.set()
+            self.watcher.join()
+    
+    def abort(self) -> None:
+        """Stop encoding immediately."""
+        self.writer.abort()
+        self.done.set()
+        self.watcher.join()
+
+
+# Codecs with an alpha channel for overlay tracks: (settings, extra output args)
+ALPHA_CODECS = {
+    'qtrle': (EncodingSettings(codec='qtrle', preset=None, bitrate=None,
+                               pixel_format='argb'), []),
+    'prores': (EncodingSettings(codec='prores_ks', preset=None, bitrate=None,
+                                pixel_format='yuva444p10le'), ['-profile:v', '4444']),
+}
+
+
+class PNGSequenceWriter:
+    """Writes frames with alpha as a PNG sequence, storing repeats once.
+    
+    Only frames passed to write() become files; repeat() extends the
+    previous image. The timeline is described by an ffconcat script
+    (image durations), so `ffmpeg -f concat -i <dir>/track.ffconcat`
+    reproduces it, and editors can import the numbered images.
+    """
+    
+    def __init__(self, directory: str, fps: int):
+        """Initialize PNG sequence writer.
+        
+        Args:
+            directory: Output directory
+            fps: Frame rate of the timeline
+        """
+        self.directory = directory
+        self.fps = fps
+        self.entries: List[List] = []  # [file name, frame count]
+        self.frames_written = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Store a new image for the current frame.
+        
+        Args:
+            frame: BGRA (or BGR) frame
+        """
+        name = f"frame_{self.frames_written:05d}.png"
+        if not cv2.imwrite(os.path.join(self.directory, name), frame):
+            raise RuntimeError(f"Could not write {name} to {self.directory}")
+        self.entries.append([name, 1])
+        self.frames_written += 1
+    
+    def repeat(self) -> None:
+        """Show the previous image for one more frame."""
+        if not self.entries:
+            raise RuntimeError("repeat() before the first write()")
+        self.entries[-1][1] += 1
+        self.frames_written += 1
+    
+    def close(self) -> None:
+        """Write the ffconcat timeline."""
+        lines = ["ffconcat version 1.0"]
+        for name, count in self.entries:
+            lines += [f"file '{name}'", f"duration {count / self.fps:.6f}"]
+        if self.entries:
+            # The concat demuxer ignores the duration of the last entry
+            lines.append(f"file '{self.entries[-1][0]}'")
+        with open(os.path.join(self.directory, "track.ffconcat"), 'w',
+                  encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+    
+    def abort(self) -> None:
+        """Stop writing; images written so far are kept."""
+
+
+def concat_segments(segment_paths: List[str], output_path: str) -> None:
+    """Join encoded segments without re-encoding.
+    
+    Uses the ffmpeg concat demuxer with stream copy, so segments must
+    share codec parameters and each must start on a keyframe.
+    
+    Args:
+        segment_paths: Segment files, in playback order
+        output_path: Path of the joined video
+    """
+    list_dir = os.path.dirname(os.path.abspath(segment_paths[0]))
+    fd, list_path = tempfile.mkstemp(suffix='.txt', dir=list_dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        
+        cmd = [get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+               '-f', 'concat', '-safe', '0', '-i', list_path,
+               '-c', 'copy', output_path]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg concat failed: {result.stderr.strip()}")
+    finally:
+        os.remove(list_path)
+
+
+class _SegmentBuffer:
+    """Frame FIFO between the producer and one segment encoder.
+    
+    The first memory_frames frames are kept in RAM; once that is full,
+    this and all later frames of the segment are appended to a raw spill
+    file that the encoder reads back in order. put() therefore never
+    waits for the encoder, which is what lets the producer move on to
+    the next segment while earlier ones are still encoding.
+    """
+    
+    def __init__(self, spill_path: str, memory_frames: int):
+        """Initialize buffer.
+        
+        Args:
+            spill_path: Raw file for frames beyond memory_frames
+            memory_frames: Frames held in RAM before spilling
+        """
+        self.spill_path = spill_path
+        self.memory_frames = memory_frames
+        self.memory: 'deque[np.ndarray]' = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.spilled = 0
+        self.read = 0
+        self.frame_shape: Optional[Tuple[int, ...]] = None
+        self._spill_writer = None
+        self._spill_reader = None
+    
+    def put(self, frame: np.ndarray) -> None:
+        """Append a frame without blocking on the encoder."""
+        with self.cond:
+            if self._spill_writer is None and len(self.memory) < self.memory_frames:
+                self.memory.append(frame)
+                self.cond.notify()
+                return
+        
+        if self._spill_writer is None:
+            self.frame_shape = frame.shape
+            self._spill_writer = open(self.spill_path, 'wb')
+        self._spill_writer.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        self._spill_writer.flush()
+        with self.cond:
+            self.spilled += 1
+            self.cond.notify()
+    
+    def finish(self) -> None:
+        """Mark the end of the segment."""
+        if self._spill_writer is not None:
+            self._spill_writer.close()
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+    
+    def get(self) -> Optional[np.ndarray]:
+        """Next frame in order, or None once the segment is exhausted."""
+        with self.cond:
+            while not (self.memory or self.read < self.spilled or self.closed):
+                self.cond.wait()
+            if self.memory:
+                return self.memory.popleft()
+            if self.read >= self.spilled:
+                return None
+            self.read += 1
+        
+        if self._spill_reader is None:
+            self._spill_reader = open(self.spill_path, 'rb')
+        count = int(np.prod(self.frame_shape))
+        frame = np.fromfile(self._spill_reader, dtype=np.uint8, count=count)
+        return frame.reshape(self.frame_shape)
+    
+    def release(self) -> None:
+        """Close the spill file and delete it once the producer is done with it."""
+        if self._spill_reader is not None:
+            self._spill_reader.close()
+        if self._spill_writer is not None and self._spill_writer.closed:
+            os.remove(self.spill_path)
+
+
+class SegmentedExporter:
+    """Encodes a frame stream as GOP-aligned segments in parallel.
+    
+    The timeline is cut every gop_size * segment_gops frames, so every
+    segment starts on a GOP boundary with a keyframe. Each segment is
+    encoded by its own writer on a thread pool. Frames reach it through
+    a _SegmentBuffer that holds queue_size frames in RAM and spills the
+    rest to disk, so the producer is never held up by one encoder and up
+    to `workers` segments encode at the same time. Only when `workers`
+    segments are in flight does the producer wait for the oldest one.
+    
+    Temporary disk use is bounded by the spill files: a segment whose
+    encoder falls behind can spill up to gop_size * segment_gops frames
+    of raw BGR (width * height * 3 bytes each), so the worst case is
+    about workers * gop_size * segment_gops * frame bytes, e.g. ~3.7 GB
+    for 4 workers, 150-frame segments and 1080x1920 frames. Lower
+    segment_gops to trade encoder parallelism for disk. On close() the
+    segments are joined with the ffmpeg concat demuxer without
+    re-encoding.
+    """
+    
+    def __init__(self, output_path: str, fps: int, size: Tuple[int, int],
+                 gop_size: int, segment_gops: int = 5, workers: int = 4,
+                 writer_factory: Optional[Callable[[str], object]] = None,
+                 queue_size: int = 16):
+        """Initialize segmented exporter.
+        
+        Args:
+            output_path: Path of the final joined video
+            fps: Frame rate
+            size: Frame size as (width, height)
+            gop_size: Frames per GOP
+            segment_gops: GOPs per segment
+            workers: Segments encoded concurrently
+            writer_factory: Creates a writer (write/close) for a segment
+                path; defaults to OpenCVWriter
+            queue_size: Frames per segment kept in RAM before spilling
+                to disk
+        """
+        self.output_path = output_path
+        self.segment_frames = gop_size * segment_gops
+        self.writer_factory = writer_factory or (
+            lambda path: OpenCVWriter(path, fps, size))
+        self.queue_size = queue_size
+        self.workers = workers
+        
+        ext = os.path.splitext(output_path)[1] or '.mp4'
+        self.ext = ext
+        self.segment_dir = tempfile.mkdtemp(
+            prefix='.segments_', dir=os.path.dirname(os.path.abspath(output_path)))
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.segment_paths: List[str] = []
+        self.futures = []
+        self.buffers: List[_SegmentBuffer] = []
+        self.current: Optional[_SegmentBuffer] = None
+        self.frames_written = 0
+        self._aborted = False
+    
+    def _encode_segment(self, path: str, frames: _SegmentBuffer) -> None:
+        """Encode one segment from its buffer until the segment ends."""
+        try:
+            writer = self.writer_factory(path)
+            try:
+                while not self._aborted:
+                    frame = frames.get()
+                    if frame is None:
+                        break
+                    writer.write(frame)
+            finally:
+                writer.close()
+        finally:
+            frames.release()
+    
+    def _check_encoders(self) -> None:
+        """Fail fast if a segment encoder stopped early."""
+        for future in self.futures:
+            if future.done() and future.exception() is not None:
+                future.result()
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Append one frame to the stream.
+        
+        Args:
+            frame: BGR frame
+        """
+        if self.frames_written % self.segment_frames == 0:
+            if self.current is not None:
+                self.current.finish()
+            self._check_encoders()
+            
+            # At most `workers` segments in flight: wait for the oldest
+            pending = [f for f in self.futures if not f.done()]
+            if len(pending) >= self.workers:
+                pending[0].result()
+            
+            index = len(self.segment_paths)
+            path = os.path.join(self.segment_dir, f"segment_{index:05d}{self.ext}")
+            self.segment_paths.append(path)
+            self.current = _SegmentBuffer(
+                os.path.join(self.segment_dir, f"segment_{index:05d}.raw"),
+                self.queue_size)
+            self.buffers.append(self.current)
+            self.futures.append(self.executor.submit(self._encode_segment, path,
+                                                     self.current))
+        
+        future = self.futures[-1]
+        if future.done():
+            future.result()
+            raise RuntimeError("segment encoder stopped early")
+        self.current.put(frame)
+        self.frames_written += 1
+    
+    def close(self) -> None:
+        """Finish all segments and join them into the output file."""
+        try:
+            if self.current is not None:
+                self.current.finish()
+            self.executor.shutdown(wait=True)
+            for future in self.futures:
+                future.result()
+            
+            if self.segment_paths:
+                concat_segments(self.segment_paths, self.output_path)
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            shutil.rmtree(self.segment_dir, ignore_errors=True)
+    
+    def abort(self) -> None:
+        """Stop encoding and discard all segments."""
+        self._aborted = True
+        for frames in self.buffers:
+            frames.finish()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self.segment_dir, ignore_errors=True)
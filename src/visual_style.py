@@ -3,7 +3,77 @@ Visual style processing: high contrast, neon accents, edge effects.
 """
 import numpy as np
 import cv2
-from typing import Tuple, List
+from typing import Tuple, List, Optional
+
+# Support both package and standalone execution
+if __name__ == '__main__' or '.' not in __name__:
+    from rng import frame_rng
+else:
+    from .rng import frame_rng
+
+
+# Largest LUT grid: the lookup image is 256 * size columns wide and
+# cv2.remap only addresses coordinates below SHRT_MAX
+MAX_COLOR_LUT_SIZE = 127
+
+
+class ColorLUT:
+    """3D color lookup table applied with trilinear interpolation.
+    
+    Interpolation along B is done once up front: the (N, N, N) lattice
+    is expanded to one (N, N) G/R slice per B level and the slices are
+    laid side by side into an (N, 256*N) image. Per frame, a single
+    bilinear remap then covers the G and R axes, so the lookup is one
+    uint8 OpenCV pass plus the coordinate maps.
+    """
+    
+    def __init__(self, table: np.ndarray):
+        """Prepare the lookup image.
+        
+        Args:
+            table: (N, N, N, 3) uint8 output colors, indexed [b, g, r],
+                sampled at N evenly spaced levels from 0 to 255
+            
+        Raises:
+            ValueError: If N is outside 2..MAX_COLOR_LUT_SIZE
+        """
+        size = table.shape[0]
+        if not 2 <= size <= MAX_COLOR_LUT_SIZE:
+            raise ValueError(f"LUT size must be between 2 and {MAX_COLOR_LUT_SIZE}, "
+                             f"got {size}")
+        self.size = size
+        self.table = table
+        
+        # Lattice coordinate of every 8-bit level
+        position = np.arange(256, dtype=np.float32) * (size - 1) / 255.0
+        lower = np.minimum(position.astype(np.int32), size - 2)
+        weight = (position - lower)[:, None, None, None]
+        
+        # B slices at all 256 levels; rows = G, columns = B * N + R
+        grid = table.astype(np.float32)
+        slices = grid[lower] * (1.0 - weight) + grid[lower + 1] * weight
+        image = np.round(slices).astype(np.uint8).transpose(1, 0, 2, 3)
+        image = np.ascontiguousarray(image.reshape(size, 256 * size, 3))
+        # A 4th channel keeps remap on its SIMD path
+        self._image = cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+        
+        self._position = position.reshape(1, 256)
+        self._slice_x = (np.arange(256) * size).astype(np.float32).reshape(1, 256)
+    
+    def apply(self, frame: np.ndarray) -> np.ndarray:
+        """Map every pixel of a frame through the LUT.
+        
+        Args:
+            frame: Input frame (H, W, 3) uint8 BGR
+        
+        Returns:
+            Mapped frame (H, W, 3) uint8 BGR
+        """
+        b, g, r = cv2.split(frame)
+        map_x = cv2.add(cv2.LUT(b, self._slice_x), cv2.LUT(r, self._position))
+        map_y = cv2.LUT(g, self._position)
+        result = cv2.remap(self._image, map_x, map_y, cv2.INTER_LINEAR)
+        return cv2.cvtColor(result, cv2.COLOR_BGRA2BGR)
 
 
 class VisualStyle:
@@ -16,6 +86,7 @@ class VisualStyle:
             config: GenerationConfig instance
         """
         self.config = config
+        self.color_lut = self.compile_color_lut()
         
     def apply_dark_base(self, frame: np.ndarray) -> np.ndarray:
         """Apply dark midtone base layer.
@@ -67,12 +138,15 @@ class VisualStyle:
         
         return edges
     
-    def apply_neon_edges(self, frame: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    def apply_neon_edges(self, frame: np.ndarray, edges: np.ndarray,
+                         frame_idx: int = 0) -> np.ndarray:
         """Apply neon glow effect to edges.
         
         Args:
             frame: Input frame (H, W, C) in BGR
             edges: Edge mask (H, W)
+            frame_idx: Frame index; the neon color is drawn from the
+                per-frame RNG keyed by config.seed and this index
             
         Returns:
             Frame with neon edges
@@ -80,7 +154,8 @@ class VisualStyle:
         result = frame.copy()
         
         # Select random neon color
-        color_idx = np.random.randint(0, len(self.config.neon_colors))
+        rng = frame_rng(self.config.seed, "neon", frame_idx)
+        color_idx = int(rng.integers(0, len(self.config.neon_colors)))
         neon_color = self.config.neon_colors[color_idx]
         # Convert RGB to BGR for OpenCV
         neon_color_bgr = (neon_color[2], neon_color[1], neon_color[0])
@@ -107,14 +182,14 @@ class VisualStyle:
         
         return result
     
-    def boost_contrast_saturation(self, frame: np.ndarray) -> np.ndarray:
-        """Boost contrast and saturation.
+    def boost_saturation(self, frame: np.ndarray) -> np.ndarray:
+        """Boost saturation.
         
         Args:
             frame: Input frame (H, W, C) in BGR
             
         Returns:
-            Frame with boosted contrast and saturation
+            Frame with boosted saturation
         """
         # Convert to HSV for saturation adjustment
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV).astype(np.float32)
@@ -124,9 +199,17 @@ class VisualStyle:
         hsv[:, :, 1] = np.clip(hsv[:, :, 1], 0, 255)
         
         # Convert back to BGR
-        frame = cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
+        return cv2.cvtColor(hsv.astype(np.uint8), cv2.COLOR_HSV2BGR)
+    
+    def boost_contrast(self, frame: np.ndarray) -> np.ndarray:
+        """Boost local contrast using CLAHE on the L channel.
         
-        # Boost contrast using CLAHE
+        Args:
+            frame: Input frame (H, W, C) in BGR
+            
+        Returns:
+            Frame with boosted contrast
+        """
         lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
         l, a, b = cv2.split(lab)
         
@@ -139,25 +222,89 @@ class VisualStyle:
         
         return result
     
-    def apply_full_style(self, frame: np.ndarray) -> np.ndarray:
+    def boost_contrast_saturation(self, frame: np.ndarray) -> np.ndarray:
+        """Boost contrast and saturation.
+        
+        Args:
+            frame: Input frame (H, W, C) in BGR
+            
+        Returns:
+            Frame with boosted contrast and saturation
+        """
+        return self.boost_contrast(self.boost_saturation(frame))
+    
+    def grade_colors(self, frame: np.ndarray) -> np.ndarray:
+        """Per-pixel color grade: dark base followed by the saturation boost.
+        
+        Each output pixel depends on the input pixel only, which is what
+        lets compile_color_lut bake this into a 3D LUT.
+        
+        Args:
+            frame: Input frame (H, W, C) in BGR
+            
+        Returns:
+            Graded frame
+        """
+        return self.boost_saturation(self.apply_dark_base(frame))
+    
+    def compile_color_lut(self) -> Optional[ColorLUT]:
+        """Bake grade_colors into a 3D LUT of config.color_lut_size^3 entries.
+        
+        Returns:
+            ColorLUT instance, or None when color_lut_size is 0
+            
+        Raises:
+            ValueError: If color_lut_size is neither 0 nor in
+                2..MAX_COLOR_LUT_SIZE
+        """
+        size = self.config.color_lut_size
+        if size == 0:
+            return None
+        if not 2 <= size <= MAX_COLOR_LUT_SIZE:
+            raise ValueError(f"color_lut_size must be 0 (disabled) or between 2 and "
+                             f"{MAX_COLOR_LUT_SIZE}, got {size}")
+        
+        # grade_colors evaluated once on the lattice; laid out as wide rows so
+        # OpenCV takes the same vectorized color conversion path as for frames
+        levels = np.linspace(0, 255, size, dtype=np.float32)
+        lattice = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1)
+        table = self.grade_colors(lattice.reshape(size, size * size, 3))
+        return ColorLUT(table.reshape(size, size, size, 3))
+    
+    def apply_color_grade(self, frame: np.ndarray) -> np.ndarray:
+        """Apply the per-pixel color grade, through the 3D LUT when compiled.
+        
+        Args:
+            frame: Input frame (H, W, C) in BGR
+            
+        Returns:
+            Graded frame
+        """
+        if self.color_lut is None:
+            return self.grade_colors(frame)
+        return self.color_lut.apply(frame)
+    
+    def apply_full_style(self, frame: np.ndarray,
+                         frame_idx: int = 0) -> np.ndarray:
         """Apply complete visual style pipeline.
         
         Args:
             frame: Input frame (H, W, C) in BGR
+            frame_idx: Frame index for deterministic per-frame randomness
             
         Returns:
             Styled frame
         """
-        # Step 1: Dark base
-        frame = self.apply_dark_base(frame)
+        # Step 1: Dark base and saturation boost (per-pixel color grade)
+        frame = self.apply_color_grade(frame)
         
-        # Step 2: Boost contrast and saturation
-        frame = self.boost_contrast_saturation(frame)
+        # Step 2: Boost contrast
+        frame = self.boost_contrast(frame)
         
         # Step 3: Detect edges
         edges = self.detect_edges(frame)
         
         # Step 4: Apply neon edges
-        frame = self.apply_neon_edges(frame, edges)
+        frame = self.apply_neon_edges(frame, edges, frame_idx)
         
         return frame
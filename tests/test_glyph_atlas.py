@@ -0,0 +1,97 @@
+"""
+Unit tests for the glyph atlas caption renderer.
+"""
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import GenerationConfig
+from glyph_atlas import ATLAS_CHARSET, AtlasTextRenderer, GlyphAtlas
+from overlay import Overlay
+
+
+class TestGlyphAtlas(unittest.TestCase):
+    """Test glyph atlas rasterization and layout."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Build one atlas for all tests."""
+        cls.atlas = GlyphAtlas(size=32, outline=2)
+    
+    def test_charset_packed(self):
+        """Test charset glyphs are views into the packed texture."""
+        for ch in ATLAS_CHARSET:
+            glyph = self.atlas.glyph(ch)
+            self.assertTrue(np.shares_memory(glyph.fill, self.atlas.texture))
+            # Outline coverage contains the glyph body
+            self.assertTrue(np.all(glyph.stroke >= glyph.fill))
+    
+    def test_extra_glyphs_added_once(self):
+        """Test characters outside the charset are rasterized on first use."""
+        glyph = self.atlas.glyph('é')
+        
+        self.assertIs(self.atlas.glyph('é'), glyph)
+        self.assertGreater(glyph.fill.max(), 0)
+    
+    def test_wrap(self):
+        """Test line wrapping respects the width limit."""
+        renderer = AtlasTextRenderer(self.atlas)
+        text = "the quick brown fox jumps over the lazy dog"
+        lines = renderer.wrap(text, 200)
+        
+        self.assertGreater(len(lines), 1)
+        self.assertEqual(" ".join(lines), text)
+        for line in lines:
+            self.assertLessEqual(self.atlas.text_width(line), 200)
+    
+    def test_render_cached(self):
+        """Test composed captions are cached and unique words reuse glyphs."""
+        renderer = AtlasTextRenderer(self.atlas, cache_size=2)
+        first, _ = renderer.render("alpha", 500)
+        self.assertIs(renderer.render("alpha", 500)[0], first)
+        
+        glyph_count = len(self.atlas.glyphs)
+        for i in range(50):
+            renderer.render(f"word{i}", 500)
+        self.assertEqual(len(self.atlas.glyphs), glyph_count)
+        self.assertEqual(len(renderer._cache), 2)
+
+
+class TestAtlasCaptions(unittest.TestCase):
+    """Test atlas captions in the overlay system."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.overlay = Overlay(GenerationConfig(caption_renderer="atlas"))
+        self.test_frame = np.full((640, 360, 3), 128, dtype=np.uint8)
+    
+    def changed_box(self, result):
+        """Bounding box size (rows, cols) of changed pixels."""
+        rows, cols = np.nonzero(np.any(result != self.test_frame, axis=2))
+        return np.ptp(rows) + 1, np.ptp(cols) + 1
+    
+    def test_draw_caption(self):
+        """Test atlas captions are drawn in the upper third."""
+        result = self.overlay.draw_caption(self.test_frame, "Hello World", 1.0)
+        rows = np.nonzero(np.any(result != self.test_frame, axis=2))[0]
+        
+        self.assertLess(rows.max(), 640 // 2)
+        self.assertGreater(result.max(), 200)
+        self.assertLess(result.min(), 50)
+    
+    def test_scale_animation(self):
+        """Test the fade-in scale shrinks the caption around its center."""
+        full = self.changed_box(self.overlay.draw_caption(self.test_frame, "Hello", 1.0))
+        small = self.changed_box(self.overlay.draw_caption(self.test_frame, "Hello",
+                                                           1.0, scale=0.9))
+        
+        self.assertLess(small[1], full[1])
+        self.assertLess(small[0], full[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
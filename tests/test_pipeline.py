@@ -2,18 +2,30 @@
 Unit tests for video generation pipeline components.
 """
 import unittest
+import dataclasses
 import numpy as np
 import sys
 import os
+import multiprocessing
+import tempfile
+import threading
+import time
+import cv2
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from config import GenerationConfig
-from motion import MotionEffects
+from motion import MotionEffects, MotionSchedule
 from visual_style import VisualStyle
-from overlay import Overlay
+from overlay import (Compositor, LayerPatch, Overlay, OverlayLayer, OverlayVariant,
+                     SpriteLayer, blend_patch)
 from generator import VideoGenerator
+from pipeline import VideoPipeline
+from rng import frame_rng
+from cache import BaseClipCache
+from parallel import ordered_map, threaded_stage
+from sharded import ShardedRenderer
 
 
 class TestGenerationConfig(unittest.TestCase):
@@ -46,6 +58,23 @@ class TestGenerationConfig(unittest.TestCase):
         self.assertEqual(config.neon_colors[0], (0, 255, 255))  # Cyan
 
 
+class TestFrameRNG(unittest.TestCase):
+    """Test counter-based per-frame random generation."""
+    
+    def test_same_key_same_stream(self):
+        """Test identical keys produce identical draws."""
+        a = frame_rng(42, "noise", 17).integers(0, 256, 1000)
+        b = frame_rng(42, "noise", 17).integers(0, 256, 1000)
+        np.testing.assert_array_equal(a, b)
+    
+    def test_keys_are_independent(self):
+        """Test seed, stage and frame index each change the stream."""
+        base = frame_rng(42, "noise", 17).integers(0, 256, 1000)
+        for other in [frame_rng(43, "noise", 17), frame_rng(42, "neon", 17),
+                      frame_rng(42, "noise", 18)]:
+            self.assertFalse(np.array_equal(base, other.integers(0, 256, 1000)))
+
+
 class TestMotionEffects(unittest.TestCase):
     """Test motion effects."""
     
@@ -106,6 +135,40 @@ class TestMotionEffects(unittest.TestCase):
         )
         self.assertEqual(result.shape, self.test_frame.shape)
     
+    def test_motion_matrix_identity_without_motion(self):
+        """Test composed matrix is the identity when all motion is off."""
+        config = GenerationConfig(micro_movement_amplitude=0.0,
+                                  parallax_speed=0.0,
+                                  micro_zoom_range=(1.0, 1.0))
+        motion = MotionEffects(config)
+        
+        M, wrap_shift = motion.compose_motion_matrix(0, 100, 1080, 1920)
+        
+        np.testing.assert_allclose(M, [[1, 0, 0], [0, 1, 0]], atol=1e-9)
+        self.assertEqual(wrap_shift, 0)
+    
+    def test_fused_motion_matches_sequential(self):
+        """Test single-warp motion matches the chained warps."""
+        y, x = np.mgrid[:1920, :1080]
+        smooth = np.dstack([
+            127 + 100 * np.sin(x / 97.0), 127 + 100 * np.cos(y / 131.0),
+            127 + 100 * np.sin((x + y) / 173.0)
+        ]).astype(np.uint8)
+        
+        for frame_idx, break_type, progress in [(100, None, 0.0),
+                                                (400, "major", 0.6)]:
+            with self.subTest(frame_idx=frame_idx, break_type=break_type):
+                sequential = self.motion.apply_motion(
+                    smooth, frame_idx, 810, break_type, progress)
+                self.config.fused_motion = True
+                fused = self.motion.apply_motion(
+                    smooth, frame_idx, 810, break_type, progress)
+                self.config.fused_motion = False
+                
+                diff = np.abs(sequential.astype(np.int16) - fused)
+                # Away from the borders the single resample agrees closely
+                self.assertLessEqual(np.percentile(diff[100:-100, 100:-100], 99), 2)
+    
     def test_speed_pulse(self):
         """Test speed pulse calculation."""
         # Normal speed
@@ -117,6 +180,68 @@ class TestMotionEffects(unittest.TestCase):
         self.assertEqual(speed, 1.4)
 
 
+class TestMotionSchedule(unittest.TestCase):
+    """Test vectorized motion schedule."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        # Breaks overlap (duration > interval) to exercise restarts
+        self.config = GenerationConfig(minor_break_interval=4,
+                                       major_break_interval=10,
+                                       break_duration=6)
+        self.motion = MotionEffects(self.config)
+        self.total = 60
+        self.schedule = self.motion.build_schedule(self.total)
+    
+    def replay_breaks(self):
+        """Replay the per-frame pattern-break state machine."""
+        states = []
+        current, start = None, None
+        for i in range(self.total):
+            should_break, break_type = self.motion.should_apply_pattern_break(i)
+            if should_break:
+                current, start = break_type, i
+            state = (None, 0.0)
+            if current is not None:
+                if i - start < self.config.break_duration:
+                    state = (current, (i - start) / self.config.break_duration)
+                else:
+                    current = None
+            states.append(state)
+        return states
+    
+    def test_breaks_match_state_machine(self):
+        """Test vectorized break state matches the sequential replay."""
+        for i, expected in enumerate(self.replay_breaks()):
+            self.assertEqual(self.schedule.break_at(i), expected)
+    
+    def test_matrices_match_composed_motion(self):
+        """Test schedule matrices match per-frame composition."""
+        w, h = self.config.output_resolution
+        for i, (break_type, progress) in enumerate(self.replay_breaks()):
+            M, wrap_shift = self.motion.compose_motion_matrix(
+                i, self.total, w, h, break_type, progress)
+            scheduled_M, scheduled_shift = self.schedule.matrix_at(i)
+            
+            np.testing.assert_allclose(scheduled_M, M, atol=1e-9)
+            self.assertEqual(scheduled_shift, wrap_shift)
+    
+    def test_save_and_load(self):
+        """Test schedule round-trips through .npz and JSON."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ["schedule.npz", "schedule.json"]:
+                with self.subTest(format=name):
+                    path = os.path.join(tmp_dir, name)
+                    self.schedule.save(path)
+                    loaded = MotionSchedule.load(path)
+                    
+                    self.assertEqual(len(loaded), self.total)
+                    for field in MotionSchedule.ARRAY_FIELDS:
+                        np.testing.assert_allclose(getattr(loaded, field),
+                                                   getattr(self.schedule, field))
+                    self.assertEqual(loaded.break_at(12), self.schedule.break_at(12))
+
+
 class TestVisualStyle(unittest.TestCase):
     """Test visual style processing."""
     
@@ -150,6 +275,31 @@ class TestVisualStyle(unittest.TestCase):
         
         self.assertEqual(result.shape, self.test_frame.shape)
     
+    def test_neon_color_is_per_frame_deterministic(self):
+        """Test neon color choice ignores global RNG state and call order."""
+        frame = np.random.RandomState(0).randint(0, 256, (96, 64, 3)).astype(np.uint8)
+        edges = self.style.detect_edges(frame)
+        
+        np.random.seed(1)
+        first = [self.style.apply_neon_edges(frame, edges, i) for i in range(6)]
+        np.random.seed(2)
+        second = [self.style.apply_neon_edges(frame, edges, i) for i in reversed(range(6))]
+        
+        for expected, actual in zip(first, reversed(second)):
+            np.testing.assert_array_equal(expected, actual)
+    
+    def test_style_without_frame_index_is_reproducible(self):
+        """Test calls without a frame index do not depend on the global RNG."""
+        frame = np.random.RandomState(0).randint(0, 256, (96, 64, 3)).astype(np.uint8)
+        
+        np.random.seed(1)
+        first = self.style.apply_full_style(frame)
+        np.random.seed(2)
+        second = VisualStyle(self.config).apply_full_style(frame)
+        
+        np.testing.assert_array_equal(first, second)
+        np.testing.assert_array_equal(first, self.style.apply_full_style(frame, 0))
+    
     def test_contrast_saturation_boost(self):
         """Test contrast and saturation boost."""
         result = self.style.boost_contrast_saturation(self.test_frame)
@@ -157,6 +307,51 @@ class TestVisualStyle(unittest.TestCase):
         self.assertEqual(result.shape, self.test_frame.shape)
         self.assertIsInstance(result, np.ndarray)
     
+    def test_color_lut_matches_float_path(self):
+        """Test the 3D LUT color grade against dark base + saturation boost."""
+        frame = np.random.RandomState(0).randint(0, 256, (256, 256, 3)).astype(np.uint8)
+        expected = self.style.boost_saturation(self.style.apply_dark_base(frame))
+        result = self.style.apply_color_grade(frame)
+        
+        diff = np.abs(result.astype(np.int16) - expected)
+        self.assertLess(diff.mean(), 1.0)
+        self.assertLessEqual(diff.max(), 8)
+    
+    def test_color_lut_exact_on_lattice(self):
+        """Test colors on the LUT lattice are reproduced exactly."""
+        style = VisualStyle(GenerationConfig(color_lut_size=18))  # Lattice step of 15
+        levels = np.arange(0, 256, 15, dtype=np.uint8)
+        frame = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'),
+                         axis=-1).reshape(18, 18 * 18, 3)
+        
+        # Up to OpenCV's own +-1 rounding differences in HSV conversion
+        diff = np.abs(style.apply_color_grade(frame).astype(np.int16)
+                      - style.grade_colors(frame))
+        self.assertLessEqual(diff.max(), 1)
+    
+    def test_color_lut_size_range(self):
+        """Test LUT sizes outside 0 or 2..127 are rejected."""
+        for size in [1, 128, -1]:
+            with self.subTest(size=size):
+                with self.assertRaises(ValueError):
+                    VisualStyle(GenerationConfig(color_lut_size=size))
+        
+        for size in [2, 127]:
+            with self.subTest(size=size):
+                style = VisualStyle(GenerationConfig(color_lut_size=size))
+                frame = np.random.RandomState(2).randint(0, 256, (32, 32, 3)).astype(np.uint8)
+                self.assertEqual(style.apply_color_grade(frame).shape, frame.shape)
+    
+    def test_color_lut_disabled(self):
+        """Test color_lut_size=0 keeps the original float path."""
+        style = VisualStyle(GenerationConfig(color_lut_size=0))
+        frame = np.random.RandomState(1).randint(0, 256, (96, 64, 3)).astype(np.uint8)
+        
+        self.assertIsNone(style.color_lut)
+        expected = style.boost_contrast_saturation(style.apply_dark_base(frame))
+        np.testing.assert_array_equal(
+            style.boost_contrast(style.apply_color_grade(frame)), expected)
+    
     def test_full_style_pipeline(self):
         """Test complete style pipeline."""
         result = self.style.apply_full_style(self.test_frame)
@@ -182,6 +377,59 @@ class TestOverlay(unittest.TestCase):
         self.assertEqual(self.overlay.captions[0]['text'], "Test Caption")
         self.assertEqual(self.overlay.captions[0]['start'], 0)
     
+    def test_active_captions_match_scan(self):
+        """Test interval index lookup matches a linear scan."""
+        rng = np.random.default_rng(0)
+        words = [(f"w{i}", int(start)) for i, start in
+                 enumerate(rng.integers(0, 2000, 500))]
+        self.overlay.add_captions(words)
+        self.overlay.add_caption("late", 1990)
+        
+        for frame_idx in list(range(-5, 2100, 7)) + [1990, 2064, 2065]:
+            expected = [c for c in self.overlay.captions
+                        if c['start'] <= frame_idx < c['end']]
+            self.assertEqual(self.overlay.active_captions(frame_idx), expected)
+    
+    def test_active_captions_after_edit(self):
+        """Test edited captions take effect once assigned back."""
+        self.overlay.add_captions([("b", 30), ("a", 0), ("c", 60)])
+        self.assertEqual(self.overlay.active_captions(10)[0]['text'], "a")
+        
+        captions = sorted(self.overlay.captions, key=lambda c: c['text'], reverse=True)
+        captions[0] = {'text': "z", 'start': 200, 'end': 210}
+        captions[1] = dict(captions[1], start=5)
+        self.overlay.captions = captions
+        
+        for frame_idx in range(0, 220, 5):
+            expected = [c for c in captions if c['start'] <= frame_idx < c['end']]
+            self.assertEqual(self.overlay.active_captions(frame_idx), expected)
+    
+    def test_captions_not_mutable_in_place(self):
+        """Test direct list mutation cannot leave a stale caption index."""
+        frame = np.zeros((320, 180, 3), dtype=np.uint8)
+        captions = [{'text': "a", 'start': 0, 'end': 10}]
+        self.overlay.captions = captions
+        rendered = self.overlay.apply_overlays(frame, 5, 100)
+        
+        # The assigned list is copied and the getter is read-only
+        captions.append({'text': "b", 'start': 0, 'end': 10})
+        captions.clear()
+        with self.assertRaises(AttributeError):
+            self.overlay.captions.append({'text': "c", 'start': 0, 'end': 10})
+        
+        self.assertEqual([c['text'] for c in self.overlay.active_captions(5)], ["a"])
+        np.testing.assert_array_equal(self.overlay.apply_overlays(frame, 5, 100), rendered)
+        self.assertFalse(np.array_equal(rendered, Overlay(self.config).apply_overlays(frame, 5, 100)))
+    
+    def test_add_captions_bulk(self):
+        """Test bulk loading matches adding captions one by one."""
+        single = Overlay(self.config)
+        single.add_caption("a", 0)
+        single.add_caption("b", 30)
+        
+        self.overlay.add_captions([("a", 0), ("b", 30)])
+        self.assertEqual(self.overlay.captions, single.captions)
+    
     def test_draw_caption(self):
         """Test caption drawing."""
         result = self.overlay.draw_caption(self.test_frame, "Test", 1.0)
@@ -190,6 +438,35 @@ class TestOverlay(unittest.TestCase):
         # Should be different from original due to text
         self.assertFalse(np.array_equal(result, self.test_frame))
     
+    def test_caption_sprite_matches_puttext(self):
+        """Test sprite blending matches direct putText rendering."""
+        frame = np.random.default_rng(0).integers(0, 256, (1920, 1080, 3),
+                                                  dtype=np.uint8)
+        font, font_scale, thickness = self.overlay._caption_font()
+        
+        for text in ["Test", "A caption far too long to fit inside the frame width"]:
+            (text_w, _), _ = cv2.getTextSize(text, font, font_scale, thickness)
+            drawn = frame.copy()
+            Overlay._draw_caption_text(drawn, text, ((1080 - text_w) // 2, 480),
+                                       font, font_scale, thickness)
+            
+            for alpha in [1.0, 0.4]:
+                with self.subTest(text=text, alpha=alpha):
+                    expected = cv2.addWeighted(frame, 1 - alpha, drawn, alpha, 0)
+                    result = self.overlay.draw_caption(frame, text, alpha)
+                    diff = np.abs(result.astype(int) - expected.astype(int))
+                    self.assertLessEqual(diff.max(), 2)
+    
+    def test_caption_sprite_cached(self):
+        """Test each caption is rasterized once and blended in its ROI."""
+        first = self.overlay.get_caption_sprite("Test")
+        self.assertIs(self.overlay.get_caption_sprite("Test"), first)
+        
+        result = self.overlay.draw_caption(self.test_frame, "Test", 0.5)
+        changed = np.nonzero(np.any(result != self.test_frame, axis=2))
+        self.assertLessEqual(np.ptp(changed[0]) + 1, first.bgra.shape[0])
+        self.assertLessEqual(np.ptp(changed[1]) + 1, first.bgra.shape[1])
+    
     def test_draw_progress_bar(self):
         """Test progress bar drawing."""
         result = self.overlay.draw_progress_bar(self.test_frame, 0.5)
@@ -198,6 +475,68 @@ class TestOverlay(unittest.TestCase):
         # Should be different from original due to progress bar
         self.assertFalse(np.array_equal(result, self.test_frame))
     
+    def reference_progress_bar(self, frame, progress):
+        """Full-frame progress bar drawing, with the shadow darkening its band."""
+        config = self.overlay.config
+        h, w = frame.shape[:2]
+        bar_y = h - config.progress_bar_height
+        y1 = bar_y + config.progress_bar_height
+        result = frame
+        
+        if config.progress_bar_shadow_enabled:
+            shadow_y = bar_y + config.progress_bar_shadow_offset
+            overlay = result.copy()
+            cv2.rectangle(overlay, (0, shadow_y), (w, shadow_y + config.progress_bar_height),
+                          (0, 0, 0), -1)
+            result = cv2.addWeighted(result, 1 - config.progress_bar_shadow_opacity,
+                                     overlay, config.progress_bar_shadow_opacity, 0)
+        
+        overlay = result.copy()
+        cv2.rectangle(overlay, (0, bar_y), (w, y1), config.progress_bar_bg_color, -1)
+        result = cv2.addWeighted(result, 1 - config.progress_bar_bg_opacity,
+                                 overlay, config.progress_bar_bg_opacity, 0)
+        
+        fill_width = int(w * self.overlay.visual_progress(progress))
+        overlay = result.copy()
+        if fill_width > 0:
+            cv2.rectangle(overlay, (0, bar_y), (fill_width, y1),
+                          config.progress_bar_fg_color, -1)
+        result = cv2.addWeighted(result, 1 - config.progress_bar_opacity,
+                                 overlay, config.progress_bar_opacity, 0)
+        
+        if fill_width > 0:
+            center = (fill_width, bar_y + config.progress_bar_height // 2)
+            for radius, opacity in [(config.progress_bar_marker_glow_radius, 0.3),
+                                    (config.progress_bar_marker_radius, 0.6)]:
+                overlay = result.copy()
+                cv2.circle(overlay, center, radius, config.progress_bar_marker_color, -1)
+                result = cv2.addWeighted(result, 1 - opacity, overlay, opacity, 0)
+        return result
+    
+    def test_progress_bar_matches_reference(self):
+        """Test precomputed strips match full-frame drawing."""
+        frame = np.random.default_rng(0).integers(0, 256, (1920, 1080, 3),
+                                                  dtype=np.uint8)
+        
+        for shadow in [False, True]:
+            self.overlay.config = GenerationConfig(progress_bar_shadow_enabled=shadow)
+            for progress in [0.0, 0.3, 0.9, 1.0]:
+                with self.subTest(shadow=shadow, progress=progress):
+                    expected = self.reference_progress_bar(frame, progress)
+                    result = self.overlay.draw_progress_bar(frame, progress)
+                    diff = np.abs(result.astype(int) - expected.astype(int))
+                    self.assertLessEqual(diff.max(), 1)
+    
+    def test_progress_bar_only_touches_strip(self):
+        """Test pixels above the bar strip are untouched and the shadow darkens."""
+        strips = self.overlay.get_progress_bar_strips(1920, 1080)
+        result = self.overlay.draw_progress_bar(self.test_frame, 0.5)
+        
+        self.assertLessEqual(strips.y1 - strips.y0,
+                             2 * self.config.progress_bar_marker_glow_radius + 1)
+        np.testing.assert_array_equal(result[:strips.y0], self.test_frame[:strips.y0])
+        self.assertTrue(np.all(result[-1, -5] < 128))
+    
     def test_progress_bar_at_zero(self):
         """Test progress bar at 0% progress."""
         result = self.overlay.draw_progress_bar(self.test_frame, 0.0)
@@ -287,6 +626,86 @@ class TestOverlay(unittest.TestCase):
         self.assertEqual(result.shape, self.test_frame.shape)
 
 
+class TestCompositor(unittest.TestCase):
+    """Test dirty-rectangle overlay compositing."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.config = GenerationConfig()
+        self.overlay = Overlay(self.config)
+        self.frame = np.random.default_rng(0).integers(0, 256, (1920, 1080, 3),
+                                                       dtype=np.uint8)
+    
+    def make_patch(self, x, y, w, h, color, alpha, opacity=1.0):
+        """Create a solid premultiplied patch."""
+        bgra = np.zeros((h, w, 4), dtype=np.float32)
+        bgra[..., :3] = np.asarray(color, dtype=np.float32) * alpha
+        bgra[..., 3] = alpha
+        return LayerPatch(x, y, bgra, opacity)
+    
+    def test_overlapping_patches_match_sequential_blend(self):
+        """Test merged rectangles equal blending patches one by one."""
+        patches = [self.make_patch(100, 100, 200, 80, (255, 0, 0), 0.5),
+                   self.make_patch(250, 150, 100, 100, (0, 255, 0), 0.8, 0.5),
+                   self.make_patch(-20, 1900, 60, 40, (0, 0, 255), 1.0)]
+        
+        rects = Compositor.dirty_rects(patches, 1920, 1080)
+        self.assertEqual(sorted(rect for rect, _ in rects),
+                         [(0, 1900, 40, 1920), (100, 100, 350, 250)])
+        
+        expected = self.frame.copy()
+        for patch in patches:
+            blend_patch(expected, patch)
+        
+        compositor = Compositor()
+        compositor.layer_patches = lambda *args: [(None, patches)]
+        result = self.frame.copy()
+        compositor.composite(result, 0, 1)
+        
+        diff = np.abs(result.astype(int) - expected.astype(int))
+        self.assertLessEqual(diff.max(), 1)
+    
+    def test_incomplete_layer_rejected(self):
+        """Test a layer without patches() fails when constructed."""
+        class StateOnlyLayer(OverlayLayer):
+            def state(self, frame_idx, total_frames, size):
+                return None
+        
+        with self.assertRaises(TypeError):
+            StateOnlyLayer()
+    
+    def test_unchanged_layers_reuse_patches(self):
+        """Test patches are only re-rendered when a layer's state changes."""
+        self.overlay.add_caption("Hello", 0)
+        compositor = self.overlay.compositor
+        
+        first = compositor.layer_patches(30, 100, (1920, 1080))
+        second = compositor.layer_patches(31, 100, (1920, 1080))
+        self.assertIs(second[0][1], first[0][1])  # Caption fully visible
+        
+        fading = compositor.layer_patches(1, 100, (1920, 1080))
+        self.assertIsNot(fading[0][1], first[0][1])
+    
+    def test_apply_overlays_in_place(self):
+        """Test in-place overlays only touch the layer rectangles."""
+        self.overlay.add_caption("Hello", 0)
+        self.overlay.compositor.add_layer(SpriteLayer(
+            np.full((20, 30, 4), 255, dtype=np.uint8), 10, 10, start_frame=5))
+        frame = self.frame.copy()
+        
+        result = self.overlay.apply_overlays(frame, 10, 100, in_place=True)
+        self.assertIs(result, frame)
+        
+        patches = [patch for _, layer in self.overlay.compositor.layer_patches(10, 100, (1920, 1080))
+                   for patch in layer]
+        self.assertEqual(len(patches), 3)
+        untouched = np.ones((1920, 1080), dtype=bool)
+        for x0, y0, x1, y1 in (p.bbox for p in patches):
+            untouched[max(y0, 0):y1, max(x0, 0):x1] = False
+        np.testing.assert_array_equal(result[untouched], self.frame[untouched])
+        np.testing.assert_array_equal(result[10:30, 10:40], 255)
+
+
 class TestVideoGenerator(unittest.TestCase):
     """Test video generator."""
     
@@ -303,6 +722,43 @@ class TestVideoGenerator(unittest.TestCase):
         self.assertEqual(frame.shape, (h, w, 3))
         self.assertEqual(frame.dtype, np.uint8)
     
+    def test_fast_synthesis_matches_reference(self):
+        """Test separable synthesis reproduces the full-grid patterns."""
+        synthesizer = self.generator.get_synthesizer()
+        
+        for frame_idx in [0, 7, 22]:
+            with self.subTest(frame_idx=frame_idx):
+                expected = self.generator.synthesize_reference_frame(frame_idx, 30)
+                actual = synthesizer.synthesize(frame_idx, 30)
+                
+                diff = np.abs(expected.astype(np.int16) - actual)
+                self.assertEqual(actual.dtype, np.uint8)
+                self.assertLessEqual(diff.max(), 1)
+                self.assertLess(np.count_nonzero(diff) / diff.size, 0.001)
+    
+    def test_frames_independent_of_render_order(self):
+        """Test any frame is bit-identical regardless of render order."""
+        config = GenerationConfig(output_resolution=(64, 96))
+        forward = [VideoGenerator(config).generate_abstract_frame(i, 30)
+                   for i in range(4)]
+        
+        generator = VideoGenerator(config)
+        np.random.seed(123)
+        backward = [generator.generate_abstract_frame(i, 30)
+                    for i in reversed(range(4))]
+        
+        for expected, actual in zip(forward, reversed(backward)):
+            np.testing.assert_array_equal(expected, actual)
+    
+    def test_synthesizer_follows_resolution(self):
+        """Test synthesizer is rebuilt when the resolution changes."""
+        synthesizer = self.generator.get_synthesizer()
+        self.assertIs(self.generator.get_synthesizer(), synthesizer)
+        
+        self.config.output_resolution = (64, 96)
+        frame = self.generator.generate_abstract_frame(0, 30)
+        self.assertEqual(frame.shape, (96, 64, 3))
+    
     def test_generate_base_clip(self):
         """Test base clip generation."""
         frames = self.generator.generate_base_clip()
@@ -311,6 +767,19 @@ class TestVideoGenerator(unittest.TestCase):
         self.assertEqual(frames[0].shape[0], 1920)
         self.assertEqual(frames[0].shape[1], 1080)
     
+    def test_parallel_base_clip_matches_serial(self):
+        """Test process-pool rendering returns the serial frames."""
+        config = GenerationConfig(output_resolution=(64, 96), fps=10,
+                                  base_clip_duration=1)
+        generator = VideoGenerator(config)
+        
+        serial = generator.generate_base_clip()
+        parallel = generator.generate_base_clip(workers=3)
+        
+        self.assertEqual(len(parallel), len(serial))
+        for expected, actual in zip(serial, parallel):
+            np.testing.assert_array_equal(expected, actual)
+    
     def test_tile_clip(self):
         """Test clip tiling."""
         base_frames = self.generator.generate_base_clip()
@@ -318,6 +787,398 @@ class TestVideoGenerator(unittest.TestCase):
         
         # Should have close to target number of frames
         self.assertGreaterEqual(len(tiled_frames), self.config.total_frames)
+    
+    def test_tiled_timeline_matches_eager_tiling(self):
+        """Test lazy timeline reproduces copy-based tiling with crossfades."""
+        config = GenerationConfig(output_resolution=(64, 96), fps=10,
+                                  target_duration=3, base_clip_duration=1)
+        generator = VideoGenerator(config)
+        base_frames = generator.generate_base_clip()
+        
+        # Reference: materialise every tile with 5-frame crossfades
+        expected = []
+        for tile_idx in range(config.tiles_needed):
+            for i, frame in enumerate(base_frames):
+                if tile_idx > 0 and i < 5:
+                    alpha = i / 5
+                    frame = cv2.addWeighted(base_frames[i - 5], 1 - alpha,
+                                            frame, alpha, 0)
+                expected.append(frame)
+        expected = expected[:config.total_frames]
+        
+        timeline = generator.tile_clip(base_frames)
+        streamed = list(generator.tile_clip(base_frames))
+        
+        self.assertEqual(len(timeline), len(expected))
+        self.assertEqual(len(streamed), len(expected))
+        for idx, frame in enumerate(expected):
+            np.testing.assert_array_equal(timeline[idx], frame)
+            np.testing.assert_array_equal(streamed[idx], frame)
+    
+    def test_tiled_timeline_indexing(self):
+        """Test timeline shares base frames and supports list-style access."""
+        config = GenerationConfig(output_resolution=(64, 96), fps=10,
+                                  target_duration=3, base_clip_duration=1)
+        generator = VideoGenerator(config)
+        base_frames = generator.generate_base_clip()
+        timeline = generator.tile_clip(base_frames)
+        
+        # Frames outside crossfades are references, not copies
+        self.assertIs(timeline[7], base_frames[7])
+        self.assertIs(timeline[17], base_frames[7])
+        self.assertIs(timeline[-1], base_frames[9])
+        
+        # Crossfade frames are blended once and cached
+        self.assertIsNot(timeline[12], base_frames[2])
+        self.assertIs(timeline[12], timeline[22])
+        
+        self.assertEqual(len(timeline[5:15]), 10)
+        with self.assertRaises(IndexError):
+            timeline[len(timeline)]
+
+
+class TestBaseClipCache(unittest.TestCase):
+    """Test on-disk base clip cache."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = GenerationConfig(output_resolution=(64, 96), fps=10,
+                                       base_clip_duration=1,
+                                       base_clip_cache_dir=self.tmp_dir.name)
+    
+    def tearDown(self):
+        """Remove cache directory."""
+        self.tmp_dir.cleanup()
+    
+    def test_cache_hit_is_memory_mapped(self):
+        """Test second generation loads the stored clip zero-copy."""
+        generated = VideoGenerator(self.config).generate_base_clip()
+        cached = VideoGenerator(self.config).generate_base_clip()
+        
+        self.assertEqual(len(cached), self.config.base_frames)
+        self.assertIsInstance(cached[0].base, np.memmap)
+        for expected, actual in zip(generated, cached):
+            np.testing.assert_array_equal(expected, actual)
+    
+    def test_key_covers_generator_fields_only(self):
+        """Test key ignores fields the base generator never reads."""
+        key = BaseClipCache.key_for(self.config)
+        
+        self.config.target_duration = 60
+        self.config.caption_font_size = 30
+        self.assertEqual(BaseClipCache.key_for(self.config), key)
+        
+        self.config.seed = 7
+        self.assertNotEqual(BaseClipCache.key_for(self.config), key)
+    
+    def test_lru_eviction(self):
+        """Test least recently used clips are evicted over budget."""
+        frames = [np.zeros((10, 10, 3), dtype=np.uint8)] * 2
+        clip_bytes = 2 * 10 * 10 * 3
+        cache = BaseClipCache(self.tmp_dir.name, max_bytes=2 * clip_bytes + 256)
+        
+        cache.store("a", frames)
+        cache.store("b", frames)
+        os.utime(cache.path_for("a"), (0, 0))
+        os.utime(cache.path_for("b"), (1, 1))
+        self.assertIsNotNone(cache.load("a"))  # refreshes "a"
+        cache.store("c", frames)
+        
+        self.assertIsNotNone(cache.load("a"))
+        self.assertIsNone(cache.load("b"))
+        self.assertIsNotNone(cache.load("c"))
+        self.assertLessEqual(cache.size_bytes(), cache.max_bytes)
+
+
+class TestOrderedMap(unittest.TestCase):
+    """Test ordered thread-pool mapping."""
+    
+    def test_preserves_order(self):
+        """Test results come back in input order despite uneven work."""
+        def work(i):
+            time.sleep(0.001 * ((7 * i) % 5))
+            return i * i
+        
+        result = list(ordered_map(work, range(40), workers=4))
+        self.assertEqual(result, [i * i for i in range(40)])
+    
+    def test_bounds_items_in_flight(self):
+        """Test the input stream is consumed at most a window ahead."""
+        consumed = []
+        
+        def source():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+        
+        stream = ordered_map(lambda i: i, source(), workers=2, max_in_flight=4)
+        self.assertEqual(next(stream), 0)
+        self.assertLessEqual(len(consumed), 4)
+        stream.close()
+    
+    def test_restores_opencv_threads(self):
+        """Test OpenCV thread count is restored after the pool finishes."""
+        before = cv2.getNumThreads()
+        list(ordered_map(lambda i: cv2.getNumThreads(), range(8), workers=4))
+        self.assertEqual(cv2.getNumThreads(), before)
+    
+    def test_propagates_errors(self):
+        """Test worker exceptions surface to the consumer."""
+        def fail(i):
+            if i == 3:
+                raise ValueError("bad frame")
+            return i
+        
+        with self.assertRaises(ValueError):
+            list(ordered_map(fail, range(10), workers=3))
+
+
+class TestThreadedStage(unittest.TestCase):
+    """Test bounded-queue stage threads."""
+    
+    def test_passes_items_in_order(self):
+        """Test items flow through unchanged and in order."""
+        self.assertEqual(list(threaded_stage(iter(range(50)), maxsize=3)),
+                         list(range(50)))
+    
+    def test_backpressure(self):
+        """Test a slow consumer blocks the producer at queue capacity."""
+        produced = []
+        
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+        
+        stream = threaded_stage(source(), maxsize=2)
+        self.assertEqual(next(stream), 0)
+        time.sleep(0.2)
+        # One delivered, two queued, one blocked in put()
+        self.assertLessEqual(len(produced), 4)
+        stream.close()
+    
+    def test_propagates_errors_and_stops_on_close(self):
+        """Test upstream errors surface and closing stops the thread."""
+        def failing():
+            yield 1
+            raise RuntimeError("stage crashed")
+        
+        with self.assertRaises(RuntimeError):
+            list(threaded_stage(failing(), maxsize=2))
+        
+        before = threading.active_count()
+        stream = threaded_stage(iter(range(1000)), maxsize=1)
+        next(stream)
+        stream.close()
+        self.assertEqual(threading.active_count(), before)
+
+
+def small_test_config(**kwargs):
+    """Create a small, fast configuration for pipeline-level tests."""
+    params = dict(output_resolution=(64, 96), fps=10, target_duration=2,
+                  base_clip_duration=1, minor_break_interval=6,
+                  major_break_interval=12)
+    params.update(kwargs)
+    return GenerationConfig(**params)
+
+
+class TestVideoPipeline(unittest.TestCase):
+    """Test pipeline orchestration."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.config = small_test_config()
+        self.captions = [("Hi", 3)]
+    
+    def render_list_based(self):
+        """Render all frames through the list-based stage API."""
+        pipeline = VideoPipeline(self.config)
+        pipeline.generate_base_video()
+        pipeline.apply_visual_style()
+        pipeline.apply_motion_effects()
+        pipeline.add_captions(self.captions)
+        pipeline.apply_overlays()
+        return pipeline.frames
+    
+    def test_streaming_stages_match_list_stages(self):
+        """Test chained stage generators reproduce the list-based output."""
+        expected = self.render_list_based()
+        
+        pipeline = VideoPipeline(self.config)
+        pipeline.add_captions(self.captions)
+        total = self.config.total_frames
+        frames = pipeline.iter_base_video()
+        frames = pipeline.iter_visual_style(frames)
+        frames = pipeline.iter_motion_effects(frames, total)
+        frames = list(pipeline.iter_overlays(frames, total))
+        
+        self.assertEqual(len(frames), len(expected))
+        for exp, actual in zip(expected, frames):
+            np.testing.assert_array_equal(exp, actual)
+    
+    def test_variants_match_individual_renders(self):
+        """Test fan-out variants equal separate renders with one upstream pass."""
+        variants = [
+            OverlayVariant("a", [("Hi", 3)]),
+            OverlayVariant("b", [("Hey", 0), ("You", 8)],
+                           {"progress_bar_fg_color": (0, 200, 0)}),
+            OverlayVariant("c", [], {"progress_bar_marker_enabled": False}),
+        ]
+        pipeline = VideoPipeline(small_test_config(stage_threads=2))
+        
+        written = {}
+        
+        class Collect:
+            def __init__(self, path):
+                self.frames = written.setdefault(path, [])
+            
+            def write(self, frame):
+                self.frames.append(frame)
+            
+            def close(self):
+                pass
+            
+            abort = close
+        
+        style_calls = []
+        apply_style = pipeline.style.apply_full_style
+        pipeline.style.apply_full_style = lambda *a: style_calls.append(1) or apply_style(*a)
+        pipeline.open_writer = lambda path, encoding=None: Collect(path)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = pipeline.run_variants(os.path.join(tmp_dir, "video.mp4"), variants)
+        
+        self.assertEqual(len(style_calls), self.config.total_frames)
+        self.assertEqual(os.path.basename(paths["b"]), "video_b.mp4")
+        for variant in variants:
+            single = VideoPipeline(dataclasses.replace(self.config, **variant.overrides))
+            single.add_captions(variant.captions)
+            expected = list(single.iter_final_frames())
+            
+            frames = written[paths[variant.name]]
+            self.assertEqual(len(frames), len(expected))
+            for exp, actual in zip(expected, frames):
+                np.testing.assert_array_equal(exp, actual)
+    
+    def test_variant_rejects_other_overrides(self):
+        """Test variants may only change progress bar settings."""
+        with self.assertRaises(ValueError):
+            OverlayVariant("x", overrides={"fps": 60}).make_config(self.config)
+    
+    def test_render_frame_matches_full_render(self):
+        """Test random-access frames equal the full-timeline render."""
+        for fused in [False, True]:
+            with self.subTest(fused_motion=fused):
+                self.config = small_test_config(fused_motion=fused)
+                expected = self.render_list_based()
+                
+                pipeline = VideoPipeline(self.config)
+                pipeline.overlay.add_caption(*self.captions[0])
+                # Crossfade, pattern-break and caption-fade frames, out of order
+                for i in [13, 6, 0, 19, 10, 4, 12]:
+                    np.testing.assert_array_equal(pipeline.render_frame(i), expected[i])
+                
+                np.testing.assert_array_equal(pipeline.render_frame(-1), expected[-1])
+                for exp, actual in zip(expected[5:9], pipeline.render_range(5, 9)):
+                    np.testing.assert_array_equal(exp, actual)
+    
+    def test_threaded_stages_match_serial(self):
+        """Test thread-pool stages reproduce the single-threaded output."""
+        expected = self.render_list_based()
+        
+        self.config = small_test_config(stage_threads=4)
+        actual = self.render_list_based()
+        
+        for exp, frame in zip(expected, actual):
+            np.testing.assert_array_equal(exp, frame)
+    
+    def test_concurrent_stages_match_serial(self):
+        """Test pipeline-parallel streaming reproduces serial output."""
+        expected = self.render_list_based()
+        
+        self.config = small_test_config(concurrent_stages=True,
+                                        stage_queue_size=2, stage_threads=2)
+        pipeline = VideoPipeline(self.config)
+        pipeline.overlay.add_caption(*self.captions[0])
+        actual = list(pipeline.iter_final_frames())
+        
+        self.assertEqual(len(actual), len(expected))
+        for exp, frame in zip(expected, actual):
+            np.testing.assert_array_equal(exp, frame)
+    
+    def test_render_frame_out_of_range(self):
+        """Test out-of-range frame indices are rejected."""
+        pipeline = VideoPipeline(self.config)
+        with self.assertRaises(IndexError):
+            pipeline.render_frame(self.config.total_frames)
+    
+    def test_run_streaming_pipeline_writes_video(self):
+        """Test streaming pipeline encodes every frame to disk."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "stream.mp4")
+            pipeline = VideoPipeline(self.config)
+            pipeline.run_streaming_pipeline(output_path, self.captions)
+            
+            capture = cv2.VideoCapture(output_path)
+            frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            capture.release()
+        
+        self.assertEqual(frame_count, self.config.total_frames)
+        self.assertEqual(pipeline.frames, [])
+
+
+class TestShardedRenderer(unittest.TestCase):
+    """Test process-sharded rendering."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.config = small_test_config(target_duration=3)
+    
+    def make_pipeline(self, **overrides):
+        """Create a pipeline with one caption."""
+        config = GenerationConfig(**{**self.config.__dict__, **overrides})
+        pipeline = VideoPipeline(config)
+        pipeline.overlay.add_caption("Hi", 3)
+        return pipeline
+    
+    def test_assign_chunks_round_robin(self):
+        """Test chunks are interleaved across workers and cover the timeline."""
+        renderer = ShardedRenderer(self.make_pipeline(), workers=2, chunk_size=4)
+        assignments = renderer.assign_chunks(18)
+        
+        self.assertEqual(assignments[0], [(0, 4), (8, 12), (16, 18)])
+        self.assertEqual(assignments[1], [(4, 8), (12, 16)])
+    
+    def test_sharded_frames_match_serial(self):
+        """Test sharded render reproduces the single-process frames."""
+        expected = list(self.make_pipeline().iter_final_frames())
+        pipeline = self.make_pipeline(render_processes=3, render_chunk_size=2)
+        actual = list(pipeline.iter_final_frames())
+        
+        self.assertEqual(len(actual), len(expected))
+        for exp, frame in zip(expected, actual):
+            np.testing.assert_array_equal(exp, frame)
+    
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(),
+                         "failure injection relies on fork")
+    def test_worker_failures_fail_the_job(self):
+        """Test raising and hard-crashing workers raise instead of hanging."""
+        def raising(frame_idx):
+            raise ValueError("render failed")
+        
+        def crashing(frame_idx):
+            os._exit(3)
+        
+        for broken_render in [raising, crashing]:
+            with self.subTest(failure=broken_render.__name__):
+                pipeline = self.make_pipeline()
+                pipeline.get_timeline()
+                pipeline.render_frame = broken_render
+                renderer = ShardedRenderer(pipeline, workers=2, chunk_size=2,
+                                           poll_interval=0.05)
+                
+                with self.assertRaises(RuntimeError):
+                    list(renderer.iter_frames())
 
 
 if __name__ == '__main__':
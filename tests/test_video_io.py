@@ -0,0 +1,463 @@
+"""
+Unit tests for video encoding backends and exporters.
+"""
+import unittest
+import numpy as np
+import sys
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import cv2
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config import GenerationConfig
+from pipeline import VideoPipeline
+from video_io import (
+    EncodingSettings,
+    FFmpegWriter,
+    OpenCVWriter,
+    Rendition,
+    SegmentedExporter,
+    ThreadedVideoReader,
+    downscale_pyramid,
+    get_ffmpeg_exe,
+)
+
+
+def ffmpeg_available():
+    """Check whether an ffmpeg binary can be found."""
+    try:
+        get_ffmpeg_exe()
+        return True
+    except RuntimeError:
+        return False
+
+
+def make_frames(count, w=64, h=96):
+    """Create distinguishable solid-color test frames."""
+    return [np.full((h, w, 3), (i * 7) % 256, dtype=np.uint8) for i in range(count)]
+
+
+def count_frames(path):
+    """Decode a video and count its frames."""
+    capture = cv2.VideoCapture(path)
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    return count
+
+
+def probe_video_stream(path):
+    """Return ffmpeg's description of the first video stream."""
+    result = subprocess.run([get_ffmpeg_exe(), '-hide_banner', '-i', path],
+                            capture_output=True, text=True)
+    for line in result.stderr.splitlines():
+        if 'Video:' in line:
+            return line
+    return ''
+
+
+class TestEncodingSettings(unittest.TestCase):
+    """Test encoder settings."""
+    
+    def test_from_structure(self):
+        """Test structure encoding spec maps onto ffmpeg settings."""
+        structure = {'encoding': {'codec': 'H.264', 'fps': 30, 'gop_size': 60,
+                                  'pixel_format': 'yuv420p', 'bitrate': '8M'}}
+        settings = EncodingSettings.from_structure(structure, preset='veryfast')
+        
+        self.assertEqual(settings.codec, 'libx264')
+        self.assertEqual(settings.gop_size, 60)
+        self.assertEqual(settings.bitrate, '8M')
+        self.assertEqual(settings.preset, 'veryfast')
+    
+    def test_from_config(self):
+        """Test config encoding fields map onto ffmpeg settings."""
+        config = GenerationConfig(video_codec='HEVC', crf=20, fps=25)
+        settings = EncodingSettings.from_config(config)
+        
+        self.assertEqual(settings.codec, 'libx265')
+        self.assertEqual(settings.crf, 20)
+        self.assertEqual(settings.gop_size, 50)
+    
+    def test_ffmpeg_args(self):
+        """Test rate control and GOP arguments."""
+        args = EncodingSettings(crf=18, bitrate='6M', gop_size=48).ffmpeg_args(24)
+        
+        self.assertIn('-crf', args)
+        self.assertEqual(args[args.index('-maxrate') + 1], '6M')
+        self.assertEqual(args[args.index('-g') + 1], '48')
+        self.assertNotIn('-b:v', args)
+        
+        args = EncodingSettings().ffmpeg_args(30)
+        self.assertEqual(args[args.index('-b:v') + 1], '8M')
+        self.assertEqual(args[args.index('-g') + 1], '60')
+
+
+class TestRenditions(unittest.TestCase):
+    """Test rendition ladder helpers."""
+    
+    def test_downscale_pyramid(self):
+        """Test levels are built from the smallest covering level."""
+        frame = np.random.default_rng(0).integers(0, 256, (96, 64, 3), dtype=np.uint8)
+        levels = downscale_pyramid(frame, [(16, 24), (32, 48), (64, 96)])
+        
+        self.assertIs(levels[(64, 96)], frame)
+        self.assertEqual(levels[(32, 48)].shape, (48, 32, 3))
+        self.assertEqual(levels[(16, 24)].shape, (24, 16, 3))
+        
+        expected = cv2.resize(levels[(32, 48)], (16, 24), interpolation=cv2.INTER_AREA)
+        np.testing.assert_array_equal(levels[(16, 24)], expected)
+    
+    def test_output_path(self):
+        """Test rendition paths derive from the export path."""
+        rendition = Rendition("720p", (720, 1280), "4M", container="mov")
+        
+        self.assertEqual(rendition.output_path("out/video.mp4"), "out/video_720p.mov")
+        self.assertEqual(Rendition("a", (2, 2), path="x.mp4").output_path("y.mp4"), "x.mp4")
+        self.assertEqual(rendition.encoding(EncodingSettings(crf=20)).bitrate, "4M")
+
+
+@unittest.skipUnless(ffmpeg_available(), "ffmpeg not available")
+class TestFFmpegWriter(unittest.TestCase):
+    """Test ffmpeg pipe writer."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, "out.mp4")
+    
+    def tearDown(self):
+        """Remove temporary files."""
+        self.tmp_dir.cleanup()
+    
+    def test_writes_h264_yuv420p(self):
+        """Test frames are encoded as H.264 / yuv420p."""
+        writer = FFmpegWriter(self.output_path, 10, (64, 96),
+                              EncodingSettings(preset='ultrafast'), queue_size=2)
+        for frame in make_frames(25):
+            writer.write(frame)
+        writer.close()
+        
+        stream = probe_video_stream(self.output_path)
+        self.assertIn('h264', stream)
+        self.assertIn('yuv420p', stream)
+        self.assertEqual(count_frames(self.output_path), 25)
+    
+    def test_encoder_errors_are_reported(self):
+        """Test ffmpeg failures raise instead of passing silently."""
+        writer = FFmpegWriter(self.output_path, 10, (64, 96),
+                              EncodingSettings(codec='no_such_encoder'))
+        with self.assertRaises(RuntimeError):
+            for frame in make_frames(200):
+                writer.write(frame)
+            writer.close()
+
+
+@unittest.skipUnless(ffmpeg_available(), "ffmpeg not available")
+class TestThreadedVideoReader(unittest.TestCase):
+    """Test threaded video decoding."""
+    
+    def setUp(self):
+        """Write a short test video."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "in.mp4")
+        writer = FFmpegWriter(self.path, 10, (64, 96),
+                              EncodingSettings(preset='ultrafast', crf=0))
+        for frame in make_frames(30):
+            writer.write(frame)
+        writer.close()
+    
+    def tearDown(self):
+        """Remove temporary files."""
+        self.tmp_dir.cleanup()
+    
+    def test_reads_all_frames(self):
+        """Test frames come back in order with the video's properties."""
+        reader = ThreadedVideoReader(self.path, queue_size=2)
+        frames = list(reader)
+        
+        self.assertEqual(reader.size, (64, 96))
+        self.assertEqual(reader.frame_count, 30)
+        self.assertEqual(len(frames), 30)
+        for frame, expected in zip(frames, make_frames(30)):
+            # yuv420p conversion rounding
+            self.assertLessEqual(np.abs(frame.astype(int) - expected.astype(int)).max(), 4)
+    
+    def test_close_early(self):
+        """Test stopping before the end does not hang the reader thread."""
+        reader = ThreadedVideoReader(self.path, queue_size=1)
+        for i, _ in enumerate(reader):
+            if i == 2:
+                break
+        reader.close()
+        self.assertFalse(reader.thread.is_alive())
+
+
+@unittest.skipUnless(ffmpeg_available(), "ffmpeg not available")
+class TestSegmentedExporter(unittest.TestCase):
+    """Test GOP-aligned parallel segment encoding."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, "out.mp4")
+    
+    def tearDown(self):
+        """Remove temporary files."""
+        self.tmp_dir.cleanup()
+    
+    def test_segments_are_gop_aligned(self):
+        """Test segment boundaries fall on multiples of the GOP size."""
+        segment_lengths = []
+        
+        class CountingWriter:
+            def __init__(self, path):
+                self.writer = OpenCVWriter(path, 10, (64, 96))
+                self.count = 0
+            
+            def write(self, frame):
+                self.writer.write(frame)
+                self.count += 1
+            
+            def close(self):
+                self.writer.close()
+                segment_lengths.append(self.count)
+        
+        exporter = SegmentedExporter(self.output_path, 10, (64, 96), gop_size=6,
+                                     segment_gops=2, workers=3,
+                                     writer_factory=CountingWriter)
+        for frame in make_frames(50):
+            exporter.write(frame)
+        exporter.close()
+        
+        self.assertEqual(sorted(segment_lengths), [2, 12, 12, 12, 12])
+        self.assertEqual(count_frames(self.output_path), 50)
+    
+    def test_segments_encode_concurrently(self):
+        """Test the producer moves on while earlier segments still encode."""
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+        
+        class SlowWriter:
+            def __init__(self, path):
+                self.writer = OpenCVWriter(path, 10, (64, 96))
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+            
+            def write(self, frame):
+                time.sleep(0.02)
+                self.writer.write(frame)
+            
+            def close(self):
+                self.writer.close()
+                with lock:
+                    active[0] -= 1
+        
+        exporter = SegmentedExporter(self.output_path, 10, (64, 96), gop_size=5,
+                                     segment_gops=2, workers=3,
+                                     writer_factory=SlowWriter, queue_size=2)
+        for frame in make_frames(60):
+            exporter.write(frame)
+        exporter.close()
+        
+        self.assertEqual(peak[0], 3)
+        self.assertEqual(count_frames(self.output_path), 60)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["out.mp4"])
+    
+    def test_stitched_output_preserves_order(self):
+        """Test joined segments decode in the original frame order."""
+        frames = make_frames(30)
+        exporter = SegmentedExporter(self.output_path, 10, (64, 96), gop_size=5,
+                                     segment_gops=1, workers=4)
+        for frame in frames:
+            exporter.write(frame)
+        exporter.close()
+        
+        capture = cv2.VideoCapture(self.output_path)
+        for expected in frames:
+            ok, decoded = capture.read()
+            self.assertTrue(ok)
+            self.assertLess(abs(float(decoded.mean()) - float(expected.mean())), 4)
+        capture.release()
+        
+        # Temporary segments are cleaned up
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["out.mp4"])
+    
+    def test_abort_discards_segments(self):
+        """Test aborting stops encoders and removes temporary segments."""
+        exporter = SegmentedExporter(self.output_path, 10, (64, 96), gop_size=5,
+                                     segment_gops=1, workers=2, queue_size=2)
+        for frame in make_frames(23):
+            exporter.write(frame)
+        exporter.abort()
+        
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+
+@unittest.skipUnless(ffmpeg_available(), "ffmpeg not available")
+class TestPipelineExport(unittest.TestCase):
+    """Test pipeline export backends end to end."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, "video.mp4")
+    
+    def tearDown(self):
+        """Remove temporary files."""
+        self.tmp_dir.cleanup()
+    
+    def make_config(self, **kwargs):
+        """Create a small, fast configuration."""
+        params = dict(output_resolution=(64, 96), fps=10, target_duration=5,
+                      base_clip_duration=1)
+        params.update(kwargs)
+        return GenerationConfig(**params)
+    
+    def test_parallel_segment_encoding(self):
+        """Test streaming pipeline with parallel GOP-aligned segments."""
+        config = self.make_config(encode_workers=3, segment_gops=1)
+        VideoPipeline(config).run_streaming_pipeline(self.output_path)
+        
+        self.assertEqual(count_frames(self.output_path), config.total_frames)
+    
+    def test_ffmpeg_backend(self):
+        """Test streaming pipeline through the ffmpeg pipe backend."""
+        config = self.make_config(export_backend="ffmpeg", encoder_preset="ultrafast")
+        VideoPipeline(config).run_streaming_pipeline(self.output_path)
+        
+        self.assertIn('h264', probe_video_stream(self.output_path))
+        self.assertEqual(count_frames(self.output_path), config.total_frames)
+    
+    def test_ffmpeg_segments_with_structure_encoding(self):
+        """Test structure encoding spec drives parallel ffmpeg segments."""
+        config = self.make_config(encode_workers=2, segment_gops=1)
+        encoding = EncodingSettings.from_structure(
+            {'codec': 'H.264', 'gop_size': 20, 'bitrate': '2M'}, preset='ultrafast')
+        VideoPipeline(config).run_streaming_pipeline(self.output_path,
+                                                     encoding=encoding)
+        
+        self.assertIn('h264', probe_video_stream(self.output_path))
+        self.assertEqual(count_frames(self.output_path), config.total_frames)
+    
+    def test_renditions_single_pass(self):
+        """Test every rendition is encoded from one render pass."""
+        config = self.make_config(encoder_preset="ultrafast")
+        pipeline = VideoPipeline(config)
+        renditions = [Rendition("full", (64, 96), "2M"),
+                      Rendition("half", (32, 48), "500k", container="mov")]
+        
+        calls = []
+        render_frame = pipeline.overlay.apply_overlays
+        pipeline.overlay.apply_overlays = lambda *a: calls.append(1) or render_frame(*a)
+        pipeline.run_streaming_pipeline(self.output_path, renditions=renditions)
+        
+        self.assertEqual(len(calls), config.total_frames)
+        for rendition in renditions:
+            path = rendition.output_path(self.output_path)
+            cap = cv2.VideoCapture(path)
+            size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            cap.release()
+            self.assertEqual(size, rendition.resolution)
+            self.assertEqual(count_frames(path), config.total_frames)
+    
+    def test_progressive_hls(self):
+        """Test HLS output reports time to first segment."""
+        config = self.make_config(progressive_format="hls", encoder_preset="ultrafast",
+                                  progressive_segment_seconds=1.0)
+        playlist = os.path.join(self.tmp_dir.name, "live.m3u8")
+        metrics = VideoPipeline(config).run_streaming_pipeline(playlist)
+        
+        with open(playlist, encoding='utf-8') as f:
+            segments = [line for line in f.read().splitlines()
+                        if line and not line.startswith('#')]
+        self.assertEqual(len(segments), config.target_duration)
+        self.assertGreater(metrics['time_to_first_segment'], 0)
+    
+    def test_progressive_fmp4(self):
+        """Test fragmented MP4 output is complete and decodable."""
+        config = self.make_config(progressive_format="fmp4", encoder_preset="ultrafast")
+        metrics = VideoPipeline(config).run_streaming_pipeline(self.output_path)
+        
+        with open(self.output_path, 'rb') as f:
+            self.assertIn(b'moof', f.read())
+        self.assertEqual(count_frames(self.output_path), config.total_frames)
+        self.assertIn('time_to_first_segment', metrics)
+    
+    def test_progressive_rejects_parallel_segments(self):
+        """Test progressive output refuses settings it cannot honour."""
+        config = self.make_config(progressive_format="hls", encode_workers=2)
+        with self.assertRaises(ValueError):
+            VideoPipeline(config).open_writer(self.output_path)
+    
+    def test_rerender_overlays(self):
+        """Test new captions on a clean plate match a full render."""
+        config = self.make_config(export_backend="ffmpeg", encoder_preset="ultrafast",
+                                  crf=0, clean_plate_crf=0)
+        plate_path = os.path.join(self.tmp_dir.name, "plate.mp4")
+        VideoPipeline(config).run_streaming_pipeline(
+            self.output_path, [("Typo", 0)], clean_plate_path=plate_path)
+        
+        fixed_path = os.path.join(self.tmp_dir.name, "fixed.mp4")
+        pipeline = VideoPipeline(config)
+        pipeline.add_captions([("Typo", 0)])
+        written = pipeline.rerender_overlays(plate_path, fixed_path, [("Fixed", 0)])
+        self.assertEqual(written, config.total_frames)
+        
+        direct_path = os.path.join(self.tmp_dir.name, "direct.mp4")
+        VideoPipeline(config).run_streaming_pipeline(direct_path, [("Fixed", 0)])
+        
+        fixed = list(ThreadedVideoReader(fixed_path))
+        direct = list(ThreadedVideoReader(direct_path))
+        self.assertEqual(len(fixed), len(direct))
+        # Only yuv420p round trips separate the two
+        for a, b in zip(fixed, direct):
+            self.assertLess(np.abs(a.astype(int) - b.astype(int)).mean(), 3.0)
+    
+    def test_overlay_track_png(self):
+        """Test the alpha track reproduces the overlays and skips repeats."""
+        config = self.make_config(target_duration=20)
+        pipeline = VideoPipeline(config)
+        pipeline.add_captions([("Hi", 0), ("There", 60)])
+        track_dir = os.path.join(self.tmp_dir.name, "track")
+        rendered = pipeline.export_overlay_track(track_dir)
+        
+        images = sorted(name for name in os.listdir(track_dir) if name.endswith('.png'))
+        self.assertEqual(len(images), rendered)
+        self.assertLess(rendered, config.total_frames)
+        with open(os.path.join(track_dir, "track.ffconcat"), encoding='utf-8') as f:
+            durations = [float(line.split()[1]) for line in f if line.startswith('duration')]
+        self.assertAlmostEqual(sum(durations), config.target_duration, places=3)
+        
+        # Straight-alpha "over" onto a background equals drawing directly
+        background = np.random.default_rng(0).integers(0, 256, (96, 64, 3), dtype=np.uint8)
+        track = cv2.imread(os.path.join(track_dir, images[0]), cv2.IMREAD_UNCHANGED)
+        alpha = track[..., 3:].astype(np.float32) / 255.0
+        composited = background * (1 - alpha) + track[..., :3] * alpha
+        expected = pipeline.overlay.apply_overlays(background, 0, config.total_frames)
+        self.assertLessEqual(np.abs(composited - expected).max(), 2.0)
+        self.assertEqual(track[:20, ..., 3].max(), 0)
+    
+    def test_overlay_track_qtrle(self):
+        """Test the alpha track as QuickTime Animation keeps every frame."""
+        config = self.make_config()
+        pipeline = VideoPipeline(config)
+        pipeline.add_captions([("Hi", 0)])
+        path = os.path.join(self.tmp_dir.name, "track.mov")
+        pipeline.export_overlay_track(path, codec="qtrle")
+        
+        self.assertIn('argb', probe_video_stream(path))
+        self.assertEqual(count_frames(path), config.total_frames)
+
+
+if __name__ == '__main__':
+    unittest.main()